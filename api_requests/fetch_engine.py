@@ -0,0 +1,45 @@
+"""
+Fetch Engine: Run per-stock work concurrently on a thread pool
+
+Pacing is not done here - each network call goes through the per-host
+throttles in rate_limiter, so the pool just keeps enough work in flight
+for those limits to be the bottleneck.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.data_config import FETCH_WORKERS
+
+
+def iter_concurrent(fn, items, max_workers=FETCH_WORKERS):
+    """
+    Run fn(item) for every item and yield results as they complete
+
+    Args:
+        fn: Callable taking one item
+        items: Iterable of work items
+        max_workers: Thread pool size (default: FETCH_WORKERS)
+
+    Yields:
+        Tuple (item, result, error) - error is the raised exception or None
+    """
+    items = list(items)
+    if not items:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        try:
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+        finally:
+            # Consumer stopped early: drop work that has not started
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,158 @@
+"""
+FII/DII Flows: Daily institutional net buying, fetched once per trading day
+
+NSE publishes one row per category (FII/FPI and DII) after the close,
+with gross buy, gross sell and net values in ₹ crore. Every published day
+is kept in a small local store, so a run makes at most one request a day
+and usually none. The scorer gets one market-wide number - the combined
+FII + DII net flow over the last FII_DII_LOOKBACK_DAYS sessions - which is
+the same for every stock.
+
+Store (under CACHE_DIR/metadata/fii_dii.json):
+    {"last_checked": "YYYY-MM-DD",
+     "flows": {"YYYY-MM-DD": {"fii_net": ..., "dii_net": ...}, ...}}
+"""
+
+import os
+import sys
+import json
+import threading
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.providers import get_provider
+from api_requests.ohlcv_cache import last_complete_trading_date
+from config.data_config import CACHE_DIR, FII_DII_LOOKBACK_DAYS, FII_DII_HISTORY_DAYS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FLOWS_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'fii_dii.json')
+
+_store = None
+_lock = threading.Lock()
+
+
+def _to_float(value):
+    """NSE sends numbers as strings, sometimes with thousands separators"""
+    return float(str(value).replace(',', ''))
+
+
+def parse_fii_dii(rows):
+    """
+    Turn NSE fiidiiTradeReact rows into one day's flows
+
+    Args:
+        rows: List of dicts with category, date ('17-Oct-2025'), netValue
+
+    Returns:
+        Tuple (date as 'YYYY-MM-DD', {'fii_net', 'dii_net'}), or None if
+        either category is missing
+    """
+    flows = {}
+    date = None
+    for row in rows or []:
+        category = str(row.get('category', '')).upper()
+        key = 'fii_net' if 'FII' in category else 'dii_net' if 'DII' in category else None
+        if key is None:
+            continue
+        flows[key] = _to_float(row['netValue'])
+        date = datetime.strptime(row['date'], '%d-%b-%Y').date().isoformat()
+
+    if 'fii_net' not in flows or 'dii_net' not in flows:
+        return None
+    return date, flows
+
+
+def _load():
+    """Load the store once per process"""
+    global _store
+    if _store is None:
+        try:
+            with open(FLOWS_FILE) as f:
+                _store = json.load(f)
+        except (OSError, ValueError):
+            _store = {}
+        _store.setdefault('flows', {})
+    return _store
+
+
+def _save(store):
+    os.makedirs(os.path.dirname(FLOWS_FILE), exist_ok=True)
+    tmp_file = FLOWS_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(store, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, FLOWS_FILE)
+
+
+def update_fii_dii(now=None, force_refresh=False):
+    """
+    Fetch the latest published day unless the store is already current
+
+    The store is current when it holds the last complete trading date, or
+    when it was already checked today (NSE publishes in the evening, and
+    holidays publish nothing).
+
+    Returns:
+        True if a request was made
+    """
+    now = now or datetime.now()
+    today = now.date().isoformat()
+
+    with _lock:
+        store = _load()
+        latest = max(store['flows'], default=None)
+        if not force_refresh and (
+                (latest and latest >= last_complete_trading_date(now).isoformat())
+                or store.get('last_checked') == today):
+            return False
+
+        try:
+            parsed = parse_fii_dii(get_provider().get_fii_dii())
+        except Exception as e:
+            print(f"  ⚠️  FII/DII flows unavailable: {e}")
+            return True
+
+        if parsed is not None:
+            date, flows = parsed
+            store['flows'][date] = flows
+        cutoff = (now.date() - timedelta(days=FII_DII_HISTORY_DAYS)).isoformat()
+        store['flows'] = {date: flows for date, flows in store['flows'].items() if date >= cutoff}
+        store['last_checked'] = today
+        _save(store)
+        return True
+
+
+def get_fii_dii_flow(now=None, force_refresh=False):
+    """
+    Market-wide institutional flow for the scorer
+
+    Returns:
+        Dict with date (latest session), days (sessions summed), fii_net,
+        dii_net and net_flow (₹ crore), or None if nothing is stored
+    """
+    update_fii_dii(now, force_refresh=force_refresh)
+
+    with _lock:
+        flows = _load()['flows']
+        dates = sorted(flows)[-FII_DII_LOOKBACK_DAYS:]
+        if not dates:
+            return None
+        fii_net = sum(flows[date]['fii_net'] for date in dates)
+        dii_net = sum(flows[date]['dii_net'] for date in dates)
+
+    return {
+        'date': dates[-1],
+        'days': len(dates),
+        'fii_net': round(fii_net, 2),
+        'dii_net': round(dii_net, 2),
+        'net_flow': round(fii_net + dii_net, 2),
+    }
+
+
+if __name__ == "__main__":
+    flow = get_fii_dii_flow(force_refresh='--refresh' in sys.argv)
+    if flow is None:
+        print("No FII/DII data")
+    else:
+        print(f"FII/DII net flow over {flow['days']} session(s) to {flow['date']}: "
+              f"FII ₹{flow['fii_net']:,.0f} cr, DII ₹{flow['dii_net']:,.0f} cr, "
+              f"combined ₹{flow['net_flow']:,.0f} cr")
@@ -0,0 +1,254 @@
+"""
+F&O Bhavcopy: Whole-universe OI patterns from one download per trading day
+
+Instead of one future_price_volume_data call per symbol, the daily F&O
+bhavcopy (every contract for every symbol) is loaded once, reduced to
+stock futures, cached on disk, and turned into a symbol -> OI pattern
+dict in a single vectorized pass.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.providers import get_provider, PROJECT_ROOT
+from api_requests.ohlcv_cache import last_complete_trading_date
+from api_requests import oi_store
+from config.data_config import CACHE_DIR, BHAVCOPY_LOOKBACK_DAYS, OI_BACKFILL_TRADING_DAYS
+
+BHAVCOPY_DIR = os.path.join(PROJECT_ROOT, CACHE_DIR, 'oi_data', 'bhavcopy')
+
+BHAVCOPY_COLUMNS = ['TRADE_DATE', 'SYMBOL', 'EXPIRY_DATE', 'CLOSE', 'PREV_CLOSE', 'OPEN_INT', 'CHANGE_IN_OI']
+
+# UDiFF (2024+) and legacy bhavcopy column names -> our names
+_UDIFF_COLUMNS = {
+    'TradDt': 'TRADE_DATE',
+    'TckrSymb': 'SYMBOL',
+    'XpryDt': 'EXPIRY_DATE',
+    'ClsPric': 'CLOSE',
+    'PrvsClsgPric': 'PREV_CLOSE',
+    'OpnIntrst': 'OPEN_INT',
+    'ChngInOpnIntrst': 'CHANGE_IN_OI',
+}
+_LEGACY_COLUMNS = {
+    'TIMESTAMP': 'TRADE_DATE',
+    'SYMBOL': 'SYMBOL',
+    'EXPIRY_DT': 'EXPIRY_DATE',
+    'CLOSE': 'CLOSE',
+    'OPEN_INT': 'OPEN_INT',
+    'CHG_IN_OI': 'CHANGE_IN_OI',
+}
+
+
+def normalize_bhavcopy(raw, trade_date):
+    """
+    Reduce a raw bhavcopy to stock futures rows with our column names
+
+    Args:
+        raw: DataFrame from fno_bhav_copy (UDiFF or legacy layout)
+        trade_date: datetime.date the bhavcopy belongs to
+
+    Returns:
+        DataFrame with BHAVCOPY_COLUMNS (PREV_CLOSE is NaN for legacy files)
+    """
+    if raw is None or raw.empty:
+        return None
+
+    raw = raw.rename(columns=lambda c: str(c).strip())
+    if 'FinInstrmTp' in raw.columns:
+        futures = raw[raw['FinInstrmTp'].astype(str).str.strip() == 'STF']
+        futures = futures.rename(columns=_UDIFF_COLUMNS)
+    else:
+        futures = raw[raw['INSTRUMENT'].astype(str).str.strip() == 'FUTSTK']
+        futures = futures.rename(columns=_LEGACY_COLUMNS)
+        futures = futures.assign(PREV_CLOSE=np.nan)
+
+    futures = futures.assign(
+        TRADE_DATE=pd.Timestamp(trade_date),
+        SYMBOL=futures['SYMBOL'].astype(str).str.strip(),
+        # One vectorized parse for every row ('2026-01-27' or '27-Jan-2026')
+        EXPIRY_DATE=pd.to_datetime(futures['EXPIRY_DATE'].astype(str).str.strip(), format='mixed', dayfirst=True),
+    )
+    return futures[BHAVCOPY_COLUMNS].reset_index(drop=True)
+
+
+def _cache_path(trade_date):
+    return os.path.join(BHAVCOPY_DIR, f"{trade_date.isoformat()}.csv")
+
+
+def load_bhavcopy(trade_date, fill_prev_close=True):
+    """
+    Stock futures rows for one trading day, from the cache or the provider
+
+    Args:
+        trade_date: datetime.date
+        fill_prev_close: For legacy files without a previous close, take it
+            from the prior day's bhavcopy
+
+    Returns:
+        Normalized DataFrame, or None if no bhavcopy exists for that day
+    """
+    path = _cache_path(trade_date)
+    if os.path.exists(path):
+        df = pd.read_csv(path, parse_dates=['TRADE_DATE', 'EXPIRY_DATE'])
+    else:
+        try:
+            raw = get_provider().get_fno_bhavcopy(trade_date.strftime("%d-%m-%Y"))
+        except Exception as e:
+            print(f"  ℹ️  No F&O bhavcopy for {trade_date}: {e}")
+            return None
+
+        df = normalize_bhavcopy(raw, trade_date)
+        if df is None or df.empty:
+            return None
+        _save(df, path)
+
+    if fill_prev_close and df['PREV_CLOSE'].isna().all():
+        previous = _previous_bhavcopy(trade_date)
+        if previous is not None:
+            prev_close = previous.set_index(['SYMBOL', 'EXPIRY_DATE'])['CLOSE']
+            keys = pd.MultiIndex.from_frame(df[['SYMBOL', 'EXPIRY_DATE']])
+            df['PREV_CLOSE'] = prev_close.reindex(keys).to_numpy()
+            _save(df, path)
+
+    return df
+
+
+def _save(df, path):
+    os.makedirs(BHAVCOPY_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _previous_bhavcopy(trade_date):
+    day = trade_date
+    for _ in range(BHAVCOPY_LOOKBACK_DAYS):
+        day -= timedelta(days=1)
+        if day.weekday() >= 5:
+            continue
+        df = load_bhavcopy(day, fill_prev_close=False)
+        if df is not None:
+            return df
+    return None
+
+
+def latest_bhavcopy(now=None):
+    """
+    Most recent bhavcopy on or before the last complete trading date
+
+    Matches the price data window (downloads end at the same date), and
+    on a repeat run the cached file is found without any network call.
+    After the close, today's bhavcopy may not be published yet; the
+    lookback then falls back to the previous day.
+
+    Returns:
+        Tuple (trade_date, DataFrame) or (None, None)
+    """
+    day = last_complete_trading_date(now)
+    for _ in range(BHAVCOPY_LOOKBACK_DAYS):
+        if day.weekday() < 5:
+            df = load_bhavcopy(day)
+            if df is not None:
+                return day, df
+        day -= timedelta(days=1)
+    return None, None
+
+
+def detect_oi_patterns(bhavcopy, now=None):
+    """
+    OI pattern for every symbol in one vectorized pass
+
+    Uses the same rules as nselib_oi_fetcher.get_oi_data: nearest expiry
+    that has not passed yet (latest expiry if all have), then the
+    day-on-day change in futures close and open interest.
+
+    Returns:
+        Dict of symbol -> 'long_buildup' / 'short_covering' /
+        'long_unwinding' / 'short_buildup' / 'no_pattern'
+    """
+    if bhavcopy is None or bhavcopy.empty:
+        return {}
+
+    now = pd.Timestamp(now or datetime.now())
+    df = bhavcopy.dropna(subset=['CLOSE', 'PREV_CLOSE', 'OPEN_INT', 'CHANGE_IN_OI'])
+
+    live = df['EXPIRY_DATE'] >= now
+    nearest_live = df['EXPIRY_DATE'].where(live).groupby(df['SYMBOL']).transform('min')
+    latest = df.groupby('SYMBOL')['EXPIRY_DATE'].transform('max')
+    target = nearest_live.fillna(latest)
+    df = df[df['EXPIRY_DATE'] == target]
+
+    price_change = (df['CLOSE'] - df['PREV_CLOSE']).to_numpy()
+    oi_change = df['CHANGE_IN_OI'].to_numpy()
+    patterns = np.select(
+        [
+            (price_change > 0) & (oi_change > 0),
+            (price_change > 0) & (oi_change < 0),
+            (price_change < 0) & (oi_change < 0),
+            (price_change < 0) & (oi_change > 0),
+        ],
+        ['long_buildup', 'short_covering', 'long_unwinding', 'short_buildup'],
+        default='no_pattern'
+    )
+    return dict(zip(df['SYMBOL'], patterns.tolist()))
+
+
+def update_oi_store(trade_date, bhavcopy):
+    """
+    Add the latest bhavcopy to the OI history store
+
+    Trading days before it that the store has never seen are backfilled
+    (from the bhavcopy cache when possible), so multi-day OI features are
+    available from the first run; after that it is one new day per run.
+    """
+    stored = oi_store.stored_dates()
+    frames = [bhavcopy]
+
+    day = trade_date
+    backfilled = 0
+    while backfilled < OI_BACKFILL_TRADING_DAYS - 1:
+        day -= timedelta(days=1)
+        if day.weekday() >= 5:
+            continue
+        backfilled += 1
+        if day in stored:
+            continue
+        previous = load_bhavcopy(day, fill_prev_close=False)
+        if previous is not None:
+            frames.append(previous)
+
+    rows = pd.concat(frames, ignore_index=True).rename(columns={'TRADE_DATE': 'DATE'})
+    oi_store.append_rows(rows)
+
+
+def get_oi_patterns_bulk(now=None):
+    """
+    OI patterns for the whole F&O universe from the latest bhavcopy
+
+    Also brings the OI history store up to date for trend features.
+
+    Returns:
+        Dict of symbol -> pattern (symbols without futures are absent),
+        or None if no bhavcopy could be loaded
+    """
+    trade_date, bhavcopy = latest_bhavcopy(now)
+    if bhavcopy is None:
+        return None
+
+    if trade_date not in oi_store.stored_dates():
+        update_oi_store(trade_date, bhavcopy)
+
+    patterns = detect_oi_patterns(bhavcopy, now)
+    print(f"✅ OI patterns for {len(patterns)} F&O symbols from the {trade_date} bhavcopy")
+    return patterns
+
+
+if __name__ == "__main__":
+    patterns = get_oi_patterns_bulk()
+    if patterns:
+        for symbol in sorted(patterns)[:10]:
+            print(f"   {symbol}: {patterns[symbol]}")
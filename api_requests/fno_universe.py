@@ -0,0 +1,92 @@
+"""
+F&O Universe: Cached index of symbols that have stock derivatives
+
+Most NIFTY 500 stocks have no futures, so asking NSE for their OI only
+produces an error. The eligible list is fetched at most once per
+FNO_LIST_TTL_HOURS, kept in memory and on disk, and the stale copy is
+used if a refresh fails.
+"""
+
+import os
+import sys
+import json
+import threading
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.providers import get_provider, PROJECT_ROOT
+from config.data_config import CACHE_DIR, FNO_LIST_TTL_HOURS
+
+FNO_LIST_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'fno_symbols.json')
+
+# After a failed refresh, keep serving the old list this long before retrying
+RETRY_AFTER = timedelta(minutes=10)
+
+_fno_symbols = None
+_updated_at = None
+_last_attempt = None
+_lock = threading.Lock()
+
+
+def _load_snapshot():
+    try:
+        with open(FNO_LIST_FILE) as f:
+            snapshot = json.load(f)
+        return set(snapshot['symbols']), datetime.fromisoformat(snapshot['updated_at'])
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _save_snapshot(symbols, updated_at):
+    os.makedirs(os.path.dirname(FNO_LIST_FILE), exist_ok=True)
+    tmp_file = FNO_LIST_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump({'updated_at': updated_at.isoformat(), 'symbols': sorted(symbols)}, f, indent=1)
+    os.replace(tmp_file, FNO_LIST_FILE)
+
+
+def get_fno_symbols(force_refresh=False):
+    """
+    Set of F&O-eligible symbols
+
+    Args:
+        force_refresh: Ignore the TTL and ask the provider again
+
+    Returns:
+        Set of symbols, or None if the list has never been available
+        (callers should then treat every symbol as eligible)
+    """
+    global _fno_symbols, _updated_at, _last_attempt
+
+    with _lock:
+        if _fno_symbols is None:
+            _fno_symbols, _updated_at = _load_snapshot()
+
+        now = datetime.now()
+        fresh = _updated_at is not None and now - _updated_at < timedelta(hours=FNO_LIST_TTL_HOURS)
+        retried_recently = _last_attempt is not None and now - _last_attempt < RETRY_AFTER
+        if not force_refresh and (fresh or retried_recently):
+            return _fno_symbols
+
+        _last_attempt = now
+        try:
+            symbols = set(get_provider().get_fno_symbols())
+            if not symbols:
+                raise ValueError("empty F&O list")
+        except Exception as e:
+            if _fno_symbols is not None:
+                print(f"⚠️  F&O list refresh failed ({e}), using list from {_updated_at:%Y-%m-%d %H:%M}")
+            else:
+                print(f"⚠️  F&O list unavailable ({e}), OI will be looked up for every symbol")
+            return _fno_symbols
+
+        _fno_symbols, _updated_at = symbols, datetime.now()
+        _save_snapshot(_fno_symbols, _updated_at)
+        print(f"✅ F&O list refreshed: {len(_fno_symbols)} eligible symbols")
+        return _fno_symbols
+
+
+def is_fno_eligible(symbol):
+    """True if the symbol has stock derivatives (or the list is unavailable)"""
+    symbols = get_fno_symbols()
+    return symbols is None or symbol in symbols
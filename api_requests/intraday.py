@@ -0,0 +1,134 @@
+"""
+Intraday: Patch today's bar into cached history from one index quote snapshot
+
+The NIFTY 500 equity-stockIndices response carries open, dayHigh, dayLow,
+lastPrice and totalTradedVolume for every constituent. During market
+hours that single request is enough to build today's (partial) bar for
+the whole universe; history comes from the OHLCV cache, which needs no
+network once it has been refreshed for the day.
+"""
+
+import os
+import sys
+import pandas as pd
+from datetime import datetime, time as dt_time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.data_config import MARKET_OPEN, MARKET_CLOSE, INTRADAY_PROJECT_VOLUME
+
+QUOTE_FIELDS = {
+    'open': 'Open',
+    'dayHigh': 'High',
+    'dayLow': 'Low',
+    'lastPrice': 'Close',
+    'totalTradedVolume': 'Volume',
+}
+
+
+def _session_fraction(as_of):
+    """Share of the trading session elapsed at as_of (1.0 outside market hours)"""
+    market_open = datetime.combine(as_of.date(), dt_time.fromisoformat(MARKET_OPEN))
+    market_close = datetime.combine(as_of.date(), dt_time.fromisoformat(MARKET_CLOSE))
+    if as_of <= market_open or as_of >= market_close:
+        return 1.0
+    return (as_of - market_open) / (market_close - market_open)
+
+
+def quote_bars(stock_list, now=None):
+    """
+    Today's bar for every symbol in a quote snapshot
+
+    Args:
+        stock_list: Stock dicts from get_nifty_500_stocks (fresh snapshot)
+        now: Current time; only quotes last updated on now's date are used
+
+    Returns:
+        DataFrame indexed by symbol with Date, Open, High, Low, Close, Volume;
+        rows without a usable price (e.g., pre-open) are dropped, and so are
+        rows without a lastUpdateTime from today - a failed refresh hands
+        back the cached snapshot, whose quotes belong to an older session
+    """
+    now = now or datetime.now()
+    quotes = pd.DataFrame(stock_list)
+    if quotes.empty:
+        return pd.DataFrame(columns=['Date'] + list(QUOTE_FIELDS.values()))
+
+    quotes = quotes[quotes['symbol'] != 'NIFTY 500'].set_index('symbol')
+    bars = pd.DataFrame(index=quotes.index)
+    for field, column in QUOTE_FIELDS.items():
+        values = quotes[field] if field in quotes.columns else None
+        bars[column] = pd.to_numeric(values, errors='coerce') if values is not None else float('nan')
+
+    if 'lastUpdateTime' in quotes.columns:
+        as_of = pd.to_datetime(quotes['lastUpdateTime'], format='%d-%b-%Y %H:%M:%S', errors='coerce')
+    else:
+        as_of = pd.Series(pd.NaT, index=quotes.index, dtype='datetime64[ns]')
+    today = as_of.dt.normalize() == pd.Timestamp(now.date())
+    bars, as_of = bars[today].copy(), as_of[today]
+    bars['Date'] = as_of.dt.normalize()
+
+    if INTRADAY_PROJECT_VOLUME:
+        # Scale partial-day volume to a full session so volume_ratio stays comparable
+        fraction = as_of.map(lambda ts: _session_fraction(ts.to_pydatetime()))
+        bars['Volume'] = bars['Volume'] / fraction.clip(lower=0.05)
+
+    bars = bars.dropna(subset=['Close'])
+    bars = bars[bars['Close'] > 0]
+    # Symbols that have not traded yet have no open/high/low
+    for column in ('Open', 'High', 'Low'):
+        bars[column] = bars[column].where(bars[column] > 0, bars['Close'])
+    bars['Volume'] = bars['Volume'].fillna(0).round()
+    return bars[['Date'] + list(QUOTE_FIELDS.values())]
+
+
+def patch_today_bar(df, bar):
+    """
+    Replace (or insert) the bar for bar['Date'] in a history frame
+
+    Only a bar with the same date is replaced; bars on other dates,
+    including any later than the quote, are kept.
+
+    Args:
+        df: OHLCV DataFrame with Date column (not modified)
+        bar: Row from quote_bars
+
+    Returns:
+        New DataFrame in date order with the patched bar
+    """
+    day = pd.Timestamp(bar['Date'])
+    history = df[pd.to_datetime(df['Date']) != day]
+    today = pd.DataFrame([{
+        'Date': day,
+        'Open': float(bar['Open']),
+        'High': float(bar['High']),
+        'Low': float(bar['Low']),
+        'Close': float(bar['Close']),
+        'Volume': int(bar['Volume']),
+    }])
+    patched = pd.concat([history, today], ignore_index=True)
+    return patched.sort_values('Date', kind='stable', ignore_index=True)
+
+
+def patch_price_data(price_data, stock_list, now=None):
+    """
+    Patch today's bar into every symbol's history from one quote snapshot
+
+    Args:
+        price_data: Dict of yf_symbol -> DataFrame (cached history)
+        stock_list: Fresh stock dicts from get_nifty_500_stocks
+
+    Returns:
+        Tuple (patched, unpatched): new dict of yf_symbol -> DataFrame, and
+        symbols whose history was left as is (no quote from today in the snapshot)
+    """
+    bars = quote_bars(stock_list, now)
+    patched = {}
+    unpatched = []
+    for yf_symbol, df in price_data.items():
+        symbol = yf_symbol[:-3] if yf_symbol.endswith('.NS') else yf_symbol
+        if symbol in bars.index:
+            patched[yf_symbol] = patch_today_bar(df, bars.loc[symbol])
+        else:
+            patched[yf_symbol] = df
+            unpatched.append(symbol)
+    return patched, unpatched
@@ -2,15 +2,23 @@
 Complete Orchestrator: Fetch data, calculate indicators, score stocks
 """
 
-import time
 import sys
 import os
+import time
 import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from api_requests.nse_nifty500_list import get_nifty_500_stocks
-from api_requests.yfinance_stock_data import get_stock_data
+from api_requests.yfinance_stock_data import get_stock_data, get_stock_data_bulk
 from api_requests.nselib_oi_fetcher import get_oi_data
+from api_requests.fno_bhavcopy import get_oi_patterns_bulk
+from api_requests.fno_universe import is_fno_eligible
+from api_requests.oi_store import get_oi_features, get_oi_features_all, save_oi_store
+from api_requests.intraday import patch_price_data
+from api_requests.fii_dii import get_fii_dii_flow
+from config.data_config import OI_SOURCE, INTRADAY_REFRESH_MINUTES
+from api_requests.fetch_engine import iter_concurrent
+from api_requests.rate_limiter import print_throttle_stats, save_throttle_state
 
 # Import indicator calculators
 from indicators.yfinance_data.volume import calculate_volume_ma
@@ -20,8 +28,19 @@ from indicators.yfinance_data.ema_50 import calculate_ema_50
 from indicators.yfinance_data.ema_20 import calculate_ema_20
 from indicators.yfinance_data.adx import calculate_adx
 
+from indicators.kernels import calculate_indicators_fused
+from indicators.panel import calculate_universe_indicators
+from indicators.streaming import advance_universe, save_indicator_states
+from indicators.registry import fetch_window_days, check_history
+from indicators.dtypes import apply_price_data_profile, apply_indicator_profile
+from config.indicator_config import INDICATOR_ENGINE
+
 # Import scorer
-from indicators.scorer import score_stock
+from indicators.scorer import score_stock, score_universe
+
+
+class AnalysisCancelled(Exception):
+    """Raised when a run is stopped through its cancel event"""
 
 
 def calculate_all_indicators(df):
@@ -34,6 +53,10 @@ def calculate_all_indicators(df):
     Returns:
         DataFrame with all indicators added
     """
+    if INDICATOR_ENGINE in ('fused', 'panel', 'streaming'):
+        # Single NumPy pass, no scratch columns
+        return apply_indicator_profile(calculate_indicators_fused(df))
+    
     # Make a copy to avoid modifying original
     df = df.copy()
     
@@ -49,32 +72,119 @@ def calculate_all_indicators(df):
     df = calculate_ema_20(df)
     df = calculate_adx(df)
     
-    return df
+    return apply_indicator_profile(df)
+
+
+def prefetch_price_data(stock_list, days=None):
+    """
+    Download OHLCV for every stock in one chunked bulk request
+    
+    Args:
+        stock_list: List of stock dicts from get_nifty_500_stocks
+        days: Calendar days to fetch (default: the warm-up window the
+            registered indicators need)
+    
+    Returns:
+        Dict of yf_symbol -> DataFrame (symbols that failed are absent),
+        in the dtypes of DTYPE_PROFILE
+    """
+    required_days = fetch_window_days()
+    if days is None:
+        days = required_days
+    elif days < required_days:
+        print(f"⚠️  Fetching {days} days, but the indicators need {required_days} to warm up")
+    
+    yf_symbols = [f"{stock['symbol']}.NS" for stock in stock_list]
+    price_data, failed = get_stock_data_bulk(yf_symbols, days=days)
+    
+    if failed:
+        print(f"⚠️  No price data for {len(failed)} symbols: {', '.join(failed[:10])}"
+              f"{' ...' if len(failed) > 10 else ''}")
+    check_history(price_data)
+    
+    return apply_price_data_profile(price_data)
 
 
-def process_stock(symbol, yf_symbol):
+def load_oi_patterns():
+    """
+    Load OI patterns for the whole universe from the daily F&O bhavcopy
+    
+    Returns:
+        Dict of symbol -> pattern, or None to fall back to per-symbol lookups
+    """
+    if OI_SOURCE != 'bhavcopy':
+        return None
+    
+    patterns = get_oi_patterns_bulk()
+    if patterns is None:
+        print("⚠️  F&O bhavcopy unavailable, falling back to per-symbol OI lookups")
+    return patterns
+
+
+def resolve_oi(symbol, oi_patterns=None, oi_features=None):
+    """
+    OI pattern and multi-day OI features for one stock
+    
+    Stocks without futures skip OI work entirely; otherwise the bulk
+    lookup is used, or one NSE request for this symbol if there is none.
+    
+    Returns:
+        Tuple (oi_pattern, oi_features)
+    """
+    symbol_oi_features = None
+    if not is_fno_eligible(symbol):
+        oi_pattern = 'no_pattern'
+    elif oi_patterns is not None:
+        oi_pattern = oi_patterns.get(symbol)
+    else:
+        oi_pattern = get_oi_data(symbol)
+    
+    if oi_pattern not in (None, 'no_pattern'):
+        if oi_features is not None:
+            symbol_oi_features = oi_features.get(symbol)
+        else:
+            symbol_oi_features = get_oi_features(symbol)
+    
+    return oi_pattern, symbol_oi_features
+
+
+def process_stock(symbol, yf_symbol, df=None, verbose=True, oi_patterns=None, oi_features=None,
+                  precomputed=False, scores=None, fii_dii_flow=None):
     """
     Process a single stock: fetch data, calculate indicators, score
     
     Args:
         symbol: Stock symbol (e.g., 'RELIANCE')
         yf_symbol: Yahoo Finance symbol (e.g., 'RELIANCE.NS')
+        df: Prefetched OHLCV DataFrame (fetched here if None)
+        verbose: Print the detailed per-stock breakdown
+        oi_patterns: Dict of symbol -> OI pattern from load_oi_patterns
+            (symbols missing from it have no futures); None fetches per symbol
+        oi_features: Dict of symbol -> multi-day OI trend features from the
+            OI store; None computes them for this symbol
+        precomputed: df already holds the indicator columns (panel engine)
+        scores: Scores already computed by score_universe (skips score_stock)
+        fii_dii_flow: Market-wide FII + DII net flow for this run (one value
+            for every stock, from get_fii_dii_flow)
     
     Returns:
         Dict with symbol, scores, and latest data
     """
     try:
-        # Fetch data
-        df = get_stock_data(yf_symbol, days=60)
+        # Fetch data (unless already prefetched in bulk)
+        if df is None:
+            df = get_stock_data(yf_symbol, days=fetch_window_days())
         
-        # Get OI data (with timeout protection)
-        oi_pattern = get_oi_data(symbol)
+        # Get OI pattern
+        oi_pattern, symbol_oi_features = resolve_oi(symbol, oi_patterns, oi_features)
         
         # Calculate indicators
-        df = calculate_all_indicators(df)
+        if not precomputed:
+            df = calculate_all_indicators(df)
         
         # Calculate scores
-        scores = score_stock(df, oi_pattern)
+        if scores is None:
+            scores = score_stock(df, oi_pattern, symbol_oi_features, fii_dii_flow)
         
         # Get latest price info
         latest = df.iloc[-1]
@@ -90,12 +200,17 @@ def process_stock(symbol, yf_symbol):
             'ema_50': float(latest.get('ema_50', 0)),
             'adx': float(latest.get('adx', 0)),
             'oi_pattern': oi_pattern,
+            'oi_features': symbol_oi_features,
+            'fii_dii_flow': fii_dii_flow,
             'scores': scores,
             'total_score': float(scores['total'])
         }
         
+        if not verbose:
+            return result
+        
         # Print detailed output
-        print(f"✅ Score: {scores['total']:.1f}/80")
+        print(f"✅ Score: {scores['total']:.1f}/100")
         print(f"   OI Pattern: {oi_pattern or 'None'}")
         print(f"   Price: ₹{latest['Close']:.2f}")
         print(f"   RSI: {latest.get('rsi', 0):.2f}")
@@ -105,16 +220,103 @@ def process_stock(symbol, yf_symbol):
         return result
         
     except Exception as e:
-        print(f"  ❌ Error: {e}")
+        print(f"  ❌ Error ({symbol}): {e}")
         return None
 
 
-def fetch_and_score_all_stocks(limit=None):
+def score_stock_list(stock_list, price_data, oi_patterns=None, oi_features=None, intraday=False,
+                     fii_dii_flow=None, on_progress=None, cancel=None):
+    """
+    Score stocks concurrently; network pacing comes from the per-host throttles
+    
+    Args:
+        stock_list: List of stock dicts from get_nifty_500_stocks
+        price_data: Dict of yf_symbol -> DataFrame from prefetch_price_data
+        oi_patterns: Dict of symbol -> OI pattern from load_oi_patterns (or None)
+        oi_features: Dict of symbol -> OI trend features (or None)
+        intraday: The last bar of each frame is today's partial bar
+        fii_dii_flow: Market-wide FII + DII net flow (or None)
+        on_progress: Called as on_progress('scoring', done, total, result)
+            after each stock (result is None if it failed)
+        cancel: threading.Event; once set, unstarted stocks are dropped and
+            AnalysisCancelled is raised
+    
+    Returns:
+        Tuple (results, successful, failed)
+    """
+    results = []
+    failed = 0
+    
+    # Panel engine: every stock's latest indicator row from one vectorized pass
+    # Streaming engine: saved per-stock state advanced by the new bars only
+    latest_rows = None
+    if INDICATOR_ENGINE == 'panel':
+        latest_rows = calculate_universe_indicators(price_data)
+    elif INDICATOR_ENGINE == 'streaming':
+        latest_rows = advance_universe(price_data, provisional_last=intraday)
+    latest_rows = apply_indicator_profile(latest_rows)
+    
+    jobs = []
+    for stock in stock_list:
+        yf_symbol = f"{stock['symbol']}.NS"
+        if yf_symbol not in price_data:
+            print(f"  ❌ {stock['symbol']}: no price data")
+            failed += 1
+        elif latest_rows is not None and yf_symbol not in latest_rows.index:
+            print(f"  ❌ {stock['symbol']}: not enough price history")
+            failed += 1
+        else:
+            jobs.append((stock['symbol'], yf_symbol))
+    
+    # With every latest row and bulk OI at hand, score them all in one vectorized call
+    universe_scores = None
+    if latest_rows is not None and oi_patterns is not None and jobs:
+        oi = [resolve_oi(symbol, oi_patterns, oi_features) for symbol, _ in jobs]
+        yf_symbols = [yf_symbol for _, yf_symbol in jobs]
+        table = score_universe(latest_rows.loc[yf_symbols],
+                               [pattern for pattern, _ in oi], [features for _, features in oi], fii_dii_flow)
+        universe_scores = dict(zip(yf_symbols, table.to_dict('records')))
+    
+    def work(job):
+        symbol, yf_symbol = job
+        if latest_rows is not None:
+            return process_stock(symbol, yf_symbol, df=latest_rows.loc[[yf_symbol]], verbose=False,
+                                 oi_patterns=oi_patterns, oi_features=oi_features, precomputed=True,
+                                 scores=universe_scores[yf_symbol] if universe_scores else None,
+                                 fii_dii_flow=fii_dii_flow)
+        return process_stock(symbol, yf_symbol, df=price_data[yf_symbol], verbose=False,
+                             oi_patterns=oi_patterns, oi_features=oi_features, fii_dii_flow=fii_dii_flow)
+    
+    for done, (job, result, error) in enumerate(iter_concurrent(work, jobs), 1):
+        symbol = job[0]
+        if result:
+            results.append(result)
+            print(f"[{done}/{len(jobs)}] {symbol}: ✅ {result['total_score']:.1f}/100 "
+                  f"(OI: {result['oi_pattern'] or 'None'})")
+        else:
+            failed += 1
+            print(f"[{done}/{len(jobs)}] {symbol}: ❌ {error or 'failed'}")
+        if on_progress:
+            on_progress('scoring', done, len(jobs), result)
+        if cancel is not None and cancel.is_set():
+            raise AnalysisCancelled(f"Cancelled after {done}/{len(jobs)} stocks")
+    
+    return results, len(results), failed
+
+
+def fetch_and_score_all_stocks(limit=None, intraday=False, on_progress=None, cancel=None):
     """
     Main orchestrator: Fetch, calculate, score all stocks
     
     Args:
         limit: Limit number of stocks (for testing)
+        intraday: Rebuild today's bar from a fresh index quote snapshot
+            (one request) on top of cached history instead of waiting for
+            the daily close
+        on_progress: Called as on_progress(stage, done, total, result) -
+            once per step ('fetching', 'scoring') and after every scored stock
+        cancel: threading.Event checked between steps and between stocks
+            (raises AnalysisCancelled once set)
     
     Returns:
         List of stock results sorted by score
@@ -124,7 +326,8 @@ def fetch_and_score_all_stocks(limit=None):
     print("STEP 1: Fetching NIFTY 500 stock list")
     print("="*60)
     
-    stocks = get_nifty_500_stocks()
+    # Intraday needs live quotes; otherwise the cached constituent list will do
+    stocks = get_nifty_500_stocks(force_refresh=intraday)
     stock_list = [s for s in stocks if s['symbol'] != 'NIFTY 500']
     
     if limit:
@@ -134,30 +337,45 @@ def fetch_and_score_all_stocks(limit=None):
     print(f"✅ Got {len(stock_list)} stocks to process\n")
     
     print("="*60)
-    print("STEP 2: Fetching data, calculating indicators, and scoring")
+    print("STEP 2: Fetching price and OI data in bulk")
     print("="*60)
     
-    results = []
-    successful = 0
-    failed = 0
+    if on_progress:
+        on_progress('fetching', 0, len(stock_list), None)
     
-    for i, stock in enumerate(stock_list, 1):
-        symbol = stock['symbol']
-        yf_symbol = f"{symbol}.NS"
-        
-        print(f"\n[{i}/{len(stock_list)}] {symbol}...", end=" ")
-        
-        result = process_stock(symbol, yf_symbol)
-        
-        if result:
-            results.append(result)
-            successful += 1
+    price_data = prefetch_price_data(stock_list)
+    if intraday:
+        price_data, unpatched = patch_price_data(price_data, stocks)
+        price_data = apply_price_data_profile(price_data)
+        if len(unpatched) == len(price_data):
+            print("⚠️  No quotes from today in the index snapshot (refresh failed or market not open yet); "
+                  "scoring on cached history only")
         else:
-            failed += 1
-        
-        # Rate limiting
-        if i < len(stock_list):
-            time.sleep(0.5)
+            print(f"✅ Patched today's bar from the quote snapshot for "
+                  f"{len(price_data) - len(unpatched)}/{len(price_data)} symbols")
+    oi_patterns = load_oi_patterns()
+    oi_features = get_oi_features_all() if oi_patterns is not None else None
+    
+    # Market-wide factor: one stored value per trading day, shared by every stock
+    fii_dii = get_fii_dii_flow()
+    fii_dii_flow = fii_dii['net_flow'] if fii_dii else None
+    if fii_dii:
+        print(f"✅ FII/DII net flow ({fii_dii['days']} session(s) to {fii_dii['date']}): ₹{fii_dii_flow:,.0f} cr")
+    
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled("Cancelled before scoring")
+    
+    print("\n" + "="*60)
+    print("STEP 3: Calculating indicators and scoring")
+    print("="*60)
+    
+    if on_progress:
+        on_progress('scoring', 0, len(stock_list), None)
+    results, successful, failed = score_stock_list(stock_list, price_data, oi_patterns, oi_features,
+                                                   intraday=intraday, fii_dii_flow=fii_dii_flow,
+                                                   on_progress=on_progress, cancel=cancel)
+    save_oi_store()
+    save_indicator_states()
     
     # Sort by score (highest first)
     results.sort(key=lambda x: x['total_score'], reverse=True)
@@ -169,97 +387,72 @@ def fetch_and_score_all_stocks(limit=None):
     print(f"✅ Successful: {successful}")
     print(f"❌ Failed: {failed}")
     print(f"Success rate: {(successful/len(stock_list)*100):.1f}%")
+    print_throttle_stats()
+    save_throttle_state()
     
     return results
 
 
-def run_analysis(limit=5):
+def run_analysis(limit=5, intraday=False, on_progress=None, cancel=None):
     """
     Function called by Flask server
     Processes 'limit' number of stocks and returns top 5 by score
     
     Args:
         limit: Number of stocks to process
+        intraday: Score on today's partial bar (see fetch_and_score_all_stocks)
+        on_progress, cancel: See fetch_and_score_all_stocks
     
     Returns:
         Top 5 stocks by score from the processed stocks
     """
-    results = fetch_and_score_all_stocks(limit=limit)
+    results = fetch_and_score_all_stocks(limit=limit, intraday=intraday, on_progress=on_progress, cancel=cancel)
     # Always return top 5 from processed stocks
     return results[:5]
 
 
-def run_analysis_batched(limit=5):
+def run_analysis_batched(limit=5, intraday=False, on_progress=None, cancel=None):
     """
-    Process all stocks in batches of 100 with 1-minute gaps between batches
-    Then return top N by score
+    Process all stocks, then return top N by score
     
-    This prevents NSE API rate limiting by taking breaks between batches
+    Historically this ran batches of 100 with 1-minute gaps to avoid NSE
+    rate limiting; requests are now paced by the per-host token buckets
+    in rate_limiter, so the whole universe goes through one concurrent run.
     
     Args:
         limit: Number of top stocks to return (default 5)
+        intraday: Score on today's partial bar (see fetch_and_score_all_stocks)
+        on_progress, cancel: See fetch_and_score_all_stocks
     
     Returns:
         Top N stocks by score from ALL processed stocks
     """
-    print("="*60)
-    print("STEP 1: Fetching NIFTY 500 stock list")
-    print("="*60)
-    
-    stocks = get_nifty_500_stocks()
-    stock_list = [s for s in stocks if s['symbol'] != 'NIFTY 500']
+    all_results = fetch_and_score_all_stocks(intraday=intraday, on_progress=on_progress, cancel=cancel)
+    return all_results[:limit]
+
+
+def watch_intraday(top_n=10, interval_minutes=INTRADAY_REFRESH_MINUTES, cycles=None):
+    """
+    Re-rank the full universe every few minutes during market hours
     
-    print(f"✅ Got {len(stock_list)} stocks to process\n")
+    After the first cycle of the day fills the OHLCV cache, each cycle
+    costs one NSE request (the index quote snapshot).
     
-    all_results = []
-    successful = 0
-    failed = 0
-    batch_size = 100
-    
-    for batch_num in range(0, len(stock_list), batch_size):
-        batch_start = batch_num + 1
-        batch_end = min(batch_num + batch_size, len(stock_list))
-        batch = stock_list[batch_num:batch_end]
-        
-        print("\n" + "="*60)
-        print(f"BATCH {batch_num//batch_size + 1}: Processing stocks {batch_start} to {batch_end}")
-        print("="*60)
-        
-        # Process this batch
-        for i, stock in enumerate(batch, batch_start):
-            symbol = stock['symbol']
-            yf_symbol = f"{symbol}.NS"
-            
-            print(f"\n[{i}/{len(stock_list)}] {symbol}...", end=" ")
-            
-            result = process_stock(symbol, yf_symbol)
-            
-            if result:
-                all_results.append(result)
-                successful += 1
-            else:
-                failed += 1
-            
-            # Rate limiting within batch
-            time.sleep(0.5)
+    Args:
+        top_n: Number of stocks to display per cycle
+        interval_minutes: Minutes between the start of two cycles
+        cycles: Stop after this many cycles (None runs until interrupted)
+    """
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        started = time.monotonic()
+        results = fetch_and_score_all_stocks(intraday=True)
+        if results:
+            display_top_stocks(results, top_n=top_n)
+        cycle += 1
         
-        # Wait 60 seconds before next batch (except for last batch)
-        if batch_end < len(stock_list):
-            print(f"\n\n⏸️  Batch {batch_num//batch_size + 1} complete. Waiting 60 seconds before next batch...")
-            time.sleep(60)
-    
-    # Sort all results by score (highest first)
-    all_results.sort(key=lambda x: x['total_score'], reverse=True)
-    
-    print("\n" + "="*60)
-    print("SUMMARY")
-    print("="*60)
-    print(f"Total processed: {len(stock_list)}")
-    print(f"✅ Successful: {successful}")
-    print(f"❌ Failed: {failed}")
-    print(f"Success rate: {(successful/len(stock_list)*100):.1f}%")
-    
-    return all_results[:limit]
+        if cycles is None or cycle < cycles:
+            time.sleep(max(0, interval_minutes * 60 - (time.monotonic() - started)))
 
 
 def display_top_stocks(results, top_n=10):
@@ -277,15 +470,25 @@ def display_top_stocks(results, top_n=10):
     for i, stock in enumerate(results[:top_n], 1):
         print(f"\n{i}. {stock['symbol']}")
         print(f"   Price: ₹{stock['price']:.2f}")
-        print(f"   Total Score: {stock['total_score']:.1f}/70")
+        print(f"   Total Score: {stock['total_score']:.1f}/100")
         print(f"   └─ Volume: {stock['scores']['volume']:.0f}/100 (ratio: {stock['volume_ratio']:.2f}x)")
         print(f"   └─ RSI: {stock['scores']['rsi']:.0f}/100 (value: {stock['rsi']:.1f})")
         print(f"   └─ MACD: {stock['scores']['macd']:.0f}/100")
-        print(f"   └─ EMA Trend: {stock['scores']['ema_trend']:.0f}/100")
+        print(f"   └─ EMA Trend: {stock['scores']['trend_ema']:.0f}/100")
         print(f"   └─ ADX: {stock['scores']['adx']:.0f}/100 (value: {stock['adx']:.1f})")
+        print(f"   └─ OI: {stock['scores']['oi_pattern']:.0f}/100 ({stock['oi_pattern'] or 'None'})")
+        if stock.get('fii_dii_flow') is not None:
+            print(f"   └─ FII/DII: {stock['scores']['fii_dii']:.0f}/100 (net: ₹{stock['fii_dii_flow']:,.0f} cr)")
+        else:
+            print(f"   └─ FII/DII: {stock['scores']['fii_dii']:.0f}/100 (no data)")
 
 
 if __name__ == "__main__":
+    if '--intraday' in sys.argv:
+        print("\n🚀 Starting intraday re-ranking (Ctrl+C to stop)...\n")
+        watch_intraday()
+        sys.exit(0)
+    
     print("\n🚀 Starting Complete Stock Analysis Pipeline...\n")
     
     # Process first 10 stocks for testing
@@ -1,67 +1,116 @@
 """
 NSE API: Fetch NIFTY 500 Stock List
+
+Constituents change a few times a year, so the list is fetched at most
+once per UNIVERSE_TTL_HOURS, kept in memory and on disk, and the last
+good snapshot is used when NSE is unavailable.
 """
 
-import requests
+import os
+import sys
 import json
+import threading
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api_requests.providers import get_provider, PROJECT_ROOT
+from config.data_config import CACHE_DIR, UNIVERSE_TTL_HOURS
 
-def get_nifty_500_stocks():
-    """
-    Fetch NIFTY 500 stock list from NSE
-    
-    Returns:
-        list: List of dictionaries containing stock data
-    """
+UNIVERSE_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'nifty500_universe.json')
+
+# After a failed refresh, keep serving the old list this long before retrying
+RETRY_AFTER = timedelta(minutes=10)
+
+_stock_list = None
+_updated_at = None
+_last_attempt = None
+_lock = threading.Lock()
+
+
+def _fetch_stock_list():
+    """Fetch constituents from the provider and keep only the fields we need"""
+    stocks = get_provider().get_index_constituents()
     
-    url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20500"
+    # Extract only the fields we need
+    stock_list = []
+    for stock in stocks:
+        stock_info = {
+            'symbol': stock.get('symbol'),
+            'open': stock.get('open'),
+            'dayHigh': stock.get('dayHigh'),
+            'dayLow': stock.get('dayLow'),
+            'lastPrice': stock.get('lastPrice'),
+            'previousClose': stock.get('previousClose'),
+            'totalTradedVolume': stock.get('totalTradedVolume'),
+            'yearHigh': stock.get('yearHigh'),
+            'yearLow': stock.get('yearLow'),
+            'lastUpdateTime': stock.get('lastUpdateTime'),
+        }
+        stock_list.append(stock_info)
     
-    # NSE requires proper headers
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/json',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Connection': 'keep-alive',
-    }
+    return stock_list
+
+
+def _load_snapshot():
+    try:
+        with open(UNIVERSE_FILE) as f:
+            snapshot = json.load(f)
+        return snapshot['stocks'], datetime.fromisoformat(snapshot['updated_at'])
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _save_snapshot(stock_list, updated_at):
+    os.makedirs(os.path.dirname(UNIVERSE_FILE), exist_ok=True)
+    tmp_file = UNIVERSE_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump({'updated_at': updated_at.isoformat(), 'stocks': stock_list}, f, indent=1)
+    os.replace(tmp_file, UNIVERSE_FILE)
+
+
+def get_nifty_500_stocks(force_refresh=False):
+    """
+    Fetch NIFTY 500 stock list from NSE (or the configured offline provider)
     
-    # Create session to maintain cookies
-    session = requests.Session()
+    The quote fields (lastPrice, totalTradedVolume, ...) are as of the
+    last refresh; pass force_refresh=True when they need to be live
+    (intraday mode).
     
-    # First visit the main page to get cookies
-    session.get('https://www.nseindia.com', headers=headers, timeout=10)
+    Args:
+        force_refresh: Ignore the TTL and ask the provider again
     
-    # Now fetch the data
-    response = session.get(url, headers=headers, timeout=10)
+    Returns:
+        list: List of dictionaries containing stock data
     
-    print(f"Status Code: {response.status_code}")
-    print(f"Response Text (first 500 chars): {response.text[:500]}")
+    Raises:
+        Exception if the list could not be fetched and no snapshot exists
+    """
+    global _stock_list, _updated_at, _last_attempt
     
-    if response.status_code == 200:
+    with _lock:
+        if _stock_list is None:
+            _stock_list, _updated_at = _load_snapshot()
+        
+        now = datetime.now()
+        fresh = _updated_at is not None and now - _updated_at < timedelta(hours=UNIVERSE_TTL_HOURS)
+        retried_recently = _last_attempt is not None and now - _last_attempt < RETRY_AFTER
+        if _stock_list is not None and not force_refresh and (fresh or retried_recently):
+            return list(_stock_list)
+        
+        _last_attempt = now
         try:
-            data = response.json()
-            stocks = data.get('data', [])
-            
-            # Extract only the fields we need
-            stock_list = []
-            for stock in stocks:
-                stock_info = {
-                    'symbol': stock.get('symbol'),
-                    'open': stock.get('open'),
-                    'dayHigh': stock.get('dayHigh'),
-                    'dayLow': stock.get('dayLow'),
-                    'lastPrice': stock.get('lastPrice'),
-                    'previousClose': stock.get('previousClose'),
-                    'totalTradedVolume': stock.get('totalTradedVolume'),
-                    'yearHigh': stock.get('yearHigh'),
-                    'yearLow': stock.get('yearLow'),
-                }
-                stock_list.append(stock_info)
-            
-            return stock_list
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse JSON: {e}")
-    else:
-        raise Exception(f"Failed to fetch data. Status code: {response.status_code}")
+            stock_list = _fetch_stock_list()
+            if not stock_list:
+                raise ValueError("empty constituent list")
+        except Exception as e:
+            if _stock_list is None:
+                raise
+            print(f"⚠️  NIFTY 500 refresh failed ({e}), using list from {_updated_at:%Y-%m-%d %H:%M}")
+            return list(_stock_list)
+        
+        _stock_list, _updated_at = stock_list, datetime.now()
+        _save_snapshot(_stock_list, _updated_at)
+        return list(_stock_list)
 
 
 if __name__ == "__main__":
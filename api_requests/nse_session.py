@@ -0,0 +1,127 @@
+"""
+NSE Session: One long-lived, cookie-warmed session for nseindia.com APIs
+
+NSE only answers API calls that carry the cookies set by its home page.
+Instead of a new session and warm-up GET per call, one session is kept
+for the process; the cookies are refreshed when they get older than
+NSE_COOKIE_TTL_MINUTES or when NSE rejects them (401/403).
+
+Usage:
+    data = get_nse_session().get_json("https://www.nseindia.com/api/...")
+"""
+
+import os
+import sys
+import time
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.rate_limiter import get_throttle
+from config.data_config import NSE_COOKIE_TTL_MINUTES, NSE_REQUEST_TIMEOUT
+
+NSE_HOME_URL = "https://www.nseindia.com"
+
+# NSE requires proper headers
+NSE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+}
+
+# Status codes that mean the cookies are missing or expired
+_COOKIE_REJECTED = (401, 403)
+
+
+class NSESession:
+    """Thread-safe wrapper around a requests.Session with cookie refresh"""
+
+    def __init__(self, cookie_ttl_minutes=NSE_COOKIE_TTL_MINUTES, timeout=NSE_REQUEST_TIMEOUT):
+        self.cookie_ttl = cookie_ttl_minutes * 60
+        self.timeout = timeout
+        self._session = None
+        self._warmed_at = None
+        self._lock = threading.Lock()
+
+    def _new_session(self):
+        import requests
+
+        session = requests.Session()
+        session.headers.update(NSE_HEADERS)
+        return session
+
+    def _warm_up(self):
+        """Visit the home page to (re)load cookies; caller holds the lock"""
+        if self._session is None:
+            self._session = self._new_session()
+        self._session.cookies.clear()
+
+        with get_throttle('nse') as throttle:
+            response = self._session.get(NSE_HOME_URL, timeout=self.timeout)
+            throttle.mark(status=response.status_code)
+
+        if response.status_code != 200:
+            raise Exception(f"NSE cookie warm-up failed. Status code: {response.status_code}")
+        self._warmed_at = time.monotonic()
+
+    def _ensure_cookies(self, force=False):
+        with self._lock:
+            expired = self._warmed_at is None or time.monotonic() - self._warmed_at > self.cookie_ttl
+            if force or expired:
+                self._warm_up()
+            return self._session
+
+    def get(self, url, **kwargs):
+        """
+        GET an NSE URL with valid cookies
+
+        Re-warms the cookies and retries once if NSE rejects them.
+
+        Returns:
+            requests.Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        session = self._ensure_cookies()
+
+        for attempt in range(2):
+            with get_throttle('nse') as throttle:
+                response = session.get(url, **kwargs)
+                rejected = response.status_code in _COOKIE_REJECTED and attempt == 0
+                if rejected:
+                    # Most likely stale cookies, not rate limiting: retried, not used for pacing
+                    throttle.mark(status=response.status_code, retried=True)
+                else:
+                    throttle.mark(status=response.status_code, empty=not response.content)
+
+            if not rejected:
+                return response
+            session = self._ensure_cookies(force=True)
+
+    def get_json(self, url, **kwargs):
+        """GET an NSE API URL and decode the JSON body"""
+        response = self.get(url, **kwargs)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch {url}. Status code: {response.status_code}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise Exception(f"Failed to parse JSON from {url}: {e}")
+
+    def reset(self):
+        """Drop the session and cookies (next call warms up again)"""
+        with self._lock:
+            self._session = None
+            self._warmed_at = None
+
+
+_nse_session = None
+_nse_session_lock = threading.Lock()
+
+
+def get_nse_session():
+    """Shared NSE session for this process"""
+    global _nse_session
+    with _nse_session_lock:
+        if _nse_session is None:
+            _nse_session = NSESession()
+        return _nse_session
@@ -1,15 +1,24 @@
 """
 NSE Open Interest Data Fetcher using nselib
+Futures data comes through the configured market data provider (see providers.py)
 """
-import nselib
-from nselib import derivatives
+import os
+import sys
 from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.providers import get_provider
+from api_requests.ohlcv_cache import last_complete_trading_date, session_settled_at
+from api_requests import oi_store
 
 def get_oi_data(symbol, days=5):
     """
     Fetch Open Interest data for a symbol using nselib
     Returns OI pattern: 'long_buildup', 'short_covering', 'long_unwinding', 'short_buildup', or None
     
+    Rows are kept in the local OI store, so only days after the last
+    stored one are downloaded, and nothing at all once today's data is in.
+    
     Args:
         symbol: Stock symbol (without .NS suffix)
         days: Number of days of historical data to fetch
@@ -19,54 +28,31 @@ def get_oi_data(symbol, days=5):
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # Format dates as DD-MM-YYYY
-        start_date_str = start_date.strftime("%d-%m-%Y")
-        end_date_str = end_date.strftime("%d-%m-%Y")
-        
-        # Fetch futures data
-        data = derivatives.future_price_volume_data(
-            symbol=symbol,
-            instrument="FUTSTK",
-            from_date=start_date_str,
-            to_date=end_date_str
+        last_date = oi_store.last_stored_date(symbol)
+        complete = last_complete_trading_date(end_date)
+        fresh = last_date is not None and (
+            last_date >= complete or oi_store.checked_since(symbol, session_settled_at(complete))
         )
         
-        if data is None or data.empty:
-            return None
-        
-        # Filter for nearest expiry futures contract only to ensure deterministic results
-        # Parse EXPIRY_DT and get the nearest future expiry
-        data['EXPIRY_DATE'] = data['EXPIRY_DT'].apply(
-            lambda x: datetime.strptime(x, "%d-%b-%Y") if isinstance(x, str) else x
-        )
+        if not fresh:
+            if last_date is not None:
+                start_date = max(start_date, datetime.combine(last_date + timedelta(days=1), datetime.min.time()))
+            
+            # Format dates as DD-MM-YYYY
+            start_date_str = start_date.strftime("%d-%m-%Y")
+            end_date_str = end_date.strftime("%d-%m-%Y")
+            
+            # Fetch futures data
+            data = get_provider().get_futures(symbol, start_date_str, end_date_str)
+            oi_store.append_futures(symbol, data)
+            oi_store.mark_checked(symbol, end_date)
         
-        # Get current month's contract (nearest expiry in the future)
-        current_date = datetime.now()
-        future_expiries = data[data['EXPIRY_DATE'] >= current_date]
-        
-        if future_expiries.empty:
-            # If no future expiries, take the most recent expired one
-            nearest_expiry = data['EXPIRY_DATE'].max()
-        else:
-            # Take the nearest future expiry
-            nearest_expiry = future_expiries['EXPIRY_DATE'].min()
-        
-        # Filter data for only this expiry
-        data = data[data['EXPIRY_DATE'] == nearest_expiry].copy()
-        
-        if data.empty or len(data) < 2:
+        # Nearest expiry contract only, to ensure deterministic results
+        changes = oi_store.nearest_expiry_pattern(oi_store.symbol_history(symbol), end_date)
+        if changes is None:
             return None
         
-        # Sort by timestamp
-        data = data.sort_values('TIMESTAMP')
-        
-        # Get latest and previous values
-        latest = data.iloc[-1]
-        previous = data.iloc[-2]
-        
-        # Calculate changes (using correct column names)
-        price_change = latest['CLOSING_PRICE'] - previous['CLOSING_PRICE']
-        oi_change = latest['OPEN_INT'] - previous['OPEN_INT']
+        price_change, oi_change = changes
         
         # Detect pattern
         pattern = detect_oi_pattern(price_change, oi_change)
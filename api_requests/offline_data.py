@@ -0,0 +1,278 @@
+"""
+Offline Data: Write synthetic or recorded datasets for the FileProvider
+
+Usage:
+    python api_requests/offline_data.py synthetic data/recorded --symbols 500 --days 400
+    python api_requests/offline_data.py record data/recorded --limit 50
+
+Then run the pipeline offline with:
+    STG_DATA_PROVIDER=file STG_DATA_DIR=data/recorded python api_requests/main.py
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.ohlcv_cache import last_complete_trading_date, download_end
+from api_requests.providers import LiveProvider, PROJECT_ROOT
+
+
+def _resolve(directory):
+    if not os.path.isabs(directory):
+        directory = os.path.join(PROJECT_ROOT, directory)
+    for sub in ('ohlcv', 'futures', 'fno_bhavcopy'):
+        os.makedirs(os.path.join(directory, sub), exist_ok=True)
+    return directory
+
+
+def _monthly_expiries(start, end):
+    """Last Thursday of every month between start and end (plus the next one)"""
+    expiries = []
+    month = pd.Timestamp(start).to_period('M')
+    last = pd.Timestamp(end).to_period('M') + 1
+    while month <= last:
+        day = month.to_timestamp(how='end').normalize()
+        while day.weekday() != 3:
+            day -= timedelta(days=1)
+        expiries.append(day)
+        month += 1
+    return expiries
+
+
+def _synthetic_futures(symbol, ohlcv, rng):
+    """Near and next month futures rows in nselib future_price_volume_data shape"""
+    dates = ohlcv['Date']
+    expiries = _monthly_expiries(dates.iloc[0], dates.iloc[-1])
+    rows = []
+    for expiry_num, expiry in enumerate(expiries):
+        live = ohlcv[(dates <= expiry) & (dates > expiry - timedelta(days=62))]
+        if live.empty:
+            continue
+        oi = rng.integers(100_000, 5_000_000) * np.exp(np.cumsum(rng.normal(0, 0.04, len(live))))
+        oi = oi.astype(np.int64)
+        basis = 1 + 0.002 * (expiry_num % 3)
+        for (_, bar), open_int, prev_oi in zip(live.iterrows(), oi, np.concatenate([[oi[0]], oi[:-1]])):
+            close = round(bar['Close'] * basis, 2)
+            rows.append({
+                'TIMESTAMP': bar['Date'].strftime('%d-%b-%Y'),
+                'INSTRUMENT': 'FUTSTK',
+                'SYMBOL': symbol,
+                'EXPIRY_DT': expiry.strftime('%d-%b-%Y'),
+                'STRIKE_PRICE': 0,
+                'OPTION_TYPE': 'XX',
+                'MARKET_TYPE': 'N',
+                'OPENING_PRICE': round(bar['Open'] * basis, 2),
+                'TRADE_HIGH_PRICE': round(bar['High'] * basis, 2),
+                'TRADE_LOW_PRICE': round(bar['Low'] * basis, 2),
+                'CLOSING_PRICE': close,
+                'LAST_TRADED_PRICE': close,
+                'SETTLE_PRICE': close,
+                'TOT_TRADED_QTY': int(bar['Volume'] // 10),
+                'OPEN_INT': int(open_int),
+                'CHANGE_IN_OI': int(open_int - prev_oi),
+                'MARKET_LOT': 500,
+                'UNDERLYING_VALUE': bar['Close'],
+            })
+    return pd.DataFrame(rows)
+
+
+def _write_bhavcopies(directory, futures, days=15):
+    """Write the last N days of futures rows as UDiFF-layout F&O bhavcopies"""
+    if not futures:
+        return
+    df = pd.concat(futures, ignore_index=True)
+    df['TRADE_DATE'] = pd.to_datetime(df['TIMESTAMP'], format='%d-%b-%Y')
+    df = df.sort_values(['SYMBOL', 'EXPIRY_DT', 'TRADE_DATE'])
+    df['PREV_CLOSE'] = df.groupby(['SYMBOL', 'EXPIRY_DT'])['CLOSING_PRICE'].shift(1).fillna(df['CLOSING_PRICE'])
+
+    for trade_date in sorted(df['TRADE_DATE'].unique())[-days:]:
+        day = df[df['TRADE_DATE'] == trade_date]
+        bhavcopy = pd.DataFrame({
+            'TradDt': day['TRADE_DATE'].dt.strftime('%Y-%m-%d'),
+            'FinInstrmTp': 'STF',
+            'TckrSymb': day['SYMBOL'],
+            'XpryDt': pd.to_datetime(day['EXPIRY_DT'], format='%d-%b-%Y').dt.strftime('%Y-%m-%d'),
+            'OpnPric': day['OPENING_PRICE'],
+            'HghPric': day['TRADE_HIGH_PRICE'],
+            'LwPric': day['TRADE_LOW_PRICE'],
+            'ClsPric': day['CLOSING_PRICE'],
+            'PrvsClsgPric': day['PREV_CLOSE'],
+            'UndrlygPric': day['UNDERLYING_VALUE'],
+            'OpnIntrst': day['OPEN_INT'],
+            'ChngInOpnIntrst': day['CHANGE_IN_OI'],
+            'TtlTradgVol': day['TOT_TRADED_QTY'],
+        })
+        name = pd.Timestamp(trade_date).strftime('%Y-%m-%d')
+        bhavcopy.to_csv(os.path.join(directory, 'fno_bhavcopy', f"{name}.csv"), index=False)
+
+
+def write_synthetic_dataset(directory, n_symbols=500, days=400, fno_fraction=0.4, seed=0, end_date=None):
+    """
+    Generate a deterministic random-walk universe for offline runs
+
+    Args:
+        directory: Output directory (relative to the project root or absolute)
+        n_symbols: Number of stocks in the universe
+        days: Calendar days of history ending at end_date
+        fno_fraction: Share of stocks that get futures data
+        seed: Random seed - same seed and dates give identical files
+        end_date: Last calendar day of history (default: the last complete
+            trading date, as a live download would end)
+    """
+    directory = _resolve(directory)
+    end_date = pd.Timestamp(end_date or last_complete_trading_date())
+    dates = pd.bdate_range(end_date - timedelta(days=days), end_date)
+    rng = np.random.default_rng(seed)
+
+    universe = [{'symbol': 'NIFTY 500'}]
+    all_futures = []
+    for i in range(n_symbols):
+        symbol = f"SYN{i:04d}"
+        start_price = rng.uniform(50, 3000)
+        returns = rng.normal(0.0005, 0.02, len(dates))
+        close = start_price * np.exp(np.cumsum(returns))
+        open_ = close * (1 + rng.normal(0, 0.005, len(dates)))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.015, len(dates)))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.015, len(dates)))
+        volume = (rng.lognormal(13, 0.5, len(dates))).astype(np.int64)
+
+        ohlcv = pd.DataFrame({
+            'Date': dates,
+            'Open': open_.round(2),
+            'High': high.round(2),
+            'Low': low.round(2),
+            'Close': close.round(2),
+            'Volume': volume,
+        })
+        ohlcv.to_csv(os.path.join(directory, 'ohlcv', f"{symbol}.NS.csv"), index=False)
+
+        if rng.random() < fno_fraction:
+            futures = _synthetic_futures(symbol, ohlcv, rng)
+            futures.to_csv(os.path.join(directory, 'futures', f"{symbol}.csv"), index=False)
+            all_futures.append(futures)
+
+        last = ohlcv.iloc[-1]
+        universe.append({
+            'symbol': symbol,
+            'open': float(last['Open']),
+            'dayHigh': float(last['High']),
+            'dayLow': float(last['Low']),
+            'lastPrice': float(last['Close']),
+            'previousClose': float(ohlcv['Close'].iloc[-2]),
+            'totalTradedVolume': int(last['Volume']),
+            'yearHigh': float(ohlcv['High'].tail(250).max()),
+            'yearLow': float(ohlcv['Low'].tail(250).min()),
+            'lastUpdateTime': last['Date'].strftime('%d-%b-%Y') + ' 15:30:00',
+        })
+
+    with open(os.path.join(directory, 'universe.json'), 'w') as f:
+        json.dump({'data': universe}, f, indent=1)
+
+    _write_bhavcopies(directory, all_futures)
+
+    # Latest FII/DII flows, in the shape NSE publishes them (₹ crore as strings)
+    flow_date = dates[-1].strftime('%d-%b-%Y')
+    fii_dii = []
+    for category in ('DII **', 'FII/FPI *'):
+        buy, sell = rng.uniform(8000, 16000, 2)
+        fii_dii.append({'category': category, 'date': flow_date, 'buyValue': f"{buy:.2f}",
+                        'sellValue': f"{sell:.2f}", 'netValue': f"{buy - sell:.2f}"})
+    with open(os.path.join(directory, 'fii_dii.json'), 'w') as f:
+        json.dump(fii_dii, f, indent=1)
+
+    print(f"✅ Wrote {n_symbols} synthetic stocks ({len(dates)} bars each) to {directory}")
+
+
+def record_live_dataset(directory, limit=None, days=400, batch_size=50):
+    """
+    Record the live universe, OHLCV and futures data for offline replay
+
+    Args:
+        directory: Output directory (relative to the project root or absolute)
+        limit: Only record the first N stocks
+        days: Calendar days of OHLCV history to record
+        batch_size: Tickers per yfinance request
+    """
+    directory = _resolve(directory)
+    live = LiveProvider()
+
+    universe = live.get_index_constituents()
+    with open(os.path.join(directory, 'universe.json'), 'w') as f:
+        json.dump({'data': universe}, f, indent=1)
+
+    symbols = [s['symbol'] for s in universe if s.get('symbol') and s['symbol'] != 'NIFTY 500']
+    if limit:
+        symbols = symbols[:limit]
+
+    fno_symbols = set(live.get_fno_symbols())
+    with open(os.path.join(directory, 'fno_symbols.json'), 'w') as f:
+        json.dump(sorted(fno_symbols), f, indent=1)
+
+    end = datetime.now()
+    start = end - timedelta(days=days)
+    yf_symbols = [f"{symbol}.NS" for symbol in symbols]
+    for i in range(0, len(yf_symbols), batch_size):
+        chunk = yf_symbols[i:i + batch_size]
+        for yf_symbol, frame in live.get_ohlcv(chunk, start.strftime('%Y-%m-%d'), download_end(end).strftime('%Y-%m-%d')).items():
+            frame.to_csv(os.path.join(directory, 'ohlcv', f"{yf_symbol}.csv"), index=False)
+
+    from_date = (end - timedelta(days=30)).strftime("%d-%m-%Y")
+    to_date = end.strftime("%d-%m-%Y")
+    for symbol in symbols:
+        if symbol not in fno_symbols:
+            continue
+        try:
+            futures = live.get_futures(symbol, from_date, to_date)
+        except Exception:
+            continue
+        if futures is not None and not futures.empty:
+            futures.to_csv(os.path.join(directory, 'futures', f"{symbol}.csv"), index=False)
+
+    day = end.date()
+    for _ in range(15):
+        day -= timedelta(days=1)
+        if day.weekday() >= 5:
+            continue
+        try:
+            bhavcopy = live.get_fno_bhavcopy(day.strftime("%d-%m-%Y"))
+        except Exception:
+            continue
+        if bhavcopy is not None and not bhavcopy.empty:
+            bhavcopy.to_csv(os.path.join(directory, 'fno_bhavcopy', f"{day.isoformat()}.csv"), index=False)
+
+    try:
+        with open(os.path.join(directory, 'fii_dii.json'), 'w') as f:
+            json.dump(live.get_fii_dii(), f, indent=1)
+    except Exception as e:
+        print(f"  ⚠️  FII/DII flows not recorded: {e}")
+
+    print(f"✅ Recorded {len(symbols)} stocks to {directory}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write datasets for the file-backed provider")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    synthetic = sub.add_parser('synthetic', help='Generate a deterministic synthetic universe')
+    synthetic.add_argument('directory')
+    synthetic.add_argument('--symbols', type=int, default=500)
+    synthetic.add_argument('--days', type=int, default=400)
+    synthetic.add_argument('--seed', type=int, default=0)
+    synthetic.add_argument('--end-date', default=None)
+
+    record = sub.add_parser('record', help='Record live data for offline replay')
+    record.add_argument('directory')
+    record.add_argument('--limit', type=int, default=None)
+    record.add_argument('--days', type=int, default=400)
+
+    args = parser.parse_args()
+    if args.command == 'synthetic':
+        write_synthetic_dataset(args.directory, n_symbols=args.symbols, days=args.days,
+                                seed=args.seed, end_date=args.end_date)
+    else:
+        record_live_dataset(args.directory, limit=args.limit, days=args.days)
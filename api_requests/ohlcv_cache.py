@@ -0,0 +1,292 @@
+"""
+OHLCV Cache: Persistent per-symbol price history with incremental updates
+
+Layout (under CACHE_DIR):
+    price_data/RELIANCE.NS.parquet   one file per symbol (csv without pyarrow)
+    metadata/last_update.json        first requested date / last check per symbol
+"""
+
+import os
+import sys
+import json
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, time as dt_time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.data_config import (
+    CACHE_DIR, CACHE_FORMAT, PRICE_CACHE_MAX_DAYS, MARKET_CLOSE_TIME, SESSION_SETTLE_MINUTES, ADJUSTMENT_RTOL
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRICE_DIR = os.path.join(PROJECT_ROOT, CACHE_DIR, 'price_data')
+METADATA_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'last_update.json')
+
+PRICE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+_metadata = None
+_metadata_lock = threading.Lock()
+
+
+def _parquet_available():
+    """Check whether a parquet engine is installed"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        try:
+            import fastparquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+_FORMAT = 'parquet' if CACHE_FORMAT == 'parquet' and _parquet_available() else 'csv'
+
+
+def _cache_path(symbol):
+    return os.path.join(PRICE_DIR, f"{symbol}.{_FORMAT}")
+
+
+def _load_metadata():
+    """Load the metadata file once per process"""
+    global _metadata
+    if _metadata is None:
+        try:
+            with open(METADATA_FILE) as f:
+                _metadata = json.load(f)
+        except (OSError, ValueError):
+            _metadata = {}
+    return _metadata
+
+
+def save_metadata():
+    """Write cache metadata to disk"""
+    with _metadata_lock:
+        metadata = _load_metadata()
+        os.makedirs(os.path.dirname(METADATA_FILE), exist_ok=True)
+        tmp_file = METADATA_FILE + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(metadata, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, METADATA_FILE)
+
+
+def normalize_price_frame(df):
+    """
+    Bring a yfinance frame into the cached shape
+
+    Flattens MultiIndex columns, makes Date a tz-naive column and keeps
+    only the OHLCV columns, sorted by date without duplicates.
+    """
+    if df is None or df.empty:
+        return None
+
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df.columns.name = None
+
+    if 'Date' not in df.columns:
+        df = df.reset_index()
+        df = df.rename(columns={df.columns[0]: 'Date'})
+
+    df['Date'] = pd.to_datetime(df['Date'])
+    if df['Date'].dt.tz is not None:
+        df['Date'] = df['Date'].dt.tz_localize(None)
+    df['Date'] = df['Date'].dt.normalize()
+
+    df = df[[c for c in PRICE_COLUMNS if c in df.columns]]
+    df = df.dropna(subset=['Close'])
+    df = df.drop_duplicates(subset='Date', keep='last').sort_values('Date')
+    return df.reset_index(drop=True)
+
+
+def load_cached_data(symbol):
+    """
+    Load cached OHLCV for a symbol
+
+    Returns:
+        DataFrame with Date, Open, High, Low, Close, Volume or None
+    """
+    path = _cache_path(symbol)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        if _FORMAT == 'parquet':
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, parse_dates=['Date'])
+    except Exception as e:
+        print(f"  ⚠️  Unreadable cache for {symbol}: {e}")
+        return None
+
+    return df if not df.empty else None
+
+
+def save_cached_data(symbol, df):
+    """Write a symbol's OHLCV to the cache, trimmed to PRICE_CACHE_MAX_DAYS"""
+    if df is None or df.empty:
+        return
+
+    cutoff = pd.Timestamp(datetime.now().date() - timedelta(days=PRICE_CACHE_MAX_DAYS))
+    df = df[df['Date'] >= cutoff]
+
+    os.makedirs(PRICE_DIR, exist_ok=True)
+    path = _cache_path(symbol)
+    tmp_path = path + '.tmp'
+    if _FORMAT == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def session_settled_at(day):
+    """When the daily bar of `day` is final: MARKET_CLOSE_TIME plus SESSION_SETTLE_MINUTES"""
+    close = datetime.combine(day, dt_time.fromisoformat(MARKET_CLOSE_TIME))
+    return close + timedelta(minutes=SESSION_SETTLE_MINUTES)
+
+
+def last_complete_trading_date(now=None):
+    """
+    Most recent date whose daily bar should be available
+
+    Today once MARKET_CLOSE_TIME plus SESSION_SETTLE_MINUTES has passed on
+    a weekday, otherwise the previous weekday. Exchange holidays are
+    handled by the last_checked rule in plan_fetch rather than a holiday
+    calendar.
+    """
+    now = now or datetime.now()
+    day = now.date() if now >= session_settled_at(now.date()) else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def download_end(now=None):
+    """Exclusive end date for downloads: the day after the last complete trading date"""
+    return last_complete_trading_date(now) + timedelta(days=1)
+
+
+def plan_fetch(symbol, cached, start_date, now=None):
+    """
+    Decide which date range still has to be downloaded for a symbol
+
+    Freshness rules:
+        - No cache, or cache does not reach back to start_date: full window
+        - Last stored bar older than the last complete trading date and
+          not successfully checked since that date completed: fetch from
+          that last bar, so the download overlaps one cached bar (see
+          adjustment_changed)
+        - Otherwise the cache is fresh and nothing is downloaded
+
+    Returns:
+        datetime.date to start downloading from, or None if fresh
+    """
+    now = now or datetime.now()
+
+    with _metadata_lock:
+        meta = dict(_load_metadata().get(symbol, {}))
+
+    if cached is None or 'first_requested' not in meta:
+        return start_date
+
+    if start_date < datetime.strptime(meta['first_requested'], '%Y-%m-%d').date():
+        return start_date
+
+    last_date = cached['Date'].max().date()
+    complete = last_complete_trading_date(now)
+    if last_date >= complete:
+        return None
+
+    # Already asked since that date's bar was final and nothing newer exists (holiday /
+    # no trading); a pre-open check does not cover the session closing later that day
+    last_checked = meta.get('last_checked')
+    if last_checked and datetime.fromisoformat(last_checked) >= session_settled_at(complete):
+        return None
+
+    return last_date
+
+
+def adjustment_changed(cached, fetched, overlap_date):
+    """
+    Whether the re-downloaded overlap bar differs from the cached one
+
+    yfinance prices are split/dividend adjusted as of the download, so a
+    corporate action since the last fetch rescales every older bar. Bars
+    appended onto the old history would then show a false price jump; the
+    overlapping bar reveals it, and the caller refetches the whole window.
+
+    Args:
+        cached: Cached DataFrame (or None)
+        fetched: Newly downloaded DataFrame (raw yfinance shape) or None
+        overlap_date: datetime.date of the bar both should contain
+    """
+    fetched = normalize_price_frame(fetched)
+    if cached is None or fetched is None:
+        return False
+    day = pd.Timestamp(overlap_date)
+    old = cached.loc[pd.to_datetime(cached['Date']) == day, ['Open', 'High', 'Low', 'Close']]
+    new = fetched.loc[fetched['Date'] == day, ['Open', 'High', 'Low', 'Close']]
+    if old.empty or new.empty:
+        return False
+    return not np.allclose(old.iloc[-1].to_numpy(dtype=float), new.iloc[-1].to_numpy(dtype=float),
+                           rtol=ADJUSTMENT_RTOL, equal_nan=True)
+
+
+def merge_and_store(symbol, cached, fetched, fetch_start, now=None, replace=False):
+    """
+    Merge newly downloaded bars into the cache and record the check
+
+    The check is only recorded when the download returned data. An
+    incremental download always overlaps one cached bar, so an empty result
+    means the request failed (not "no newer bar") and the symbol is tried
+    again on the next run instead of staying stale for the rest of the day.
+
+    Args:
+        symbol: Cache key (e.g., 'RELIANCE.NS')
+        cached: Previously cached DataFrame or None
+        fetched: Newly downloaded DataFrame (raw yfinance shape) or None
+        fetch_start: datetime.date the download started from
+        replace: fetched is a full refetch that replaces the cached history
+            (after adjustment_changed)
+
+    Returns:
+        Merged DataFrame (or None if there is still no data)
+    """
+    now = now or datetime.now()
+    fetched = normalize_price_frame(fetched)
+
+    if replace and fetched is not None:
+        merged = fetched
+    elif cached is not None and fetched is not None:
+        merged = pd.concat([cached, fetched], ignore_index=True)
+        merged = merged.drop_duplicates(subset='Date', keep='last').sort_values('Date')
+        merged = merged.reset_index(drop=True)
+    else:
+        merged = fetched if fetched is not None else cached
+
+    # Rewrite the file unless the download only repeated the overlap bar
+    if fetched is not None and (replace or cached is None or fetched['Date'].max() > cached['Date'].max()):
+        save_cached_data(symbol, merged)
+
+    if fetched is not None:
+        with _metadata_lock:
+            metadata = _load_metadata()
+            meta = metadata.setdefault(symbol, {})
+            first = meta.get('first_requested')
+            if first is None or fetch_start.isoformat() < first:
+                meta['first_requested'] = fetch_start.isoformat()
+            meta['last_checked'] = now.isoformat(timespec='seconds')
+
+    return merged
+
+
+def slice_window(df, start_date):
+    """Return cached rows from start_date onwards in get_stock_data shape"""
+    if df is None:
+        return None
+    window = df[df['Date'] >= pd.Timestamp(start_date)].reset_index(drop=True)
+    return window if not window.empty else None
@@ -0,0 +1,272 @@
+"""
+OI Store: Local open interest history per symbol and expiry
+
+One table (SYMBOL, DATE, EXPIRY_DATE, CLOSE, OPEN_INT) covering the last
+OI_HISTORY_DAYS, updated incrementally from the daily bhavcopy or from
+per-symbol futures downloads. Multi-day OI trend features for the scorer
+are computed from it for the whole universe in one vectorized pass.
+"""
+
+import os
+import sys
+import json
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.data_config import CACHE_DIR, OI_HISTORY_DAYS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OI_DIR = os.path.join(PROJECT_ROOT, CACHE_DIR, 'oi_data')
+HISTORY_FILE = os.path.join(OI_DIR, 'oi_history.csv')
+CHECKED_FILE = os.path.join(OI_DIR, 'last_checked.json')
+
+HISTORY_COLUMNS = ['SYMBOL', 'DATE', 'EXPIRY_DATE', 'CLOSE', 'OPEN_INT']
+
+PATTERN_CODES = {
+    'long_buildup': 2,
+    'short_covering': 1,
+    'no_pattern': 0,
+    'long_unwinding': -1,
+    'short_buildup': -2,
+}
+_CODE_PATTERNS = {code: pattern for pattern, code in PATTERN_CODES.items()}
+
+_history = None
+_last_checked = None
+_dirty = False
+_lock = threading.RLock()
+
+
+def _load():
+    """Load the store once per process"""
+    global _history, _last_checked
+    if _history is None:
+        if os.path.exists(HISTORY_FILE):
+            _history = pd.read_csv(HISTORY_FILE, parse_dates=['DATE', 'EXPIRY_DATE'])
+        else:
+            _history = pd.DataFrame({
+                'SYMBOL': pd.Series(dtype=object),
+                'DATE': pd.Series(dtype='datetime64[ns]'),
+                'EXPIRY_DATE': pd.Series(dtype='datetime64[ns]'),
+                'CLOSE': pd.Series(dtype=float),
+                'OPEN_INT': pd.Series(dtype=float),
+            })
+        try:
+            with open(CHECKED_FILE) as f:
+                _last_checked = json.load(f)
+        except (OSError, ValueError):
+            _last_checked = {}
+    return _history
+
+
+def append_rows(rows):
+    """
+    Merge new OI rows into the store (newer rows win on duplicates)
+
+    Args:
+        rows: DataFrame with HISTORY_COLUMNS
+    """
+    global _history, _dirty
+    if rows is None or rows.empty:
+        return
+
+    with _lock:
+        history = _load()
+        rows = rows[HISTORY_COLUMNS]
+        merged = rows if history.empty else pd.concat([history, rows], ignore_index=True)
+        merged = merged.drop_duplicates(subset=['SYMBOL', 'DATE', 'EXPIRY_DATE'], keep='last')
+        cutoff = pd.Timestamp(datetime.now().date() - timedelta(days=OI_HISTORY_DAYS))
+        _history = merged[merged['DATE'] >= cutoff].reset_index(drop=True)
+        _dirty = True
+
+
+def append_futures(symbol, data):
+    """
+    Add nselib future_price_volume_data rows for one symbol
+
+    Dates are parsed for the whole column at once rather than row by row.
+    """
+    if data is None or data.empty:
+        return
+    rows = pd.DataFrame({
+        'SYMBOL': symbol,
+        'DATE': pd.to_datetime(data['TIMESTAMP'], format='%d-%b-%Y'),
+        'EXPIRY_DATE': pd.to_datetime(data['EXPIRY_DT'], format='%d-%b-%Y'),
+        'CLOSE': pd.to_numeric(data['CLOSING_PRICE'], errors='coerce'),
+        'OPEN_INT': pd.to_numeric(data['OPEN_INT'], errors='coerce'),
+    })
+    append_rows(rows)
+
+
+def stored_dates():
+    """Set of dates present anywhere in the store"""
+    with _lock:
+        return set(_load()['DATE'].dt.date)
+
+
+def last_stored_date(symbol):
+    """Latest date stored for a symbol (datetime.date) or None"""
+    with _lock:
+        history = _load()
+        dates = history.loc[history['SYMBOL'] == symbol, 'DATE']
+        return dates.max().date() if not dates.empty else None
+
+
+def symbol_history(symbol):
+    """All stored rows for one symbol"""
+    with _lock:
+        history = _load()
+        return history[history['SYMBOL'] == symbol].copy()
+
+
+def checked_since(symbol, since):
+    """True if the symbol was already refreshed at or after `since` (no new data upstream)"""
+    with _lock:
+        _load()
+        checked = _last_checked.get(symbol)
+        return checked is not None and datetime.fromisoformat(checked) >= since
+
+
+def mark_checked(symbol, now=None):
+    global _dirty
+    now = now or datetime.now()
+    with _lock:
+        _load()
+        _last_checked[symbol] = now.isoformat(timespec='seconds')
+        _dirty = True
+
+
+def save_oi_store():
+    """Write the store to disk if anything changed"""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        os.makedirs(OI_DIR, exist_ok=True)
+        tmp_file = HISTORY_FILE + '.tmp'
+        _history.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, HISTORY_FILE)
+        with open(CHECKED_FILE + '.tmp', 'w') as f:
+            json.dump(_last_checked, f)
+        os.replace(CHECKED_FILE + '.tmp', CHECKED_FILE)
+        _dirty = False
+
+
+def nearest_expiry_pattern(history, now=None):
+    """
+    Day-on-day OI pattern of a symbol's nearest live contract
+
+    Nearest expiry that has not passed yet (latest expiry if all have),
+    then its last two stored days - the same rules get_oi_data always used.
+
+    Returns:
+        (price_change, oi_change) or None if fewer than two days are stored
+    """
+    if history is None or history.empty:
+        return None
+
+    now = pd.Timestamp(now or datetime.now())
+    future_expiries = history[history['EXPIRY_DATE'] >= now]
+    if future_expiries.empty:
+        nearest_expiry = history['EXPIRY_DATE'].max()
+    else:
+        nearest_expiry = future_expiries['EXPIRY_DATE'].min()
+
+    contract = history[history['EXPIRY_DATE'] == nearest_expiry].sort_values('DATE')
+    if len(contract) < 2:
+        return None
+
+    latest, previous = contract.iloc[-1], contract.iloc[-2]
+    return latest['CLOSE'] - previous['CLOSE'], latest['OPEN_INT'] - previous['OPEN_INT']
+
+
+def compute_oi_features(history):
+    """
+    Multi-day OI trend features for every symbol in the history
+
+    Each day is classified on its front-month contract (nearest expiry on
+    or after that day, so rollover switches contract without a fake jump),
+    using that contract's own previous day. OI % changes use the total
+    across expiries, which is unaffected by positions rolling over.
+
+    Returns:
+        Dict of symbol -> {
+            'streak_pattern': pattern of the latest day,
+            'streak_days': consecutive days ending today with that pattern,
+            'oi_change_3d_pct', 'oi_change_5d_pct': total OI change (None if too short),
+            'as_of': latest date (YYYY-MM-DD)
+        }
+    """
+    if history is None or history.empty:
+        return {}
+
+    h = history.sort_values(['SYMBOL', 'EXPIRY_DATE', 'DATE'])
+    contract = h.groupby(['SYMBOL', 'EXPIRY_DATE'], sort=False)
+    h = h.assign(
+        PRICE_CHANGE=contract['CLOSE'].diff(),
+        OI_CHANGE=contract['OPEN_INT'].diff(),
+    )
+
+    live = h[h['EXPIRY_DATE'] >= h['DATE']]
+    front = live.loc[live.groupby(['SYMBOL', 'DATE'])['EXPIRY_DATE'].idxmin()]
+    front = front.sort_values(['SYMBOL', 'DATE'])
+
+    price_change = front['PRICE_CHANGE'].to_numpy()
+    oi_change = front['OI_CHANGE'].to_numpy()
+    codes = np.select(
+        [
+            (price_change > 0) & (oi_change > 0),
+            (price_change > 0) & (oi_change < 0),
+            (price_change < 0) & (oi_change < 0),
+            (price_change < 0) & (oi_change > 0),
+        ],
+        [2, 1, -1, -2],
+        default=0
+    )
+    front = front.assign(CODE=codes)
+
+    # Run length of identical codes, restarted per symbol
+    run_id = ((front['CODE'] != front['CODE'].shift()) | (front['SYMBOL'] != front['SYMBOL'].shift())).cumsum()
+    front = front.assign(STREAK=front.groupby(run_id).cumcount() + 1)
+    last = front.groupby('SYMBOL').tail(1).set_index('SYMBOL')
+
+    total_oi = h.groupby(['SYMBOL', 'DATE'])['OPEN_INT'].sum().reset_index()
+    by_symbol = total_oi.groupby('SYMBOL')['OPEN_INT']
+    total_oi = total_oi.assign(
+        CHANGE_3D=by_symbol.pct_change(3, fill_method=None) * 100,
+        CHANGE_5D=by_symbol.pct_change(5, fill_method=None) * 100,
+    )
+    changes = total_oi.groupby('SYMBOL').tail(1).set_index('SYMBOL')
+
+    features = {}
+    for symbol, row in last.iterrows():
+        change = changes.loc[symbol] if symbol in changes.index else None
+        features[symbol] = {
+            'streak_pattern': _CODE_PATTERNS[int(row['CODE'])],
+            'streak_days': int(row['STREAK']),
+            'oi_change_3d_pct': _round_or_none(change['CHANGE_3D'] if change is not None else None),
+            'oi_change_5d_pct': _round_or_none(change['CHANGE_5D'] if change is not None else None),
+            'as_of': row['DATE'].strftime('%Y-%m-%d'),
+        }
+    return features
+
+
+def _round_or_none(value):
+    if value is None or pd.isna(value) or np.isinf(value):
+        return None
+    return round(float(value), 2)
+
+
+def get_oi_features(symbol):
+    """OI trend features for one symbol (None if nothing is stored)"""
+    return compute_oi_features(symbol_history(symbol)).get(symbol)
+
+
+def get_oi_features_all():
+    """OI trend features for every stored symbol"""
+    with _lock:
+        history = _load().copy()
+    return compute_oi_features(history)
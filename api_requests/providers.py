@@ -0,0 +1,280 @@
+"""
+Market Data Providers: One interface for OHLCV, futures OI and the index universe
+
+LiveProvider talks to yfinance, nselib and the NSE website. FileProvider
+reads the same data from a local directory so the pipeline can be run
+and timed offline:
+
+    <dir>/universe.json          NSE equity-stockIndices 'data' array
+    <dir>/ohlcv/<SYMBOL>.csv     Date, Open, High, Low, Close, Volume (SYMBOL as 'RELIANCE.NS')
+    <dir>/futures/<SYMBOL>.csv   nselib future_price_volume_data columns (SYMBOL as 'RELIANCE')
+    <dir>/fno_bhavcopy/<YYYY-MM-DD>.csv   nselib fno_bhav_copy columns (UDiFF format)
+    <dir>/fno_symbols.json       F&O-eligible symbols (default: every file in futures/)
+    <dir>/fii_dii.json           NSE fiidiiTradeReact rows (latest FII/DII flows)
+
+Select the provider with DATA_PROVIDER / FILE_PROVIDER_DIR in config/data_config.py.
+"""
+
+import os
+import sys
+import json
+import threading
+import pandas as pd
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.rate_limiter import get_throttle
+from config.data_config import DATA_PROVIDER, FILE_PROVIDER_DIR
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NIFTY_500_URL = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20500"
+FII_DII_URL = "https://www.nseindia.com/api/fiidiiTradeReact"
+
+def split_ticker_frame(data, symbol):
+    """
+    Pull one ticker's OHLCV out of a multi-ticker yfinance download
+
+    Returns:
+        DataFrame with Date column, or None if the ticker came back empty
+    """
+    if data is None or data.empty:
+        return None
+
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        frame = data[symbol]
+    else:
+        # Single-ticker download without a ticker level
+        frame = data
+
+    frame = frame.dropna(how='all')
+    if frame.empty:
+        return None
+
+    frame = frame.reset_index()
+    frame.columns.name = None
+    return frame
+
+
+class MarketDataProvider:
+    """Interface shared by all providers"""
+
+    name = 'base'
+
+    def get_ohlcv(self, symbols, start, end):
+        """
+        Daily OHLCV between start (inclusive) and end (exclusive)
+
+        Args:
+            symbols: List of Yahoo symbols (e.g., ['RELIANCE.NS'])
+            start, end: Dates as 'YYYY-MM-DD'
+
+        Returns:
+            Dict of symbol -> DataFrame with Date column; empty symbols are absent
+        """
+        raise NotImplementedError
+
+    def get_futures(self, symbol, from_date, to_date):
+        """
+        Stock futures price/OI rows in nselib future_price_volume_data shape
+
+        Args:
+            symbol: NSE symbol (e.g., 'RELIANCE')
+            from_date, to_date: Dates as 'DD-MM-YYYY'
+        """
+        raise NotImplementedError
+
+    def get_fno_bhavcopy(self, trade_date):
+        """
+        Full F&O bhavcopy for one trading day (all symbols, all contracts)
+
+        Args:
+            trade_date: Date as 'DD-MM-YYYY'
+
+        Raises:
+            Exception if no bhavcopy was published for that date
+        """
+        raise NotImplementedError
+
+    def get_fno_symbols(self):
+        """Symbols with stock futures/options (list of str)"""
+        raise NotImplementedError
+
+    def get_index_constituents(self):
+        """Raw NIFTY 500 equity-stockIndices rows (list of dicts)"""
+        raise NotImplementedError
+
+    def get_fii_dii(self):
+        """Latest FII/DII cash market flows: NSE fiidiiTradeReact rows (list of dicts)"""
+        raise NotImplementedError
+
+
+class LiveProvider(MarketDataProvider):
+    """yfinance for prices, nselib for futures, NSE website for the universe"""
+
+    name = 'live'
+
+    def get_ohlcv(self, symbols, start, end):
+        import yfinance as yf
+        from config.data_config import YFINANCE_THREADS
+
+        with get_throttle('yahoo') as throttle:
+            data = yf.download(
+                symbols,
+                start=start,
+                end=end,
+                group_by='ticker',
+                threads=YFINANCE_THREADS,
+                progress=False
+            )
+
+            results = {}
+            for symbol in symbols:
+                frame = split_ticker_frame(data, symbol)
+                if frame is not None:
+                    results[symbol] = frame
+            throttle.mark(empty=not results)
+        return results
+
+    def get_futures(self, symbol, from_date, to_date):
+        from nselib import derivatives
+
+        with get_throttle('nse') as throttle:
+            data = derivatives.future_price_volume_data(
+                symbol=symbol,
+                instrument="FUTSTK",
+                from_date=from_date,
+                to_date=to_date
+            )
+            throttle.mark(empty=data is None or data.empty)
+        return data
+
+    def get_fno_bhavcopy(self, trade_date):
+        from nselib import derivatives
+
+        with get_throttle('nse') as throttle:
+            data = derivatives.fno_bhav_copy(trade_date=trade_date)
+            throttle.mark(empty=data is None or data.empty)
+        return data
+
+    def get_fno_symbols(self):
+        from nselib import capital_market
+
+        with get_throttle('nse') as throttle:
+            data = capital_market.fno_equity_list()
+            throttle.mark(empty=data is None or data.empty)
+
+        column = 'symbol' if 'symbol' in data.columns else data.columns[0]
+        return data[column].astype(str).str.strip().tolist()
+
+    def get_index_constituents(self):
+        from api_requests.nse_session import get_nse_session
+
+        return get_nse_session().get_json(NIFTY_500_URL).get('data', [])
+
+    def get_fii_dii(self):
+        from api_requests.nse_session import get_nse_session
+
+        return get_nse_session().get_json(FII_DII_URL)
+
+
+class FileProvider(MarketDataProvider):
+    """Recorded or synthetic data from a local directory (no network)"""
+
+    name = 'file'
+
+    def __init__(self, directory):
+        if not os.path.isabs(directory):
+            directory = os.path.join(PROJECT_ROOT, directory)
+        self.directory = directory
+
+    def _read_csv(self, *parts):
+        path = os.path.join(self.directory, *parts)
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path)
+
+    def get_ohlcv(self, symbols, start, end):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        results = {}
+        for symbol in symbols:
+            df = self._read_csv('ohlcv', f"{symbol}.csv")
+            if df is None:
+                continue
+            df['Date'] = pd.to_datetime(df['Date'])
+            df = df[(df['Date'] >= start) & (df['Date'] < end)]
+            if not df.empty:
+                results[symbol] = df.reset_index(drop=True)
+        return results
+
+    def get_futures(self, symbol, from_date, to_date):
+        df = self._read_csv('futures', f"{symbol}.csv")
+        if df is None:
+            # Same failure nselib gives for symbols without F&O data
+            raise KeyError(symbol)
+
+        dates = pd.to_datetime(df['TIMESTAMP'], format='%d-%b-%Y')
+        start = datetime.strptime(from_date, "%d-%m-%Y")
+        end = datetime.strptime(to_date, "%d-%m-%Y")
+        return df[(dates >= start) & (dates <= end)].reset_index(drop=True)
+
+    def get_fno_bhavcopy(self, trade_date):
+        day = datetime.strptime(trade_date, "%d-%m-%Y").strftime('%Y-%m-%d')
+        df = self._read_csv('fno_bhavcopy', f"{day}.csv")
+        if df is None:
+            raise FileNotFoundError(f"No bhavcopy recorded for {day}")
+        return df
+
+    def get_fno_symbols(self):
+        path = os.path.join(self.directory, 'fno_symbols.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        # Every symbol with recorded futures data
+        futures_dir = os.path.join(self.directory, 'futures')
+        if not os.path.isdir(futures_dir):
+            return []
+        return sorted(name[:-4] for name in os.listdir(futures_dir) if name.endswith('.csv'))
+
+    def get_index_constituents(self):
+        path = os.path.join(self.directory, 'universe.json')
+        with open(path) as f:
+            data = json.load(f)
+        return data.get('data', []) if isinstance(data, dict) else data
+
+    def get_fii_dii(self):
+        path = os.path.join(self.directory, 'fii_dii.json')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No FII/DII flows recorded in {self.directory}")
+        with open(path) as f:
+            return json.load(f)
+
+
+PROVIDERS = {
+    'live': LiveProvider,
+    'file': FileProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def create_provider(name=DATA_PROVIDER, directory=FILE_PROVIDER_DIR):
+    """Build a provider by name ('live' or 'file')"""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown data provider '{name}' (expected one of {sorted(PROVIDERS)})")
+    if name == 'file':
+        return FileProvider(directory)
+    return PROVIDERS[name]()
+
+
+def get_provider():
+    """Shared provider selected in config"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider()
+        return _provider
+
@@ -0,0 +1,311 @@
+"""
+Rate Limiter: Per-host token bucket with a concurrency cap
+
+Each host's rate and concurrency adapt to what the upstream tells us
+(additive increase after clean responses, multiplicative decrease on
+403/429, errors, empty or slow responses; one 403/429 backoff per
+cooldown window). Learned limits are saved to the cache directory and
+reused by the next run.
+
+Usage:
+    with get_throttle('nse') as throttle:
+        data = derivatives.future_price_volume_data(...)
+        throttle.mark(empty=data is None or data.empty)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.data_config import (
+    RATE_LIMITS,
+    CACHE_DIR,
+    ADAPTIVE_THROTTLE_ENABLED,
+    RATE_BOUNDS,
+    AIMD_INCREASE_STEP,
+    AIMD_THROTTLED_FACTOR,
+    AIMD_ERROR_FACTOR,
+    SLOW_RESPONSE_SECONDS,
+    THROTTLED_COOLDOWN_SECONDS
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'throttle_state.json')
+
+THROTTLED_STATUS = (403, 429)
+_STATUS_PATTERN = re.compile(r'\b(403|429)\b')
+
+
+def response_status(error):
+    """Pull a 403/429 status out of an exception raised by requests/nselib"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return status
+    match = _STATUS_PATTERN.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+class HostThrottle:
+    """
+    Token bucket (rate, burst) plus a cap on requests in flight for one host
+
+    Tracks in-flight and queued requests so callers can see where a run
+    is spending its time.
+    """
+
+    def __init__(self, host, rate, burst, max_concurrency, min_rate=None, max_rate=None,
+                 concurrency_cap=None, adaptive=ADAPTIVE_THROTTLE_ENABLED):
+        self.host = host
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_concurrency = int(max_concurrency)
+
+        self.min_rate = float(min_rate if min_rate is not None else rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.concurrency_cap = int(concurrency_cap or max_concurrency)
+        self.adaptive = adaptive
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._clean_streak = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_in_flight = 0
+        self.peak_queued = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+        self.outcomes = {'ok': 0, 'slow': 0, 'empty': 0, 'error': 0, 'throttled': 0, 'retried': 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Block until a token and a concurrency slot are both available"""
+        started = time.monotonic()
+        with self._cond:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            try:
+                while True:
+                    self._refill()
+                    cooldown = self._blocked_until - time.monotonic()
+                    if cooldown > 0:
+                        self._cond.wait(cooldown)
+                    elif self.in_flight >= self.max_concurrency:
+                        # Woken by release()
+                        self._cond.wait()
+                    elif self._tokens < 1:
+                        self._cond.wait((1 - self._tokens) / self.rate)
+                    else:
+                        break
+            finally:
+                self.queued -= 1
+
+            self._tokens -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.requests += 1
+            self.wait_seconds += time.monotonic() - started
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def mark(self, status=None, empty=False, retried=False):
+        """
+        Attach the response status / emptiness to the current request
+
+        retried marks a response the caller will repeat for a reason of its
+        own (e.g., stale NSE cookies); it is counted but not used for pacing.
+        """
+        self._local.status = status
+        self._local.empty = empty
+        self._local.retried = retried
+
+    def __enter__(self):
+        self.acquire()
+        self._local.started = time.monotonic()
+        self._local.status = None
+        self._local.empty = False
+        self._local.retried = False
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            latency = time.monotonic() - self._local.started
+            self.record(latency, status=self._local.status, empty=self._local.empty, error=exc,
+                        retried=self._local.retried)
+        finally:
+            self.release()
+        return False
+
+    def record(self, latency, status=None, empty=False, error=None, retried=False):
+        """
+        Feed one response back into the controller
+
+        KeyError means the symbol has no data upstream (e.g., no F&O
+        contract), which is a successful request as far as pacing goes.
+        An empty body is not: yfinance answers a soft rate limit with an
+        empty frame, so it counts as mild pressure.
+        """
+        if error is not None and status is None:
+            status = response_status(error)
+
+        if retried:
+            outcome = 'retried'
+        elif status in THROTTLED_STATUS:
+            outcome = 'throttled'
+        elif error is not None and not isinstance(error, KeyError):
+            outcome = 'error'
+        elif status is not None and status >= 400:
+            outcome = 'error'
+        elif empty:
+            outcome = 'empty'
+        elif latency > SLOW_RESPONSE_SECONDS:
+            outcome = 'slow'
+        else:
+            outcome = 'ok'
+
+        with self._cond:
+            self.outcomes[outcome] += 1
+            if self.adaptive:
+                self._adjust(outcome)
+            self._cond.notify_all()
+
+    def _adjust(self, outcome):
+        """
+        Additive increase / multiplicative decrease of rate and concurrency
+
+        Requests already in flight when a 403/429 arrives come back throttled
+        too; only the first one in a cooldown window backs off, so a burst of
+        rejections halves the limits once rather than once per response.
+        """
+        if outcome == 'retried':
+            return
+        if outcome == 'ok':
+            self._clean_streak += 1
+            # One increase per window of clean responses at the current concurrency
+            if self._clean_streak >= max(4, 2 * self.max_concurrency):
+                self._clean_streak = 0
+                self.rate = min(self.max_rate, self.rate + AIMD_INCREASE_STEP)
+                self.max_concurrency = min(self.concurrency_cap, self.max_concurrency + 1)
+            return
+
+        self._clean_streak = 0
+        if outcome == 'throttled':
+            if time.monotonic() < self._blocked_until:
+                return
+            self.rate = max(self.min_rate, self.rate * AIMD_THROTTLED_FACTOR)
+            self.max_concurrency = max(1, int(self.max_concurrency * AIMD_THROTTLED_FACTOR))
+            self._blocked_until = time.monotonic() + THROTTLED_COOLDOWN_SECONDS
+            self._tokens = 0.0
+            print(f"  ⏸️  {self.host} throttled us: backing off to {self.rate:.2f}/s, "
+                  f"{self.max_concurrency} in flight, pausing {THROTTLED_COOLDOWN_SECONDS}s")
+        else:
+            self.rate = max(self.min_rate, self.rate * AIMD_ERROR_FACTOR)
+
+    def learned_limits(self):
+        with self._cond:
+            return {'rate': round(self.rate, 3), 'max_concurrency': self.max_concurrency}
+
+    def stats(self):
+        """Snapshot of the current pacing and load for this host"""
+        with self._cond:
+            return {
+                'rate': round(self.rate, 3),
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'peak_in_flight': self.peak_in_flight,
+                'peak_queued': self.peak_queued,
+                'requests': self.requests,
+                'wait_seconds': round(self.wait_seconds, 2),
+                'outcomes': dict(self.outcomes),
+            }
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def _load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_throttle(host):
+    """
+    Get the shared throttle for a host ('yahoo' or 'nse')
+
+    Starts from the limits learned in the previous run when available,
+    otherwise from RATE_LIMITS. Hosts missing from RATE_LIMITS get a
+    conservative 1 request/second.
+    """
+    with _throttles_lock:
+        if host not in _throttles:
+            limits = dict(RATE_LIMITS.get(host, {'rate': 1.0, 'burst': 1, 'max_concurrency': 1}))
+            bounds = RATE_BOUNDS.get(host, {})
+            learned = _load_state().get(host, {}) if ADAPTIVE_THROTTLE_ENABLED else {}
+            min_rate = bounds.get('min_rate', limits['rate'])
+            max_rate = bounds.get('max_rate', limits['rate'])
+            cap = bounds.get('max_concurrency', limits['max_concurrency'])
+            if 'rate' in learned:
+                limits['rate'] = min(max_rate, max(min_rate, learned['rate']))
+            if 'max_concurrency' in learned:
+                limits['max_concurrency'] = min(cap, max(1, learned['max_concurrency']))
+            _throttles[host] = HostThrottle(
+                host, min_rate=min_rate, max_rate=max_rate, concurrency_cap=cap, **limits
+            )
+        return _throttles[host]
+
+
+def save_throttle_state():
+    """Persist learned per-host limits for the next run"""
+    if not ADAPTIVE_THROTTLE_ENABLED:
+        return
+    with _throttles_lock:
+        throttles = list(_throttles.values())
+    if not throttles:
+        return
+
+    state = _load_state()
+    for throttle in throttles:
+        state[throttle.host] = throttle.learned_limits()
+
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp_file = STATE_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, STATE_FILE)
+
+
+def throttle_stats():
+    """Per-host stats for every throttle used so far"""
+    with _throttles_lock:
+        throttles = list(_throttles.values())
+    return {t.host: t.stats() for t in throttles}
+
+
+def print_throttle_stats():
+    """Print per-host concurrency, queue depth and response outcomes"""
+    for host, stats in throttle_stats().items():
+        outcomes = ', '.join(f"{k} {v}" for k, v in stats['outcomes'].items() if v)
+        print(f"   {host}: {stats['requests']} requests, "
+              f"peak {stats['peak_in_flight']}/{stats['max_concurrency']} in flight, "
+              f"peak queue {stats['peak_queued']}, "
+              f"waited {stats['wait_seconds']:.1f}s @ {stats['rate']}/s ({outcomes or 'no responses'})")
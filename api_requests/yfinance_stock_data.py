@@ -1,72 +1,264 @@
 """
 yfinance API: Fetch OHLCV data for a stock
+Downloads go through the configured market data provider (see providers.py)
 """
 
-import yfinance as yf
+import os
+import sys
+import time
 from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api_requests import ohlcv_cache
+from api_requests.providers import get_provider
+from config.data_config import (
+    YFINANCE_BATCH_SIZE,
+    MAX_RETRIES,
+    RETRY_DELAY_SECONDS
+)
 
-def get_stock_data(symbol, days=60, max_retries=2):
+
+def _download_symbol(symbol, start, end, max_retries=2):
     """
-    Fetch OHLCV data from yfinance for last N days
-    
-    Args:
-        symbol (str): Stock symbol (e.g., 'RELIANCE.NS')
-        days (int): Number of days to fetch (default: 60)
-        max_retries (int): Number of retries if fetch fails (default: 2)
+    Download one symbol's OHLCV between start (inclusive) and end (exclusive)
     
     Returns:
-        DataFrame with Date, Open, High, Low, Close, Volume, Adj Close
+        DataFrame with Date column, or None if nothing came back
     """
-    
-    # Calculate date range
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    # Format dates
-    start = start_date.strftime('%Y-%m-%d')
-    end = end_date.strftime('%Y-%m-%d')
-    
-    print(f"Fetching data for {symbol}")
-    
     # Try multiple times if it fails
     for attempt in range(max_retries):
         try:
             # Download data
-            data = yf.download(
-                symbol,
-                start=start,
-                end=end,
-                progress=False
-            )
+            data = get_provider().get_ohlcv([symbol], start, end).get(symbol)
             
-            if data.empty:
+            if data is None or data.empty:
                 print(f"  ⚠️  No data returned for {symbol}")
                 if attempt < max_retries - 1:
                     print(f"  🔄 Retrying... (attempt {attempt + 2}/{max_retries})")
-                    import time
-                    time.sleep(1)
+                    time.sleep(RETRY_DELAY_SECONDS)
                     continue
                 return None
             
-            # Reset index to make Date a column
-            data.reset_index(inplace=True)
-            
-            print(f"  ✅ Fetched {len(data)} days of data")
             return data
             
         except Exception as e:
             print(f"  ❌ Error: {e}")
             if attempt < max_retries - 1:
                 print(f"  🔄 Retrying... (attempt {attempt + 2}/{max_retries})")
-                import time
-                time.sleep(1)
+                time.sleep(RETRY_DELAY_SECONDS)
                 continue
             return None
     
     return None
 
 
+def get_stock_data(symbol, days=60, max_retries=2, use_cache=True):
+    """
+    Fetch OHLCV data from yfinance for last N days
+    
+    With use_cache, bars already stored on disk are served locally and
+    only the missing date range is downloaded and merged in.
+    
+    Args:
+        symbol (str): Stock symbol (e.g., 'RELIANCE.NS')
+        days (int): Number of days to fetch (default: 60)
+        max_retries (int): Number of retries if fetch fails (default: 2)
+        use_cache (bool): Read/update the local OHLCV cache (default: True)
+    
+    Returns:
+        DataFrame with Date, Open, High, Low, Close, Volume
+    """
+    
+    # Calculate date range
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    # Format dates (end is exclusive: through the last complete trading date)
+    start = start_date.strftime('%Y-%m-%d')
+    end_day = ohlcv_cache.download_end(end_date)
+    end = end_day.strftime('%Y-%m-%d')
+    
+    if not use_cache:
+        print(f"Fetching data for {symbol}")
+        data = _download_symbol(symbol, start, end, max_retries)
+        if data is not None:
+            print(f"  ✅ Fetched {len(data)} days of data")
+        return data
+    
+    cached = ohlcv_cache.load_cached_data(symbol)
+    fetch_start = ohlcv_cache.plan_fetch(symbol, cached, start_date.date(), end_date)
+    
+    if fetch_start is None:
+        print(f"Using cached data for {symbol}")
+        return ohlcv_cache.slice_window(cached, start_date.date())
+    
+    print(f"Fetching data for {symbol} from {fetch_start}")
+    
+    # An incremental fetch overlaps one cached bar, so it is never legitimately empty
+    retries = max_retries if cached is None else 1
+    fetched = None
+    if fetch_start < end_day:
+        fetched = _download_symbol(symbol, fetch_start.strftime('%Y-%m-%d'), end, retries)
+    
+    if ohlcv_cache.adjustment_changed(cached, fetched, fetch_start):
+        # Split/dividend since the last fetch: the cached history is on the old adjustment
+        refetch_start = min(start_date.date(), cached['Date'].min().date())
+        print(f"  🔄 {symbol}: adjusted prices changed, refetching from {refetch_start}")
+        fetched = _download_symbol(symbol, refetch_start.strftime('%Y-%m-%d'), end, max_retries)
+        merged = ohlcv_cache.merge_and_store(symbol, cached, fetched, refetch_start, end_date, replace=True)
+    else:
+        merged = ohlcv_cache.merge_and_store(symbol, cached, fetched, fetch_start, end_date)
+    ohlcv_cache.save_metadata()
+    
+    if fetched is not None:
+        print(f"  ✅ Fetched {len(fetched)} days of data from {fetch_start}")
+    
+    return ohlcv_cache.slice_window(merged, start_date.date())
+
+
+def _download_batches(symbols, start, end, batch_size, max_retries):
+    """
+    Download symbols in chunked multi-ticker requests, retrying empty ones
+    
+    Returns:
+        Tuple (results, failed): dict of symbol -> DataFrame, list of symbols
+    """
+    results = {}
+    pending = list(symbols)
+    
+    for attempt in range(max_retries):
+        if not pending:
+            break
+        
+        if attempt > 0:
+            print(f"  🔄 Retrying {len(pending)} symbols... (attempt {attempt + 1}/{max_retries})")
+            time.sleep(RETRY_DELAY_SECONDS)
+        
+        missing = []
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            
+            try:
+                data = get_provider().get_ohlcv(chunk, start, end)
+            except Exception as e:
+                print(f"  ❌ Error downloading batch {chunk[0]}..{chunk[-1]}: {e}")
+                missing.extend(chunk)
+                continue
+            
+            for symbol in chunk:
+                if symbol in data:
+                    results[symbol] = data[symbol]
+                else:
+                    missing.append(symbol)
+        
+        pending = missing
+    
+    return results, pending
+
+
+def get_stock_data_bulk(symbols, days=60, batch_size=YFINANCE_BATCH_SIZE, max_retries=MAX_RETRIES,
+                        use_cache=True):
+    """
+    Fetch OHLCV data for many symbols using chunked multi-ticker downloads
+    
+    With use_cache, symbols are grouped by the date their cache needs
+    refreshing from, so a daily run downloads the new bar plus one
+    overlapping cached bar per symbol (a split or dividend that changed the
+    adjusted overlap bar triggers a full refetch for that symbol), and a
+    repeated run on the same day downloads nothing.
+    
+    Args:
+        symbols (list): Stock symbols (e.g., ['RELIANCE.NS', 'TCS.NS'])
+        days (int): Number of days to fetch (default: 60)
+        batch_size (int): Tickers per yfinance request (default: YFINANCE_BATCH_SIZE)
+        max_retries (int): Passes over symbols that failed (default: MAX_RETRIES)
+        use_cache (bool): Read/update the local OHLCV cache (default: True)
+    
+    Returns:
+        Tuple (data, failed):
+            data: Dict of symbol -> DataFrame (same shape as get_stock_data)
+            failed: List of symbols with no data after all retries
+    """
+    
+    # Calculate date range
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    # End is exclusive: through the last complete trading date
+    start = start_date.strftime('%Y-%m-%d')
+    end_day = ohlcv_cache.download_end(end_date)
+    end = end_day.strftime('%Y-%m-%d')
+    
+    symbols = list(dict.fromkeys(symbols))
+    
+    if not use_cache:
+        print(f"Fetching data for {len(symbols)} symbols in batches of {batch_size}")
+        results, failed = _download_batches(symbols, start, end, batch_size, max_retries)
+        for symbol in failed:
+            print(f"  ⚠️  No data returned for {symbol}")
+        print(f"  ✅ Fetched {len(results)}/{len(symbols)} symbols")
+        return results, failed
+    
+    # Group symbols by the date their download has to start from
+    cached = {}
+    groups = {}
+    for symbol in symbols:
+        cached[symbol] = ohlcv_cache.load_cached_data(symbol)
+        fetch_start = ohlcv_cache.plan_fetch(symbol, cached[symbol], start_date.date(), end_date)
+        if fetch_start is not None:
+            groups.setdefault(fetch_start, []).append(symbol)
+    
+    to_fetch = sum(len(group) for group in groups.values())
+    print(f"Cache: {len(symbols) - to_fetch} fresh, {to_fetch} to update "
+          f"in {len(groups)} date range(s), batches of {batch_size}")
+    
+    results = {}
+    failed = []
+    readjusted = {}
+    for fetch_start, group in sorted(groups.items()):
+        incremental = fetch_start > start_date.date()
+        fetched = {}
+        if fetch_start < end_day:
+            fetched, _ = _download_batches(
+                group,
+                fetch_start.strftime('%Y-%m-%d'),
+                end,
+                batch_size,
+                # Incremental fetches overlap one cached bar; an empty one is retried next run
+                1 if incremental else max_retries
+            )
+        for symbol in group:
+            if ohlcv_cache.adjustment_changed(cached[symbol], fetched.get(symbol), fetch_start):
+                # Split/dividend since the last fetch: refetch the whole window below
+                refetch_start = min(start_date.date(), cached[symbol]['Date'].min().date())
+                readjusted.setdefault(refetch_start, []).append(symbol)
+                continue
+            cached[symbol] = ohlcv_cache.merge_and_store(
+                symbol, cached[symbol], fetched.get(symbol), fetch_start, end_date
+            )
+    
+    for refetch_start, group in sorted(readjusted.items()):
+        print(f"  🔄 Adjusted prices changed for {len(group)} symbol(s), refetching from {refetch_start}")
+        fetched, _ = _download_batches(group, refetch_start.strftime('%Y-%m-%d'), end, batch_size, max_retries)
+        for symbol in group:
+            cached[symbol] = ohlcv_cache.merge_and_store(
+                symbol, cached[symbol], fetched.get(symbol), refetch_start, end_date, replace=True
+            )
+    
+    ohlcv_cache.save_metadata()
+    
+    for symbol in symbols:
+        window = ohlcv_cache.slice_window(cached[symbol], start_date.date())
+        if window is None:
+            failed.append(symbol)
+            print(f"  ⚠️  No data returned for {symbol}")
+        else:
+            results[symbol] = window
+    
+    print(f"  ✅ Fetched {len(results)}/{len(symbols)} symbols")
+    return results, failed
+
+
 # Alias for compatibility
 def fetch_stock_data(symbol, days=60):
     """Alias for get_stock_data"""
@@ -0,0 +1,231 @@
+"""
+Backtest Engine: Historical scores and forward returns for the whole universe
+
+Scores every stock on every date of a multi-year history at once: the
+panel engine lays the universe out as a dates x symbols matrix, the
+indicators run column-wise over all of it, and score_universe scores all
+cells in one call. From each date's top-N picks it measures forward
+returns over the swing horizons, against the equal-weighted universe.
+
+Assumptions:
+    - Entry at the signal date's close (scores use end-of-day data), exit
+      at the close h trading days later
+    - The universe is today's NIFTY 500 list (survivorship bias)
+    - No historical OI: every stock scores 'no_pattern', a constant that
+      does not change the ranking
+    - FII/DII flow is market-wide (the same score for every stock on a
+      date), so it is left at 0 and does not change the ranking either
+    - Daily cohorts overlap, so returns are averages per signal, not an
+      equity curve
+
+Usage:
+    python backtest/engine.py --years 5 --top 5
+    STG_DATA_PROVIDER=file python backtest/engine.py
+"""
+
+import sys
+import os
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.nse_nifty500_list import get_nifty_500_stocks
+from api_requests.yfinance_stock_data import get_stock_data_bulk
+from indicators.panel import build_panel, compute_panel_indicators
+from indicators.kernels import INDICATOR_COLUMNS
+from indicators.registry import required_bars, lookback_days
+from indicators.scorer import score_universe
+from config.backtest_config import BACKTEST_YEARS, BACKTEST_TOP_N, FORWARD_HORIZONS
+from config.indicator_config import TRADING_DAYS_PER_YEAR
+
+FACTORS = ['volume', 'macd', 'rsi', 'trend_ema', 'adx', 'oi_pattern']
+
+
+def load_history(stock_list, years=BACKTEST_YEARS):
+    """
+    OHLCV for the backtest window plus indicator warm-up, from the local
+    cache (only missing ranges are downloaded)
+
+    Returns:
+        Dict of yf_symbol -> DataFrame
+    """
+    days = round(years * 365) + lookback_days(required_bars())
+    yf_symbols = [f"{stock['symbol']}.NS" for stock in stock_list]
+    price_data, _ = get_stock_data_bulk(yf_symbols, days=days)
+    return price_data
+
+
+def score_history(panel):
+    """
+    Factor scores for every cell of an indicator panel
+
+    Args:
+        panel: Panel with the indicator columns computed
+
+    Returns:
+        Tuple (scores, eligible):
+            scores: Dict of factor (and 'total') -> 2-D array like the panel
+            eligible: 2-D bool, True where the stock has a real bar and its
+                indicators are past warm-up
+    """
+    shape = panel.shape
+    columns = {name: panel[name].ravel() for name in ['Close'] + INDICATOR_COLUMNS if name in panel.arrays}
+    table = score_universe(columns)
+    scores = {factor: table[factor].to_numpy().reshape(shape) for factor in FACTORS + ['total']}
+
+    has_bar = panel.present & np.isfinite(panel['Close'])
+    eligible = has_bar & (np.cumsum(has_bar, axis=0) >= required_bars())
+    return scores, eligible
+
+
+def forward_returns(close, horizon):
+    """Return from each row's close to the close `horizon` rows later (NaN past the end)"""
+    out = np.full(close.shape, np.nan)
+    if len(close) > horizon:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return out
+
+
+def select_top(total, eligible, top_n):
+    """
+    Column indices of the top_n scores per row (ties keep symbol order)
+
+    Returns:
+        2-D int array (rows x top_n), -1 where fewer stocks were eligible
+    """
+    ranked = np.where(eligible, total, -np.inf)
+    picks = np.argsort(-ranked, axis=1, kind='stable')[:, :top_n]
+    return np.where(np.take_along_axis(eligible, picks, axis=1), picks, -1)
+
+
+class BacktestResult:
+    """
+    Scores, daily picks and forward returns of one backtest run
+
+    Attributes:
+        dates: Signal dates (rows)
+        symbols: Universe (columns)
+        scores: Dict of factor -> 2-D score array
+        eligible: 2-D bool mask of scoreable cells
+        picks: 2-D int array of each date's top-N column indices (-1 = none)
+        forward: Dict of horizon -> 2-D forward return array
+    """
+
+    def __init__(self, dates, symbols, scores, eligible, picks, forward):
+        self.dates = dates
+        self.symbols = symbols
+        self.scores = scores
+        self.eligible = eligible
+        self.picks = picks
+        self.forward = forward
+
+    def pick_returns(self, horizon):
+        """2-D array (dates x top_n) of each pick's forward return"""
+        returns = np.take_along_axis(self.forward[horizon], np.maximum(self.picks, 0), axis=1)
+        return np.where(self.picks >= 0, returns, np.nan)
+
+    def daily(self, horizon):
+        """Per signal date: mean return of the picks and of all eligible stocks"""
+        with warnings.catch_warnings():
+            # Dates with no picks or no eligible stocks ('Mean of empty slice') stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            top = np.nanmean(self.pick_returns(horizon), axis=1)
+            universe = np.nanmean(np.where(self.eligible, self.forward[horizon], np.nan), axis=1)
+        return pd.DataFrame({'top': top, 'universe': universe, 'excess': top - universe},
+                            index=pd.Index(self.dates, name='Date'))
+
+    def summary(self):
+        """One row per horizon: mean/median pick return, universe return, excess, hit rate"""
+        rows = {}
+        for horizon in self.forward:
+            daily = self.daily(horizon).dropna()
+            picks = self.pick_returns(horizon)
+            picks = picks[np.isfinite(picks)]
+            rows[horizon] = {
+                'signals': len(daily),
+                'picks': len(picks),
+                'mean_return': picks.mean() if len(picks) else np.nan,
+                'median_return': np.median(picks) if len(picks) else np.nan,
+                'hit_rate': (picks > 0).mean() if len(picks) else np.nan,
+                'universe_return': daily['universe'].mean(),
+                'excess_return': daily['excess'].mean(),
+            }
+        summary = pd.DataFrame.from_dict(rows, orient='index')
+        summary.index.name = 'horizon'
+        return summary
+
+    def picks_table(self):
+        """Long table of every pick: Date, rank, symbol, total score"""
+        rows, ranks = np.nonzero(self.picks >= 0)
+        columns = self.picks[rows, ranks]
+        return pd.DataFrame({
+            'Date': np.asarray(self.dates)[rows],
+            'rank': ranks + 1,
+            'symbol': np.asarray(self.symbols)[columns],
+            'total': self.scores['total'][rows, columns],
+        })
+
+
+def run_backtest(price_data, years=BACKTEST_YEARS, top_n=BACKTEST_TOP_N, horizons=FORWARD_HORIZONS):
+    """
+    Score the universe on every date and measure the picks' forward returns
+
+    Args:
+        price_data: Dict of symbol -> OHLCV DataFrame (history + warm-up)
+        years: Signal dates are the last `years` of the history
+        top_n: Picks per date
+        horizons: Forward holding periods in trading days
+
+    Returns:
+        BacktestResult
+    """
+    panel = compute_panel_indicators(build_panel(price_data, align='date'))
+    scores, eligible = score_history(panel)
+
+    forward = {horizon: forward_returns(panel['Close'], horizon) for horizon in horizons}
+    picks = select_top(scores['total'], eligible, top_n)
+
+    # Signal window: the last `years` of rows (the rest is warm-up)
+    dates = pd.DataFrame(panel.dates).max(axis=1).to_numpy()
+    start = max(0, len(dates) - round(years * TRADING_DAYS_PER_YEAR))
+    window = slice(start, None)
+    return BacktestResult(
+        dates=dates[window],
+        symbols=panel.symbols,
+        scores={factor: values[window] for factor, values in scores.items()},
+        eligible=eligible[window],
+        picks=picks[window],
+        forward={horizon: values[window] for horizon, values in forward.items()},
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the stock score over the local price history")
+    parser.add_argument('--years', type=float, default=BACKTEST_YEARS)
+    parser.add_argument('--top', type=int, default=BACKTEST_TOP_N)
+    parser.add_argument('--horizons', type=int, nargs='+', default=FORWARD_HORIZONS)
+    parser.add_argument('--limit', type=int, default=None, help="Only the first N stocks of the universe")
+    parser.add_argument('--picks', default=None, help="Write every pick to this CSV")
+    args = parser.parse_args()
+
+    stock_list = [s for s in get_nifty_500_stocks() if s['symbol'] != 'NIFTY 500'][:args.limit]
+    price_data = load_history(stock_list, years=args.years)
+
+    started = time.perf_counter()
+    result = run_backtest(price_data, years=args.years, top_n=args.top, horizons=args.horizons)
+    elapsed = time.perf_counter() - started
+
+    print(f"\nBacktest: {len(result.dates)} signal dates x {len(result.symbols)} symbols, "
+          f"top {args.top}, computed in {elapsed:.2f}s")
+    if len(result.dates):
+        print(f"{pd.Timestamp(result.dates[0]).date()} to {pd.Timestamp(result.dates[-1]).date()}\n")
+    with pd.option_context('display.float_format', '{:.4f}'.format, 'display.width', 200,
+                           'display.max_columns', None):
+        print(result.summary())
+    if args.picks:
+        result.picks_table().to_csv(args.picks, index=False)
+        print(f"\nPicks written to {args.picks}")
@@ -0,0 +1,292 @@
+"""
+Weight/Threshold Sweep: Many scoring configs over one cached score tensor
+
+The indicators and per-factor scores of the whole history are computed
+once into a dates x symbols x factors tensor. Each candidate weight vector
+is then a matrix product plus a top-N selection - no refetching or
+rescoring - and candidate band edges only rebucket the one factor they
+belong to. Candidates are split across worker processes.
+
+Every candidate picks exactly what the backtest (backtest/engine.py) would:
+same total (rounded to 2 decimals), same tie rule, same forward returns. Historical OI is not available, so the oi_pattern weight only
+shifts totals by a constant and never changes the picks.
+
+Usage:
+    python backtest/sweep.py --samples 2000 --horizon 5
+    python backtest/sweep.py --band rsi=40,45,50,57,70,75 --band adx=18,25,40
+"""
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.nse_nifty500_list import get_nifty_500_stocks
+from backtest.engine import FACTORS, load_history, score_history, forward_returns
+from indicators.panel import build_panel, compute_panel_indicators
+from indicators.scorer import bucket_scores
+from indicators.scoring_rules import get_scoring_rules
+from config.backtest_config import (
+    BACKTEST_YEARS,
+    BACKTEST_TOP_N,
+    FORWARD_HORIZONS,
+    SWEEP_SAMPLES,
+    SWEEP_WORKERS
+)
+from config.indicator_config import TRADING_DAYS_PER_YEAR
+
+# Banded factors: indicator column bucketed and the compiled bands it uses
+BANDED_FACTORS = {
+    'volume': ('volume_ratio', 'volume_bands'),
+    'rsi': ('rsi', 'rsi_bands'),
+    'adx': ('adx', 'adx_bands'),
+}
+
+
+class ScoreTensor:
+    """
+    Everything a candidate config needs, computed once
+
+    Attributes:
+        factors: Factor names (last axis of scores)
+        scores: 3-D float array (dates x symbols x factors) of factor scores
+        raw: Dict of banded factor -> 2-D indicator values it is bucketed from
+        eligible: 2-D bool mask of scoreable cells
+        forward: Dict of horizon -> 2-D forward returns
+        dates, symbols: Row and column labels
+    """
+
+    def __init__(self, factors, scores, raw, eligible, forward, dates, symbols):
+        self.factors = factors
+        self.scores = scores
+        self.raw = raw
+        self.eligible = eligible
+        self.forward = forward
+        self.dates = dates
+        self.symbols = symbols
+
+    def with_bands(self, bands):
+        """Scores with some factors rebucketed: bands is {factor: (edges, scores)}"""
+        if not bands:
+            return self.scores
+        scores = self.scores.copy()
+        for factor, factor_bands in bands.items():
+            scores[:, :, self.factors.index(factor)] = bucket_scores(self.raw[factor], factor_bands)
+        return scores
+
+
+def build_score_tensor(price_data, years=BACKTEST_YEARS, horizons=FORWARD_HORIZONS):
+    """
+    Indicators, factor scores and forward returns of the signal window
+
+    Args:
+        price_data: Dict of symbol -> OHLCV DataFrame (history + warm-up)
+        years: Keep the last `years` of dates as signal dates
+
+    Returns:
+        ScoreTensor
+    """
+    panel = compute_panel_indicators(build_panel(price_data, align='date'))
+    scores, eligible = score_history(panel)
+    dates = pd.DataFrame(panel.dates).max(axis=1).to_numpy()
+
+    window = slice(max(0, len(dates) - round(years * TRADING_DAYS_PER_YEAR)), None)
+    return ScoreTensor(
+        factors=list(FACTORS),
+        scores=np.stack([scores[factor][window] for factor in FACTORS], axis=-1).astype(np.float32),
+        raw={factor: panel[column][window] for factor, (column, _) in BANDED_FACTORS.items() if column in panel.arrays},
+        eligible=eligible[window],
+        forward={horizon: forward_returns(panel['Close'], horizon)[window] for horizon in horizons},
+        dates=dates[window],
+        symbols=panel.symbols,
+    )
+
+
+def random_weights(n, factors, seed=0):
+    """n weight vectors over the factors, uniform on the simplex, summing to 100"""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(len(factors)), size=n) * 100
+
+
+def current_weights(factors):
+    """The live config's weights over the factors (fii_dii and other extras left out)"""
+    weights = get_scoring_rules().weights
+    return np.array([float(weights.get(factor, 0)) for factor in factors])
+
+
+def top_mask(total, eligible, top_n):
+    """
+    Boolean mask of the cells select_top would pick
+
+    Same picks (ties go to the earlier symbol) without sorting each row:
+    everything above the row's n-th best score, then as many cells equal
+    to it as are still needed, left to right.
+    """
+    ranked = np.where(eligible, total, -np.inf)
+    n = min(top_n, ranked.shape[1])
+    if n == 0:
+        return np.zeros(ranked.shape, dtype=bool)
+    threshold = -np.partition(-ranked, n - 1, axis=1)[:, n - 1:n]
+    above = ranked > threshold
+    tied = (ranked == threshold) & eligible
+    needed = n - above.sum(axis=1, keepdims=True)
+    return above | (tied & (np.cumsum(tied, axis=1) <= needed))
+
+
+def evaluate(scores, eligible, forward, weights, top_n):
+    """
+    Metrics of each weight vector on one score tensor
+
+    Args:
+        scores: 3-D factor scores (dates x symbols x factors)
+        eligible: 2-D bool mask
+        forward: 2-D forward returns for one horizon
+        weights: 2-D array (candidates x factors)
+
+    Returns:
+        2-D array (candidates x 4): mean pick return, hit rate, mean excess
+        over the eligible universe, number of picks
+    """
+    universe = np.where(eligible, forward, np.nan)
+    universe_sum = np.nansum(universe, axis=1)
+    universe_count = np.isfinite(universe).sum(axis=1)
+
+    out = np.full((len(weights), 4), np.nan)
+    for k, w in enumerate(weights):
+        total = np.round(scores @ w.astype(scores.dtype) / 100, 2)
+        picked = top_mask(total, eligible, top_n)
+
+        valid = picked & np.isfinite(forward)
+        returns = forward[valid]
+        if not len(returns):
+            continue
+        counts = valid.sum(axis=1)
+        dated = (counts > 0) & (universe_count > 0)
+        daily_top = np.where(valid, forward, 0).sum(axis=1)[dated] / counts[dated]
+        daily_universe = universe_sum[dated] / universe_count[dated]
+        out[k] = [returns.mean(), (returns > 0).mean(),
+                  (daily_top - daily_universe).mean() if dated.any() else np.nan, len(returns)]
+    return out
+
+
+_worker_tensor = None
+
+
+def _init_worker(tensor):
+    global _worker_tensor
+    _worker_tensor = tensor
+
+
+def _evaluate_chunk(job):
+    bands, weights, horizon, top_n = job
+    tensor = _worker_tensor
+    return evaluate(tensor.with_bands(bands), tensor.eligible, tensor.forward[horizon], weights, top_n)
+
+
+def sweep(tensor, weights, band_sets=None, horizon=FORWARD_HORIZONS[0], top_n=BACKTEST_TOP_N,
+          workers=SWEEP_WORKERS):
+    """
+    Evaluate every (band set, weight vector) pair
+
+    Args:
+        tensor: ScoreTensor from build_score_tensor
+        weights: 2-D array (candidates x tensor.factors)
+        band_sets: List of {factor: (edges, scores)} (default: the config's bands only)
+        horizon: Forward return horizon in trading days
+        workers: Processes (None: one per core, 1: run inline)
+
+    Returns:
+        DataFrame, one row per pair, best mean excess first
+    """
+    band_sets = band_sets or [{}]
+    weights = np.asarray(weights, dtype=float)
+    workers = workers or os.cpu_count() or 1
+    chunks = np.array_split(np.arange(len(weights)), max(1, min(len(weights), workers * 4)))
+    jobs = [(bands, weights[chunk], horizon, top_n) for bands in band_sets for chunk in chunks if len(chunk)]
+
+    if workers == 1:
+        _init_worker(tensor)
+        results = [_evaluate_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tensor,)) as pool:
+            results = list(pool.map(_evaluate_chunk, jobs))
+
+    rows = []
+    job_index = 0
+    for band_index, bands in enumerate(band_sets):
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            for w, metrics in zip(weights[chunk], results[job_index]):
+                row = {'bands': band_index}
+                row.update({f'w_{factor}': round(value, 2) for factor, value in zip(tensor.factors, w)})
+                row.update(zip(['mean_return', 'hit_rate', 'excess_return', 'picks'], metrics))
+                rows.append(row)
+            job_index += 1
+
+    table = pd.DataFrame(rows)
+    return table.sort_values('excess_return', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def parse_band(spec):
+    """'rsi=40,45,50,57,70,75' -> ('rsi', (edges, scores)) keeping the config's band scores"""
+    factor, _, edges = spec.partition('=')
+    if factor not in BANDED_FACTORS:
+        raise ValueError(f"Unknown banded factor '{factor}' (expected one of {', '.join(BANDED_FACTORS)})")
+    _, scores = getattr(get_scoring_rules(), BANDED_FACTORS[factor][1])
+    edges = np.array([float(edge) for edge in edges.split(',')])
+    if len(edges) != len(scores) - 1 or np.any(np.diff(edges) <= 0):
+        raise ValueError(f"{factor} needs {len(scores) - 1} increasing edges, got '{spec.partition('=')[2]}'")
+    return factor, (edges, scores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate many scoring weight/band configs on the price history")
+    parser.add_argument('--years', type=float, default=BACKTEST_YEARS)
+    parser.add_argument('--top', type=int, default=BACKTEST_TOP_N)
+    parser.add_argument('--horizon', type=int, default=FORWARD_HORIZONS[0])
+    parser.add_argument('--samples', type=int, default=SWEEP_SAMPLES, help="Random weight vectors")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--band', action='append', default=[],
+                        help="Alternative edges for one factor, e.g. rsi=40,45,50,57,70,75 (repeatable)")
+    parser.add_argument('--workers', type=int, default=SWEEP_WORKERS)
+    parser.add_argument('--limit', type=int, default=None, help="Only the first N stocks of the universe")
+    parser.add_argument('--out', default=None, help="Write all results to this CSV")
+    args = parser.parse_args()
+
+    stock_list = [s for s in get_nifty_500_stocks() if s['symbol'] != 'NIFTY 500'][:args.limit]
+    price_data = load_history(stock_list, years=args.years)
+
+    started = time.perf_counter()
+    tensor = build_score_tensor(price_data, years=args.years, horizons=[args.horizon])
+    built = time.perf_counter() - started
+
+    # Candidate 0 is the live config, band set 0 the config's bands
+    weights = np.vstack([current_weights(tensor.factors), random_weights(args.samples, tensor.factors, args.seed)])
+    band_sets = [{}] + [dict([parse_band(spec)]) for spec in args.band]
+
+    started = time.perf_counter()
+    results = sweep(tensor, weights, band_sets, horizon=args.horizon, top_n=args.top, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"\nSweep: {len(results)} configs on {len(tensor.dates)} dates x {len(tensor.symbols)} symbols, "
+          f"{args.horizon}-day horizon, top {args.top}")
+    print(f"Tensor built in {built:.2f}s, configs evaluated in {elapsed:.2f}s")
+    for index, spec in enumerate(['config'] + args.band):
+        print(f"  bands {index}: {spec}")
+    with pd.option_context('display.float_format', '{:.4f}'.format, 'display.width', 200,
+                           'display.max_columns', None):
+        current = [f'w_{factor}' for factor in tensor.factors]
+        baseline = results[(results['bands'] == 0) &
+                           (results[current].to_numpy() == np.round(weights[0], 2)).all(axis=1)]
+        print("\nCurrent config:")
+        print(baseline.head(1).to_string(index=False))
+        print("\nBest 20:")
+        print(results.head(20).to_string(index=False))
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\nAll results written to {args.out}")
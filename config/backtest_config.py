@@ -0,0 +1,12 @@
+"""
+Backtest Configuration
+History, selection size and holding horizons for backtest/engine.py
+"""
+
+BACKTEST_YEARS = 5                # Years of signal dates (warm-up history is fetched on top)
+BACKTEST_TOP_N = 5                # Stocks picked per signal date, like the API's top 5
+FORWARD_HORIZONS = [5, 6, 7]      # Holding periods in trading days (the swing horizon the RSI bands target)
+
+# Weight/threshold sweep (backtest/sweep.py)
+SWEEP_SAMPLES = 1000              # Random weight vectors per band set
+SWEEP_WORKERS = None              # Processes (None: one per core)
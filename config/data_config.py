@@ -0,0 +1,86 @@
+"""
+Data Fetching Configuration
+Batch sizes, lookback periods and retry settings for market data
+"""
+import os
+
+# Lookback periods
+DAILY_LOOKBACK_DAYS = 60
+
+# yfinance bulk download
+YFINANCE_BATCH_SIZE = 50          # Tickers per multi-ticker request
+YFINANCE_THREADS = True           # Let yfinance parallelise inside a chunk
+MAX_RETRIES = 2                   # Passes over symbols that came back empty
+RETRY_DELAY_SECONDS = 1
+
+# Price data cache
+CACHE_DIR = 'data/cache'          # Relative to the project root (non-live providers get their own)
+CACHE_FORMAT = 'parquet'          # 'parquet' or 'csv' (parquet falls back to csv without pyarrow)
+PRICE_CACHE_MAX_DAYS = 2000       # Keep this many calendar days per symbol (5-year backtest + warm-up)
+ADJUSTMENT_RTOL = 1e-5            # Relative OHLC change on a re-seen bar read as a split/dividend re-adjustment
+
+# Trading session (local time, IST): today's daily bar counts as complete,
+# and is downloaded, once the close plus the settle margin has passed
+MARKET_CLOSE_TIME = '15:30'
+SESSION_SETTLE_MINUTES = 45       # Time for the provider to publish the final daily bar
+
+# Per-host request pacing (token bucket) and concurrency caps
+# rate: sustained requests/second, burst: bucket size, max_concurrency: requests in flight
+RATE_LIMITS = {
+    'yahoo': {'rate': 2.0, 'burst': 4, 'max_concurrency': 4},
+    'nse': {'rate': 2.0, 'burst': 2, 'max_concurrency': 4},
+}
+
+# Adaptive throttling (AIMD): rates/concurrency above are starting points, tuned
+# from observed responses within these bounds and remembered across runs
+ADAPTIVE_THROTTLE_ENABLED = True
+RATE_BOUNDS = {
+    'yahoo': {'min_rate': 0.5, 'max_rate': 10.0, 'max_concurrency': 16},
+    'nse': {'min_rate': 0.2, 'max_rate': 5.0, 'max_concurrency': 8},
+}
+AIMD_INCREASE_STEP = 0.25         # requests/second added after a window of clean responses
+AIMD_THROTTLED_FACTOR = 0.5       # rate/concurrency multiplier on HTTP 403/429
+AIMD_ERROR_FACTOR = 0.8           # rate multiplier on errors, empty or slow responses
+SLOW_RESPONSE_SECONDS = 5.0       # latency treated as a sign of upstream pressure
+THROTTLED_COOLDOWN_SECONDS = 30   # pause all requests to a host after a 403/429 (one backoff per pause)
+
+# Worker threads used to process stocks concurrently
+FETCH_WORKERS = 8
+
+# Open interest source: 'bhavcopy' loads the daily F&O bhavcopy once for the whole
+# universe; 'per_symbol' calls future_price_volume_data for every stock
+OI_SOURCE = 'bhavcopy'
+BHAVCOPY_LOOKBACK_DAYS = 7        # How far back to look for the latest published bhavcopy
+
+# OI history store (per symbol and expiry) for multi-day OI trend features
+OI_HISTORY_DAYS = 30              # Keep this many calendar days of OI rows
+OI_BACKFILL_TRADING_DAYS = 6      # Bhavcopies to backfill so 5-day changes exist from day one
+
+# FII/DII institutional flows (one NSE request per trading day, market-wide score)
+FII_DII_LOOKBACK_DAYS = 3         # Sessions of combined FII + DII net flow the score looks at
+FII_DII_HISTORY_DAYS = 30         # Keep this many calendar days of daily flows
+
+# F&O eligibility index: stocks outside it skip OI lookups entirely
+FNO_LIST_TTL_HOURS = 24
+
+# Index universe (NIFTY 500 constituents change a few times a year)
+UNIVERSE_TTL_HOURS = 24           # Refetch the constituent list at most this often
+
+# Intraday mode: today's bar comes from the index quote snapshot, history from the cache
+INTRADAY_REFRESH_MINUTES = 5      # Re-rank interval for the intraday watch loop
+INTRADAY_PROJECT_VOLUME = True    # Scale partial-day volume to a full session
+MARKET_OPEN = '09:15'             # NSE session (IST)
+MARKET_CLOSE = '15:30'
+
+# Shared NSE website session
+NSE_COOKIE_TTL_MINUTES = 15       # Re-visit the home page for fresh cookies after this
+NSE_REQUEST_TIMEOUT = 10          # Seconds
+
+# Market data provider: 'live' (yfinance / nselib / NSE) or 'file' (local directory)
+# Override per run with STG_DATA_PROVIDER / STG_DATA_DIR
+DATA_PROVIDER = os.environ.get('STG_DATA_PROVIDER', 'live')
+FILE_PROVIDER_DIR = os.environ.get('STG_DATA_DIR', 'data/recorded')   # Relative to the project root
+
+if DATA_PROVIDER != 'live':
+    # Keep offline/synthetic runs from mixing with the live cache
+    CACHE_DIR = f'{CACHE_DIR}_{DATA_PROVIDER}'
@@ -0,0 +1,33 @@
+"""
+Indicator Configuration
+Indicator periods and the engine used to compute them
+"""
+
+# 'panel'  - whole universe in one pass over a bars x symbols matrix (indicators/panel.py);
+#            single-stock calls use 'fused'
+# 'fused'  - one NumPy pass over each stock's raw arrays (indicators/kernels.py)
+# 'streaming' - saved per-stock state fed only the new bars (indicators/streaming.py);
+#               EMAs keep their original seed instead of restarting at the window start
+# 'pandas' - one module per indicator (indicators/yfinance_data/)
+INDICATOR_ENGINE = 'panel'
+
+# 'standard' - float64 prices and indicators, as downloaded
+# 'compact'  - float32 Open/Close and indicators, float64 High/Low (exact ADX ties), uint32 volume,
+#              categorical symbol index, no scratch columns; about a quarter less OHLCV memory
+#              (precision check: python indicators/dtypes.py)
+DTYPE_PROFILE = 'standard'
+
+# Periods (same defaults as indicators/yfinance_data/)
+VOLUME_MA_PERIOD = 20
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+EMA_SHORT = 20
+EMA_LONG = 50
+ADX_PERIOD = 14
+
+# Warm-up (indicators/registry.py): history each fetch pulls for the active indicators
+EMA_SEED_TOLERANCE = 0.01         # EMAs need enough bars for the seed's weight to fall below this
+TRADING_DAYS_PER_YEAR = 248       # NSE sessions per year, to turn bars into calendar days
+LOOKBACK_BUFFER_DAYS = 7          # Extra calendar days for holiday clusters
@@ -1,6 +1,12 @@
 """
 Scoring Configuration
 All weights and thresholds for stock scoring
+
+Compiled and validated by indicators/scoring_rules.py: the bands of each
+threshold table must tile the number line (each 'max' equals the next
+band's 'min', a value on an edge scores in the band above it) and the
+weights must sum to 100. Edit this file, or config/scoring_overrides.json,
+and POST /config/reload to apply without restarting the server.
 """
 
 # Weights for each factor (must sum to 100)
@@ -11,7 +17,7 @@ WEIGHTS = {
     'trend_ema': 20,
     'adx': 10,
     'oi_pattern': 10,
-    'fii_dii': 20  # Not implemented yet
+    'fii_dii': 20  # Market-wide, the same for every stock
 }
 
 # Volume Scoring Thresholds
@@ -67,3 +73,20 @@ OI_PATTERN_SCORES = {
     'short_buildup': 10,      # Price ↓ + OI ↑ (Bearish, avoid)
     'no_pattern': 40          # No clear pattern or no F&O data
 }
+
+# Multi-day OI trend: the same pattern on consecutive days is a stronger signal
+# Bullish patterns (long_buildup, short_covering) gain, bearish ones lose; result stays 0-100
+OI_STREAK_ADJUSTMENT = {
+    3: 10,    # 3-4 days in a row
+    5: 20     # 5+ days in a row
+}
+
+# FII/DII Scoring: combined FII + DII net buying (₹ crore) over the last
+# FII_DII_LOOKBACK_DAYS sessions (config/data_config.py); one score for the whole market
+FII_DII_THRESHOLDS = {
+    'strong_inflow': {'min': 3000, 'score': 100},
+    'inflow': {'min': 1000, 'max': 3000, 'score': 80},
+    'neutral': {'min': -1000, 'max': 1000, 'score': 50},
+    'outflow': {'min': -3000, 'max': -1000, 'score': 25},
+    'strong_outflow': {'max': -3000, 'score': 0}
+}
@@ -0,0 +1,31 @@
+"""
+Server Configuration
+Background job pool for the /analyze API (server/app.py)
+"""
+import os
+
+# Analysis runs share the price/OI caches and per-host throttles, so more
+# than one at a time mostly splits the same rate limits between them
+JOB_WORKERS = 1                   # Background analyses running at once
+JOB_QUEUE_LIMIT = 10              # Queued (not yet started) jobs before /analyze returns 429
+JOB_HISTORY = 50                  # Finished jobs kept for GET /jobs/<id> (oldest dropped first)
+JOB_PARTIAL_TOP_N = 5             # Running top-N reported while a job is in progress
+
+# Result cache: identical /analyze requests (same trading date, universe, limit
+# and scoring config version) share one run and reuse its results
+RESULT_CACHE_TTL_SECONDS = 6 * 3600   # End-of-day results
+INTRADAY_CACHE_TTL_SECONDS = 5 * 60   # Intraday results (the quote snapshot moves)
+
+# Streaming (/analyze/stream, /jobs/<id>/stream)
+STREAM_TOP_EVERY = 25             # Send the running top N after every this many stocks
+STREAM_HEARTBEAT_SECONDS = 15     # Heartbeat when nothing new (e.g., during the bulk fetch)
+
+# Ranking snapshot (server/snapshot.py): /analyze serves the full-universe ranking
+# precomputed at these local (IST) times; each check only recomputes a stale snapshot.
+# The post-close time must be after MARKET_CLOSE_TIME + SESSION_SETTLE_MINUTES
+# (config/data_config.py), when the session's daily bar counts as complete
+SNAPSHOT_TIMES = ['16:30', '08:30']   # After the NSE close; pre-open catch-up if that run was missed
+SNAPSHOT_REFRESH_ON_START = True      # Check (and rebuild if stale) when the scheduler starts
+# Importing server.app starts nothing: `python app.py` starts the scheduler; under a
+# WSGI server set STG_SNAPSHOT_SCHEDULER=1. A lock file keeps it to one process either way
+SNAPSHOT_SCHEDULER = os.environ.get('STG_SNAPSHOT_SCHEDULER') == '1'
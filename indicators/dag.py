@@ -0,0 +1,79 @@
+"""
+Indicator DAG: Named computations with declared inputs, evaluated on demand
+
+Each node names the columns (raw fields or other nodes) it reads. Asking
+for a set of targets evaluates only the nodes they depend on, in
+dependency order, and computes every shared node once.
+
+Usage:
+    graph = IndicatorGraph()
+
+    @graph.node('macd', 'ema_fast', 'ema_slow')
+    def macd(ema_fast, ema_slow):
+        return ema_fast - ema_slow
+
+    values = graph.evaluate(['macd'], {'Close': close})
+"""
+
+
+class IndicatorGraph:
+    """Registry of indicator nodes plus a memoizing evaluator"""
+
+    def __init__(self):
+        self.nodes = {}
+
+    def node(self, name, *inputs):
+        """Decorator registering fn(*inputs) as the node `name`"""
+        def register(fn):
+            self.nodes[name] = {'inputs': inputs, 'fn': fn}
+            return fn
+        return register
+
+    def plan(self, targets, sources=()):
+        """
+        Nodes needed for the targets, in evaluation order
+
+        Args:
+            targets: Node names wanted
+            sources: Names supplied by the caller (raw fields), never evaluated
+
+        Raises:
+            KeyError for a name that is neither a node nor a source,
+            ValueError for a dependency cycle
+        """
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if name in sources or state.get(name) == 'done':
+                return
+            if name not in self.nodes:
+                raise KeyError(f"Unknown indicator input '{name}' (needed by {' -> '.join(path) or 'caller'})")
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Indicator dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self.nodes[name]['inputs']:
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for target in targets:
+            visit(target, [])
+        return order
+
+    def evaluate(self, targets, sources):
+        """
+        Compute the targets from the given source arrays
+
+        Args:
+            targets: Node names wanted
+            sources: Dict of raw input name -> value (e.g., 'Close' -> array)
+
+        Returns:
+            Dict of target name -> value
+        """
+        values = dict(sources)
+        for name in self.plan(targets, sources):
+            node = self.nodes[name]
+            values[name] = node['fn'](*(values[dependency] for dependency in node['inputs']))
+        return {target: values[target] for target in targets}
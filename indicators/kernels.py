@@ -0,0 +1,304 @@
+"""
+Indicator Kernels: All indicators from raw NumPy arrays in one pass
+
+Reproduces indicators/yfinance_data/ (pandas ewm(adjust=False), rolling
+windows, NaN rules) without building intermediate DataFrame columns.
+The primitives work along axis 0, so they apply to a single series or
+to a dates x symbols matrix alike. Indicators are nodes of GRAPH
+(indicators/dag.py), so only what the active factors need is computed.
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.dag import IndicatorGraph
+from indicators.registry import active_outputs
+
+from config.indicator_config import (
+    VOLUME_MA_PERIOD,
+    MACD_FAST,
+    MACD_SLOW,
+    MACD_SIGNAL,
+    RSI_PERIOD,
+    EMA_SHORT,
+    EMA_LONG,
+    ADX_PERIOD
+)
+
+INDICATOR_COLUMNS = [
+    'volume_ma', 'volume_ratio',
+    'macd', 'macd_signal', 'macd_hist',
+    'rsi',
+    'ema_20', 'ema_50',
+    'adx'
+]
+
+
+def shift(x, periods=1):
+    """x shifted down by `periods` rows, NaN-filled (pandas .shift)"""
+    out = np.empty_like(x, dtype=float)
+    out[:periods] = np.nan
+    out[periods:] = x[:-periods]
+    return out
+
+
+def rolling_sum(x, window):
+    """
+    Sum over a trailing window along axis 0 (pandas .rolling(window).sum())
+
+    Rows before the first full window, and windows containing NaN, are NaN.
+    """
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).sum(axis=-1)
+    return out
+
+
+def rolling_mean(x, window):
+    """Mean over a trailing window (pandas .rolling(window).mean())"""
+    return rolling_sum(x, window) / window
+
+
+def _ewm_mean_loop(x, alpha):
+    """
+    pandas ewm(adjust=False, ignore_na=False).mean() for one series with gaps
+
+    A missing value keeps the previous output and decays its weight, so the
+    next observation counts for more - the same recursion pandas uses.
+    """
+    out = np.full(len(x), np.nan)
+    weighted = np.nan
+    old_wt = 1.0
+    for i, cur in enumerate(x):
+        observed = cur == cur
+        if weighted == weighted:
+            old_wt *= 1 - alpha
+            if observed:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif observed:
+            weighted = cur
+        out[i] = weighted
+    return out
+
+
+def ewm_mean(x, span):
+    """
+    Exponential moving average along axis 0 (pandas ewm(span, adjust=False))
+
+    Leading NaNs (a series that starts later) stay NaN; the recursion is a
+    first-order IIR filter started at the first valid value. Columns with
+    gaps after their start fall back to the exact pandas recursion.
+    """
+    alpha = 2.0 / (span + 1.0)
+    x = np.asarray(x, dtype=float)
+    matrix = x if x.ndim == 2 else x[:, None]
+    n_rows, n_cols = matrix.shape
+    if n_rows == 0:
+        return x.copy()
+
+    valid = ~np.isnan(matrix)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), n_rows)
+    leading = np.arange(n_rows)[:, None] < first
+    gaps = (~valid & ~leading).any(axis=0)
+
+    start = matrix[np.minimum(first, n_rows - 1), np.arange(n_cols)]
+    filled = np.where(leading, start, matrix)
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0,
+                     zi=((1.0 - alpha) * start)[None, :])
+    out[leading] = np.nan
+
+    for col in np.flatnonzero(gaps):
+        out[:, col] = _ewm_mean_loop(matrix[:, col], alpha)
+
+    return out if x.ndim == 2 else out[:, 0]
+
+
+GRAPH = IndicatorGraph()
+
+# Raw inputs; 'present' is an optional row mask (None for a single stock)
+SOURCES = ('High', 'Low', 'Close', 'Volume', 'present')
+
+
+@GRAPH.node('prev_close', 'Close')
+def _prev_close(close):
+    return shift(close)
+
+
+# Volume
+@GRAPH.node('volume_ma', 'Volume')
+def _volume_ma(volume):
+    return rolling_mean(volume, VOLUME_MA_PERIOD)
+
+
+@GRAPH.node('volume_ratio', 'Volume', 'volume_ma')
+def _volume_ratio(volume, volume_ma):
+    return volume / volume_ma
+
+
+# MACD and EMA trend
+@GRAPH.node('ema_fast', 'Close')
+def _ema_fast(close):
+    return ewm_mean(close, MACD_FAST)
+
+
+@GRAPH.node('ema_slow', 'Close')
+def _ema_slow(close):
+    return ewm_mean(close, MACD_SLOW)
+
+
+@GRAPH.node('macd', 'ema_fast', 'ema_slow')
+def _macd(ema_fast, ema_slow):
+    return ema_fast - ema_slow
+
+
+@GRAPH.node('macd_signal', 'macd')
+def _macd_signal(macd):
+    return ewm_mean(macd, MACD_SIGNAL)
+
+
+@GRAPH.node('macd_hist', 'macd', 'macd_signal')
+def _macd_hist(macd, macd_signal):
+    return macd - macd_signal
+
+
+@GRAPH.node('ema_20', 'Close')
+def _ema_20(close):
+    return ewm_mean(close, EMA_SHORT)
+
+
+@GRAPH.node('ema_50', 'Close')
+def _ema_50(close):
+    return ewm_mean(close, EMA_LONG)
+
+
+# RSI (simple averages; a missing change counts as no gain and no loss,
+# an absent panel row counts as nothing)
+@GRAPH.node('price_change', 'Close', 'prev_close')
+def _price_change(close, prev_close):
+    return close - prev_close
+
+
+@GRAPH.node('avg_gain', 'price_change', 'present')
+def _avg_gain(delta, present):
+    gain = np.where(delta > 0, delta, 0.0)
+    if present is not None:
+        gain = np.where(present, gain, np.nan)
+    return rolling_mean(gain, RSI_PERIOD)
+
+
+@GRAPH.node('avg_loss', 'price_change', 'present')
+def _avg_loss(delta, present):
+    loss = np.where(delta < 0, -delta, 0.0)
+    if present is not None:
+        loss = np.where(present, loss, np.nan)
+    return rolling_mean(loss, RSI_PERIOD)
+
+
+@GRAPH.node('rsi', 'avg_gain', 'avg_loss')
+def _rsi(avg_gain, avg_loss):
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+# ADX
+@GRAPH.node('true_range', 'High', 'Low', 'prev_close')
+def _true_range(high, low, prev_close):
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+@GRAPH.node('up_move', 'High')
+def _up_move(high):
+    return high - shift(high)
+
+
+@GRAPH.node('down_move', 'Low')
+def _down_move(low):
+    return shift(low) - low
+
+
+@GRAPH.node('tr_smooth', 'true_range')
+def _tr_smooth(true_range):
+    return rolling_sum(true_range, ADX_PERIOD)
+
+
+@GRAPH.node('di_plus', 'up_move', 'down_move', 'tr_smooth')
+def _di_plus(up_move, down_move, tr_smooth):
+    dm_plus = np.where(up_move > down_move, np.maximum(up_move, 0.0), 0.0)
+    return 100 * (rolling_sum(dm_plus, ADX_PERIOD) / tr_smooth)
+
+
+@GRAPH.node('di_minus', 'up_move', 'down_move', 'tr_smooth')
+def _di_minus(up_move, down_move, tr_smooth):
+    dm_minus = np.where(down_move > up_move, np.maximum(down_move, 0.0), 0.0)
+    return 100 * (rolling_sum(dm_minus, ADX_PERIOD) / tr_smooth)
+
+
+@GRAPH.node('adx', 'di_plus', 'di_minus')
+def _adx(di_plus, di_minus):
+    dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+    return rolling_mean(dx, ADX_PERIOD)
+
+
+def compute_indicators(high, low, close, volume, present=None, outputs=None):
+    """
+    Indicator columns from raw OHLCV arrays
+
+    Only the graph nodes the requested outputs depend on are evaluated,
+    and shared ones once (the previous close feeds RSI and ADX, the Close
+    EWMs feed MACD). Arrays may be 1-D (one stock) or 2-D (dates x symbols).
+
+    Args:
+        present: Optional boolean mask of rows that exist (a panel row before
+            a listing is absent, unlike a bar with a missing value)
+        outputs: Columns wanted (default: those of the indicators feeding a
+            factor with non-zero weight, see indicators/registry.py)
+
+    Returns:
+        Dict of column name -> array, in INDICATOR_COLUMNS order
+    """
+    if outputs is None:
+        outputs = active_outputs()
+    outputs = [column for column in INDICATOR_COLUMNS if column in outputs]
+
+    sources = {'High': high, 'Low': low, 'Close': close, 'Volume': volume, 'present': present}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return GRAPH.evaluate(outputs, sources)
+
+
+def calculate_indicators_fused(df):
+    """
+    Fused replacement for the per-module indicator pipeline
+
+    Args:
+        df: DataFrame with High, Low, Close, Volume (Date/Open kept as is)
+
+    Returns:
+        New DataFrame with the OHLCV columns plus the active indicator
+        columns (no scratch columns), or None when there are too few bars
+        for ADX
+    """
+    if df is None or df.empty or len(df) < ADX_PERIOD + 1:
+        return None
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+
+    indicators = compute_indicators(
+        df['High'].to_numpy(dtype=float),
+        df['Low'].to_numpy(dtype=float),
+        df['Close'].to_numpy(dtype=float),
+        df['Volume'].to_numpy(dtype=float),
+    )
+
+    if not indicators:
+        return df.copy()
+
+    # One float block for the outputs, joined to the untouched input columns
+    block = pd.DataFrame(np.column_stack(list(indicators.values())), columns=list(indicators), index=df.index)
+    return pd.concat([df, block], axis=1)
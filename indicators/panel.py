@@ -0,0 +1,178 @@
+"""
+Panel Engine: Indicators for the whole universe over a dates x symbols matrix
+
+Every stock's OHLCV is laid out as one column of a 2-D array per field and
+the kernels in indicators/kernels.py run once, column-wise, for all of
+them - instead of one DataFrame pass per stock.
+
+Two alignments:
+    'bar'  - each column holds that stock's own bars, right-aligned so the
+             last row is every stock's latest bar. Shorter histories (new
+             listings) are padded with absent rows at the top. Results are
+             identical to the per-stock engines.
+    'date' - rows are the union of all trading dates. A stock missing a
+             date gets a bar of NaNs there, handled the way the per-stock
+             engines handle one (EMAs carry across it, most rolling windows
+             containing it are NaN); rows before its first bar and after
+             its last bar are absent.
+             Use this for cross-sectional work on the same calendar day.
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.kernels import compute_indicators
+from config.indicator_config import ADX_PERIOD
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class Panel:
+    """
+    Aligned 2-D arrays (rows x symbols) for OHLCV and indicator columns
+
+    Attributes:
+        symbols: Column labels
+        dates: 2-D datetime64 array of each cell's bar date (NaT if absent)
+        present: 2-D bool array, True where the stock has a bar
+        arrays: Dict of column name -> 2-D float array
+        align: 'bar' or 'date'
+    """
+
+    def __init__(self, symbols, dates, present, arrays, align):
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.present = present
+        self.arrays = arrays
+        self.align = align
+
+    @property
+    def shape(self):
+        return self.present.shape
+
+    def __getitem__(self, column):
+        return self.arrays[column]
+
+    def bar_counts(self):
+        """Number of bars each stock has"""
+        return self.present.sum(axis=0)
+
+    def latest_index(self):
+        """Row of each stock's latest bar (-1 if it has none)"""
+        n_rows = self.present.shape[0]
+        if n_rows == 0:
+            return np.full(self.present.shape[1], -1)
+        last = n_rows - 1 - self.present[::-1].argmax(axis=0)
+        return np.where(self.present.any(axis=0), last, -1)
+
+    def latest(self, columns=None, min_bars=ADX_PERIOD + 1):
+        """
+        Each stock's latest bar with its indicator values
+
+        Stocks with fewer than min_bars bars are left out, matching the
+        per-stock engines which return nothing for them.
+
+        Returns:
+            DataFrame indexed by symbol with Date and the requested columns
+        """
+        columns = columns or list(self.arrays)
+        rows = self.latest_index()
+        keep = np.flatnonzero((rows >= 0) & (self.bar_counts() >= min_bars))
+        rows = rows[keep]
+
+        data = {'Date': self.dates[rows, keep]}
+        for column in columns:
+            data[column] = self.arrays[column][rows, keep]
+        index = pd.Index([self.symbols[j] for j in keep], name='symbol')
+        return pd.DataFrame(data, index=index)
+
+
+def build_panel(price_data, align='bar'):
+    """
+    Stack per-stock OHLCV frames into a Panel
+
+    Args:
+        price_data: Dict of symbol -> DataFrame with Date and PANEL_FIELDS
+        align: 'bar' (right-aligned own bars) or 'date' (union of dates)
+
+    Returns:
+        Panel with PANEL_FIELDS filled in
+    """
+    if align not in ('bar', 'date'):
+        raise ValueError(f"Unknown panel alignment '{align}' (expected 'bar' or 'date')")
+
+    symbols = [symbol for symbol, df in price_data.items() if df is not None and not df.empty]
+    frames = [price_data[symbol] for symbol in symbols]
+    # One concat and one conversion for the whole universe, then split per stock
+    if frames:
+        stacked = pd.concat(frames, ignore_index=True)
+        bounds = np.cumsum([len(df) for df in frames])[:-1]
+        frame_values = np.split(stacked[PANEL_FIELDS].to_numpy(dtype=float), bounds)
+        frame_dates = np.split(pd.to_datetime(stacked['Date']).to_numpy(dtype='datetime64[ns]'), bounds)
+    else:
+        frame_values, frame_dates = [], []
+
+    if align == 'bar':
+        n_rows = max((len(dates) for dates in frame_dates), default=0)
+        row_index = [np.arange(n_rows - len(dates), n_rows) for dates in frame_dates]
+    else:
+        all_dates = np.unique(np.concatenate(frame_dates)) if frame_dates else np.array([], dtype='datetime64[ns]')
+        n_rows = len(all_dates)
+        row_index = [np.searchsorted(all_dates, dates) for dates in frame_dates]
+
+    n_cols = len(symbols)
+    present = np.zeros((n_rows, n_cols), dtype=bool)
+    dates = np.full((n_rows, n_cols), np.datetime64('NaT'), dtype='datetime64[ns]')
+    arrays = {field: np.full((n_rows, n_cols), np.nan) for field in PANEL_FIELDS}
+
+    for j, (values, rows) in enumerate(zip(frame_values, row_index)):
+        present[rows, j] = True
+        dates[rows, j] = frame_dates[j]
+        for k, field in enumerate(PANEL_FIELDS):
+            arrays[field][rows, j] = values[:, k]
+
+    if align == 'date':
+        # Cells between a stock's first and last bar that it lacks are gaps,
+        # not absences: the stock was listed, it just has no bar that day
+        listed = np.maximum.accumulate(present, axis=0) & np.maximum.accumulate(present[::-1], axis=0)[::-1]
+        dates = np.where(listed, all_dates[:, None], dates)
+        present = listed
+
+    return Panel(symbols, dates, present, arrays, align)
+
+
+def compute_panel_indicators(panel):
+    """
+    Add the active indicator columns to a Panel in one column-wise pass
+
+    Returns:
+        The same Panel (arrays now include the indicator columns)
+    """
+    indicators = compute_indicators(
+        panel['High'],
+        panel['Low'],
+        panel['Close'],
+        panel['Volume'],
+        present=panel.present,
+    )
+    panel.arrays.update(indicators)
+    return panel
+
+
+def calculate_universe_indicators(price_data, align='bar'):
+    """
+    Latest indicator values for every stock from one panel pass
+
+    Args:
+        price_data: Dict of symbol -> OHLCV DataFrame
+
+    Returns:
+        DataFrame indexed by symbol: Date, OHLCV and the active indicator
+        columns of each stock's latest bar (stocks with too little history
+        are absent)
+    """
+    panel = compute_panel_indicators(build_panel(price_data, align=align))
+    return panel.latest()
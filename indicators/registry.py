@@ -0,0 +1,110 @@
+"""
+Indicator Registry: What each indicator produces and how much history it needs
+
+Every indicator declares its warm-up in trading bars - the bars needed
+before its latest value is trustworthy. The fetch layer asks for the
+largest warm-up among the active indicators, converted to calendar days,
+so adding a long indicator widens the window and removing one narrows it.
+
+An indicator is active when the scoring factor it feeds has a non-zero
+weight in the current scoring rules (config/scoring_config.WEIGHTS).
+"""
+
+import sys
+import os
+import math
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.indicator_config import (
+    VOLUME_MA_PERIOD,
+    MACD_SLOW,
+    MACD_SIGNAL,
+    RSI_PERIOD,
+    EMA_SHORT,
+    EMA_LONG,
+    ADX_PERIOD,
+    EMA_SEED_TOLERANCE,
+    TRADING_DAYS_PER_YEAR,
+    LOOKBACK_BUFFER_DAYS
+)
+from indicators.scoring_rules import get_scoring_rules
+
+
+def ema_warmup(span, tolerance=EMA_SEED_TOLERANCE):
+    """Bars until the first value's weight in ewm(span, adjust=False) drops below tolerance"""
+    alpha = 2.0 / (span + 1.0)
+    return math.ceil(math.log(tolerance) / math.log(1 - alpha))
+
+
+# name -> scoring factor it feeds (WEIGHTS key), output columns, warm-up bars
+INDICATORS = {}
+
+
+def register_indicator(name, factor, outputs, warmup_bars):
+    """
+    Declare an indicator
+
+    Args:
+        name: Indicator name
+        factor: Key in config/scoring_config.WEIGHTS the outputs feed
+        outputs: Columns it adds to the price frame
+        warmup_bars: Trading bars needed before the latest value is reliable
+    """
+    INDICATORS[name] = {'factor': factor, 'outputs': list(outputs), 'warmup_bars': int(warmup_bars)}
+
+
+register_indicator('volume_ma', 'volume', ['volume_ma', 'volume_ratio'], VOLUME_MA_PERIOD)
+# MACD line needs the slow EMA settled, then the signal EMA on top of it
+register_indicator('macd', 'macd', ['macd', 'macd_signal', 'macd_hist'],
+                   ema_warmup(MACD_SLOW) + ema_warmup(MACD_SIGNAL))
+# 14 price changes need 15 closes
+register_indicator('rsi', 'rsi', ['rsi'], RSI_PERIOD + 1)
+register_indicator('ema_20', 'trend_ema', ['ema_20'], ema_warmup(EMA_SHORT))
+register_indicator('ema_50', 'trend_ema', ['ema_50'], ema_warmup(EMA_LONG))
+# 14 bars of smoothed DM/TR, then 14 DX values averaged
+register_indicator('adx', 'adx', ['adx'], 2 * ADX_PERIOD)
+
+
+def active_indicators(weights=None):
+    """Indicators feeding a factor with non-zero weight"""
+    weights = get_scoring_rules().weights if weights is None else weights
+    return [name for name, spec in INDICATORS.items() if weights.get(spec['factor'], 0)]
+
+
+def active_outputs(weights=None):
+    """Output columns of the active indicators"""
+    return [column for name in active_indicators(weights) for column in INDICATORS[name]['outputs']]
+
+
+def required_bars(names=None):
+    """Largest warm-up among the given indicators (default: the active ones)"""
+    names = active_indicators() if names is None else names
+    return max((INDICATORS[name]['warmup_bars'] for name in names), default=0)
+
+
+def lookback_days(bars):
+    """Calendar days that contain at least `bars` trading sessions"""
+    return math.ceil(bars * 365 / TRADING_DAYS_PER_YEAR) + LOOKBACK_BUFFER_DAYS
+
+
+def fetch_window_days(names=None):
+    """Calendar-day window the fetch layer should request for these indicators"""
+    return lookback_days(required_bars(names))
+
+
+def check_history(price_data, names=None):
+    """
+    Flag stocks whose fetched history is shorter than the warm-up
+
+    New listings are legitimately short; many short stocks usually mean
+    the fetch window is too small for an indicator that was added.
+
+    Returns:
+        List of symbols with fewer bars than required
+    """
+    bars = required_bars(names)
+    short = [symbol for symbol, df in price_data.items() if df is not None and len(df) < bars]
+    if short:
+        print(f"⚠️  {len(short)} stocks have fewer than the {bars} bars the indicators need to warm up: "
+              f"{', '.join(short[:10])}{' ...' if len(short) > 10 else ''}")
+    return short
@@ -1,78 +1,61 @@
 """
 Scoring Module
 Converts indicator values to 0-100 scores and calculates weighted total
+
+Bands, scores and weights come from the compiled rules in
+indicators/scoring_rules.py (config/scoring_config.py, reloadable).
 """
 import sys
 import os
+import numpy as np
+import pandas as pd
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.scoring_config import (
-    WEIGHTS,
-    VOLUME_THRESHOLDS,
-    MACD_THRESHOLDS,
-    RSI_THRESHOLDS,
-    TREND_EMA_THRESHOLDS,
-    ADX_THRESHOLDS,
-    OI_PATTERN_SCORES
-)
+from indicators.scoring_rules import get_scoring_rules
+
+BULLISH_OI_PATTERNS = ('long_buildup', 'short_covering')
+BEARISH_OI_PATTERNS = ('long_unwinding', 'short_buildup')
 
 def score_volume(volume_ratio):
     """Score volume ratio (0-100)"""
     if volume_ratio is None:
         return 0
     
-    if volume_ratio >= VOLUME_THRESHOLDS['excellent']['min']:
-        return VOLUME_THRESHOLDS['excellent']['score']
-    elif volume_ratio >= VOLUME_THRESHOLDS['very_good']['min']:
-        return VOLUME_THRESHOLDS['very_good']['score']
-    elif volume_ratio >= VOLUME_THRESHOLDS['good']['min']:
-        return VOLUME_THRESHOLDS['good']['score']
-    elif volume_ratio >= VOLUME_THRESHOLDS['moderate']['min']:
-        return VOLUME_THRESHOLDS['moderate']['score']
-    else:
-        return VOLUME_THRESHOLDS['low']['score']
+    rules = get_scoring_rules()
+    return rules.bucket(volume_ratio, rules.volume_bands)
 
 def score_macd(macd, signal, histogram):
     """Score MACD (0-100)"""
     if macd is None or signal is None or histogram is None:
         return 0
     
+    scores = get_scoring_rules().macd_scores
     macd_above_signal = macd > signal
     
     if histogram > 0 and macd_above_signal:
-        return MACD_THRESHOLDS['strong_bullish']['score']
+        return scores['strong_bullish']
     elif histogram > 0:
-        return MACD_THRESHOLDS['bullish']['score']
+        return scores['bullish']
     elif macd_above_signal:
-        return MACD_THRESHOLDS['weak_bullish']['score']
+        return scores['weak_bullish']
     else:
-        return MACD_THRESHOLDS['bearish']['score']
+        return scores['bearish']
 
 def score_rsi(rsi):
     """Score RSI (0-100) - Optimized for 5-7 day swing trades"""
     if rsi is None:
         return 0
     
-    if rsi >= 75:
-        return RSI_THRESHOLDS['very_overbought']['score']
-    elif rsi >= 70:
-        return RSI_THRESHOLDS['strong']['score']
-    elif rsi >= 55:
-        return RSI_THRESHOLDS['perfect']['score']
-    elif rsi >= 50:
-        return RSI_THRESHOLDS['building']['score']
-    elif rsi >= 45:
-        return RSI_THRESHOLDS['neutral']['score']
-    elif rsi >= 40:
-        return RSI_THRESHOLDS['weak']['score']
-    else:
-        return RSI_THRESHOLDS['too_weak']['score']
+    rules = get_scoring_rules()
+    return rules.bucket(rsi, rules.rsi_bands)
 
 def score_trend_ema(current_price, ema_20, ema_50):
     """Score trend/EMA positioning (0-100)"""
     if current_price is None or ema_20 is None or ema_50 is None:
         return 0
     
+    rules = get_scoring_rules()
+    scores = rules.trend_scores
     above_20 = current_price > ema_20
     above_50 = current_price > ema_50
     ema20_above_ema50 = ema_20 > ema_50
@@ -80,37 +63,59 @@ def score_trend_ema(current_price, ema_20, ema_50):
     if above_20 and above_50 and ema20_above_ema50:
         # Calculate distance percentage from 20 EMA
         distance_pct = ((current_price - ema_20) / ema_20) * 100
-        if distance_pct >= 2:
-            return TREND_EMA_THRESHOLDS['above_both_strong']['score']
+        if distance_pct >= rules.trend_min_distance:
+            return scores['above_both_strong']
         else:
-            return TREND_EMA_THRESHOLDS['above_both_moderate']['score']
+            return scores['above_both_moderate']
     elif above_20 and not above_50:
-        return TREND_EMA_THRESHOLDS['above_20_only']['score']
+        return scores['above_20_only']
     elif not above_20 and above_50:
-        return TREND_EMA_THRESHOLDS['between']['score']
+        return scores['between']
     else:
-        return TREND_EMA_THRESHOLDS['below_both']['score']
+        return scores['below_both']
 
 def score_adx(adx):
     """Score ADX (0-100)"""
     if adx is None:
         return 0
     
-    if adx >= 40:
-        return ADX_THRESHOLDS['very_strong']['score']
-    elif adx >= 25:
-        return ADX_THRESHOLDS['strong']['score']
-    elif adx >= 20:
-        return ADX_THRESHOLDS['moderate']['score']
-    else:
-        return ADX_THRESHOLDS['weak']['score']
+    rules = get_scoring_rules()
+    return rules.bucket(adx, rules.adx_bands)
 
-def score_oi_pattern(oi_pattern):
-    """Score Open Interest pattern (0-100)"""
-    if oi_pattern is None or oi_pattern not in OI_PATTERN_SCORES:
-        return OI_PATTERN_SCORES['no_pattern']
+def score_oi_pattern(oi_pattern, oi_features=None):
+    """
+    Score Open Interest pattern (0-100)
     
-    return OI_PATTERN_SCORES[oi_pattern]
+    oi_features (from api_requests.oi_store) strengthens a pattern that
+    has repeated for several consecutive days
+    """
+    rules = get_scoring_rules()
+    if oi_pattern is None or oi_pattern not in rules.oi_scores:
+        return rules.oi_scores['no_pattern']
+    
+    score = rules.oi_scores[oi_pattern]
+    
+    if oi_features and oi_features.get('streak_pattern') == oi_pattern:
+        adjustment = rules.bucket(oi_features.get('streak_days', 0), rules.streak_bands)
+        if oi_pattern in BULLISH_OI_PATTERNS:
+            score = min(100, score + adjustment)
+        elif oi_pattern in BEARISH_OI_PATTERNS:
+            score = max(0, score - adjustment)
+    
+    return score
+
+def score_fii_dii(net_flow):
+    """
+    Score market-wide institutional flow (0-100)
+    
+    net_flow: combined FII + DII net buying in ₹ crore (api_requests.fii_dii);
+    the same for every stock, so it is scored once per run
+    """
+    if net_flow is None:
+        return 0
+    
+    rules = get_scoring_rules()
+    return rules.bucket(net_flow, rules.fii_dii_bands)
 
 def calculate_total_score(scores):
     """
@@ -118,15 +123,16 @@ def calculate_total_score(scores):
     scores: dict with keys matching WEIGHTS keys
     """
     total = 0
-    for factor, weight in WEIGHTS.items():
+    for factor, weight in get_scoring_rules().weights.items():
         if factor in scores and scores[factor] is not None:
             total += (scores[factor] * weight / 100)
     
     return round(total, 2)
 
-def score_stock(df, oi_pattern=None):
+def score_stock(df, oi_pattern=None, oi_features=None, fii_dii_flow=None):
     """
     Score a stock based on calculated indicators in dataframe
+    fii_dii_flow: market-wide net institutional flow (see score_fii_dii)
     Returns dict with individual scores and total
     """
     if df is None or df.empty:
@@ -151,17 +157,160 @@ def score_stock(df, oi_pattern=None):
     rsi_score = score_rsi(rsi)
     trend_score = score_trend_ema(current_price, ema_20, ema_50)
     adx_score = score_adx(adx)
-    oi_score = score_oi_pattern(oi_pattern)
+    oi_score = score_oi_pattern(oi_pattern, oi_features)
+    fii_dii_score = score_fii_dii(fii_dii_flow)
     
     scores = {
         'volume': volume_score,
         'macd': macd_score,
         'rsi': rsi_score,
-        'ema_trend': trend_score,
+        'trend_ema': trend_score,
         'adx': adx_score,
-        'oi_pattern': oi_score
+        'oi_pattern': oi_score,
+        'fii_dii': fii_dii_score
     }
     
     scores['total'] = calculate_total_score(scores)
     
     return scores
+
+
+def bucket_scores(values, bands):
+    """
+    Score every value by the band it falls in
+
+    NaN compares false against every edge, so it gets the lowest band -
+    the same result as the if/elif chains.
+    """
+    edges, scores = bands
+    index = np.searchsorted(edges, values, side='right')
+    index = np.where(np.isnan(values), 0, index)
+    return scores[index]
+
+
+def _column(latest, name, n):
+    """Column as float64, or None if absent (score_stock's latest.get)"""
+    if name not in latest:
+        return None
+    return np.asarray(latest[name], dtype=float).reshape(n)
+
+
+def _per_row(values, labels, n):
+    """Dict keyed by row label, sequence aligned with the rows, or None"""
+    if values is None:
+        return [None] * n
+    if isinstance(values, dict):
+        return [values.get(label) for label in labels]
+    return list(values)
+
+
+def score_oi_patterns(patterns, features=None, rules=None):
+    """Vectorized score_oi_pattern over aligned lists of patterns and OI features"""
+    rules = rules or get_scoring_rules()
+    n = len(patterns)
+    features = features if features is not None else [None] * n
+    known = [pattern if pattern in rules.oi_scores else 'no_pattern' for pattern in patterns]
+    score = np.array([rules.oi_scores[pattern] for pattern in known])
+
+    # Streak length where the streak is of this same pattern (0 otherwise)
+    streak_days = np.array([
+        (feature.get('streak_days', 0) if feature and feature.get('streak_pattern') == pattern
+         and pattern in rules.oi_scores else 0)
+        for pattern, feature in zip(patterns, features)
+    ], dtype=float)
+    adjustment = bucket_scores(streak_days, rules.streak_bands)
+
+    bullish = np.isin(known, BULLISH_OI_PATTERNS)
+    bearish = np.isin(known, BEARISH_OI_PATTERNS)
+    score = np.where(bullish, np.minimum(100, score + adjustment), score)
+    score = np.where(bearish, np.maximum(0, score - adjustment), score)
+    return score
+
+
+def score_universe(latest, oi_patterns=None, oi_features=None, fii_dii_flow=None):
+    """
+    Score many stocks at once from their latest indicator rows
+
+    Gives exactly what score_stock gives row by row, including NaN and
+    missing-column handling, without a Python loop over indicator values.
+
+    Args:
+        latest: DataFrame with one row per stock (e.g., indexed by symbol)
+            holding Close and the indicator columns, or a dict of
+            column -> array
+        oi_patterns: Dict of row label -> OI pattern, or a sequence aligned
+            with the rows (None: no pattern)
+        oi_features: Same for the OI trend features dicts
+        fii_dii_flow: Market-wide net institutional flow, one value for all rows
+
+    Returns:
+        DataFrame with the score_stock keys as columns and the rows of latest
+    """
+    if isinstance(latest, pd.DataFrame):
+        labels, n = latest.index, len(latest)
+    else:
+        n = len(next(iter(latest.values()))) if latest else 0
+        labels = pd.RangeIndex(n)
+
+    # One rules object for the whole table, even if a reload lands midway
+    rules = get_scoring_rules()
+    column = {name: _column(latest, name, n) for name in
+              ('Close', 'volume_ratio', 'macd', 'macd_signal', 'macd_hist', 'rsi', 'ema_20', 'ema_50', 'adx')}
+    zeros = np.zeros(n, dtype=int)
+
+    volume = bucket_scores(column['volume_ratio'], rules.volume_bands) if column['volume_ratio'] is not None else zeros
+
+    if any(column[name] is None for name in ('macd', 'macd_signal', 'macd_hist')):
+        macd = zeros
+    else:
+        above_signal = column['macd'] > column['macd_signal']
+        rising = column['macd_hist'] > 0
+        macd = np.select(
+            [rising & above_signal, rising, above_signal],
+            [rules.macd_scores['strong_bullish'], rules.macd_scores['bullish'], rules.macd_scores['weak_bullish']],
+            rules.macd_scores['bearish']
+        )
+
+    rsi = bucket_scores(column['rsi'], rules.rsi_bands) if column['rsi'] is not None else zeros
+
+    if any(column[name] is None for name in ('Close', 'ema_20', 'ema_50')):
+        trend = zeros
+    else:
+        price, ema_20, ema_50 = column['Close'], column['ema_20'], column['ema_50']
+        above_20 = price > ema_20
+        above_50 = price > ema_50
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distance_pct = ((price - ema_20) / ema_20) * 100
+        trend = np.select(
+            [above_20 & above_50 & (ema_20 > ema_50) & (distance_pct >= rules.trend_min_distance),
+             above_20 & above_50 & (ema_20 > ema_50),
+             above_20 & ~above_50,
+             ~above_20 & above_50],
+            [rules.trend_scores['above_both_strong'], rules.trend_scores['above_both_moderate'],
+             rules.trend_scores['above_20_only'], rules.trend_scores['between']],
+            rules.trend_scores['below_both']
+        )
+
+    adx = bucket_scores(column['adx'], rules.adx_bands) if column['adx'] is not None else zeros
+    if oi_patterns is None and oi_features is None:
+        oi = np.full(n, rules.oi_scores['no_pattern'])
+    else:
+        oi = score_oi_patterns(_per_row(oi_patterns, labels, n), _per_row(oi_features, labels, n), rules)
+
+    scores = pd.DataFrame({
+        'volume': volume,
+        'macd': macd,
+        'rsi': rsi,
+        'trend_ema': trend,
+        'adx': adx,
+        'oi_pattern': oi,
+        'fii_dii': np.full(n, score_fii_dii(fii_dii_flow))
+    }, index=labels)
+
+    # Same accumulation order as calculate_total_score, so totals match bit for bit
+    total = np.zeros(n)
+    for factor, weight in rules.weights.items():
+        if factor in scores:
+            total = total + (scores[factor].to_numpy() * weight / 100)
+    scores['total'] = np.round(total, 2)
+    return scores
@@ -0,0 +1,274 @@
+"""
+Scoring Rules: config/scoring_config.py compiled into lookup tables
+
+The threshold dicts are turned once into sorted breakpoint arrays (one
+score per band), checked for gaps, overlaps, out-of-range scores and
+weights that do not add up, and published as one immutable ScoringRules
+object. The scorer reads whichever object is current.
+
+reload_scoring_rules() re-imports config/scoring_config.py, applies the
+optional JSON overrides file (STG_SCORING_OVERRIDES, default
+config/scoring_overrides.json) and swaps the new rules in only if they
+validate - a bad edit leaves the running rules untouched.
+
+Overrides file example (any subset of the config names, each replaced whole):
+    {"WEIGHTS": {"volume": 20, "macd": 13, ...},
+     "RSI_THRESHOLDS": {"perfect": {"min": 55, "max": 68, "score": 100}, ...}}
+"""
+
+import sys
+import os
+import json
+import hashlib
+import importlib
+import threading
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config.scoring_config as scoring_config
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OVERRIDES_FILE = os.environ.get('STG_SCORING_OVERRIDES',
+                                os.path.join(PROJECT_ROOT, 'config', 'scoring_overrides.json'))
+
+CONFIG_NAMES = ['WEIGHTS', 'VOLUME_THRESHOLDS', 'MACD_THRESHOLDS', 'RSI_THRESHOLDS', 'TREND_EMA_THRESHOLDS',
+                'ADX_THRESHOLDS', 'OI_PATTERN_SCORES', 'OI_STREAK_ADJUSTMENT', 'FII_DII_THRESHOLDS']
+
+# Factors the scorer implements (WEIGHTS keys)
+FACTORS = ['volume', 'macd', 'rsi', 'trend_ema', 'adx', 'oi_pattern', 'fii_dii']
+
+MACD_BANDS = ['strong_bullish', 'bullish', 'weak_bullish', 'bearish']
+TREND_BANDS = ['above_both_strong', 'above_both_moderate', 'above_20_only', 'between', 'below_both']
+
+
+def compile_bands(name, thresholds, errors):
+    """
+    Turn {band: {'min', 'max', 'score'}} into (edges, scores, labels)
+
+    Bands are ordered by 'min'. The lowest band has no 'min', the highest no
+    'max', and each band's 'max' must equal the next band's 'min'. A value
+    at an edge belongs to the band above it.
+
+    Returns:
+        Tuple (edges, scores, labels) with len(scores) == len(edges) + 1
+    """
+    bands = sorted(thresholds.items(), key=lambda item: item[1].get('min', float('-inf')))
+    if sum('min' not in band for _, band in bands) != 1:
+        errors.append(f"{name}: exactly one band must have no 'min' (the lowest)")
+    if sum('max' not in band for _, band in bands) != 1:
+        errors.append(f"{name}: exactly one band must have no 'max' (the highest)")
+
+    for (label, band), (next_label, next_band) in zip(bands, bands[1:]):
+        upper, lower = band.get('max'), next_band.get('min')
+        if upper is None or lower is None:
+            continue
+        if upper < lower:
+            errors.append(f"{name}: gap between '{label}' (max {upper}) and '{next_label}' (min {lower})")
+        elif upper > lower:
+            errors.append(f"{name}: '{label}' (max {upper}) overlaps '{next_label}' (min {lower})")
+    for label, band in bands:
+        if 'min' in band and 'max' in band and band['min'] >= band['max']:
+            errors.append(f"{name}: '{label}' is empty (min {band['min']} >= max {band['max']})")
+
+    edges = np.array([band['min'] for _, band in bands[1:] if 'min' in band], dtype=float)
+    scores = np.array([band['score'] for _, band in bands])
+    return edges, scores, [label for label, _ in bands]
+
+
+def _check_scores(name, scores, errors):
+    for label, score in scores.items():
+        if not 0 <= score <= 100:
+            errors.append(f"{name}: score {score} for '{label}' is outside 0-100")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+def check_structure(values):
+    """
+    Shape and type problems that would stop compiling altogether
+
+    Every section must be a dict; weights, scores and streak points numbers;
+    each threshold band a dict with a numeric 'score' and numeric 'min' /
+    'max' where given; streak lengths whole day counts.
+
+    Returns:
+        List of error messages (empty if the values can be compiled)
+    """
+    errors = []
+    for name in CONFIG_NAMES:
+        if not isinstance(values.get(name), dict):
+            errors.append(f"{name}: expected a mapping, got {type(values.get(name)).__name__}")
+    if errors:
+        return errors
+
+    for name in ('WEIGHTS', 'OI_PATTERN_SCORES'):
+        for label, value in values[name].items():
+            if not _is_number(value):
+                errors.append(f"{name}: '{label}' must be a number, got {value!r}")
+
+    for name in ('VOLUME_THRESHOLDS', 'MACD_THRESHOLDS', 'RSI_THRESHOLDS', 'TREND_EMA_THRESHOLDS',
+                 'ADX_THRESHOLDS', 'FII_DII_THRESHOLDS'):
+        for label, band in values[name].items():
+            if not isinstance(band, dict):
+                errors.append(f"{name}: '{label}' must be a mapping, got {band!r}")
+                continue
+            if 'score' not in band:
+                errors.append(f"{name}: '{label}' has no 'score'")
+            for key in ('score', 'min', 'max', 'min_distance'):
+                if key in band and not _is_number(band[key]):
+                    errors.append(f"{name}: '{label}' {key} must be a number, got {band[key]!r}")
+
+    for days, points in values['OI_STREAK_ADJUSTMENT'].items():
+        if not isinstance(days, int) or isinstance(days, bool):
+            errors.append(f"OI_STREAK_ADJUSTMENT: streak length {days!r} must be a whole number of days")
+        if not _is_number(points):
+            errors.append(f"OI_STREAK_ADJUSTMENT: adjustment for {days!r} must be a number, got {points!r}")
+    return errors
+
+
+def _require(name, table, labels, errors):
+    missing = [label for label in labels if label not in table]
+    if missing:
+        errors.append(f"{name}: missing {', '.join(missing)}")
+    return not missing
+
+
+class ScoringRules:
+    """
+    Immutable compiled scoring configuration
+
+    Attributes:
+        weights: Dict of factor -> weight (WEIGHTS order)
+        volume_bands, rsi_bands, adx_bands, fii_dii_bands: (edges, scores) for bucket lookups
+        macd_scores, trend_scores: Dict of band label -> score
+        trend_min_distance: % above the 20 EMA for 'above_both_strong'
+        oi_scores: Dict of OI pattern -> score
+        streak_bands: (edges, adjustments) for consecutive-day OI streaks
+        version: Short hash of the source values (changes with any edit)
+        warnings: Problems that do not stop scoring (e.g., unimplemented factors)
+    """
+
+    def __init__(self, values):
+        errors = check_structure(values)
+        if errors:
+            raise ValueError("Invalid scoring config:\n  " + "\n  ".join(errors))
+        warnings = []
+
+        self.weights = dict(values['WEIGHTS'])
+        if any(weight < 0 for weight in self.weights.values()):
+            errors.append("WEIGHTS: weights must not be negative")
+        if sum(self.weights.values()) != 100:
+            errors.append(f"WEIGHTS: weights sum to {sum(self.weights.values())}, expected 100")
+        for factor, weight in self.weights.items():
+            if factor not in FACTORS and weight:
+                warnings.append(f"WEIGHTS: '{factor}' has weight {weight} but no scorer; "
+                                f"totals top out at {100 - weight}")
+
+        self.volume_bands = compile_bands('VOLUME_THRESHOLDS', values['VOLUME_THRESHOLDS'], errors)[:2]
+        self.rsi_bands = compile_bands('RSI_THRESHOLDS', values['RSI_THRESHOLDS'], errors)[:2]
+        self.adx_bands = compile_bands('ADX_THRESHOLDS', values['ADX_THRESHOLDS'], errors)[:2]
+        self.fii_dii_bands = compile_bands('FII_DII_THRESHOLDS', values['FII_DII_THRESHOLDS'], errors)[:2]
+        for name in ('VOLUME_THRESHOLDS', 'RSI_THRESHOLDS', 'ADX_THRESHOLDS', 'FII_DII_THRESHOLDS',
+                     'MACD_THRESHOLDS', 'TREND_EMA_THRESHOLDS'):
+            _check_scores(name, {label: band['score'] for label, band in values[name].items()}, errors)
+
+        self.macd_scores = {}
+        if _require('MACD_THRESHOLDS', values['MACD_THRESHOLDS'], MACD_BANDS, errors):
+            self.macd_scores = {label: values['MACD_THRESHOLDS'][label]['score'] for label in MACD_BANDS}
+
+        self.trend_scores, self.trend_min_distance = {}, None
+        if _require('TREND_EMA_THRESHOLDS', values['TREND_EMA_THRESHOLDS'], TREND_BANDS, errors):
+            self.trend_scores = {label: values['TREND_EMA_THRESHOLDS'][label]['score'] for label in TREND_BANDS}
+            self.trend_min_distance = values['TREND_EMA_THRESHOLDS']['above_both_strong'].get('min_distance')
+            if self.trend_min_distance is None:
+                errors.append("TREND_EMA_THRESHOLDS: 'above_both_strong' needs 'min_distance'")
+
+        self.oi_scores = dict(values['OI_PATTERN_SCORES'])
+        _require('OI_PATTERN_SCORES', self.oi_scores, ['no_pattern'], errors)
+        _check_scores('OI_PATTERN_SCORES', self.oi_scores, errors)
+
+        streaks = sorted(values['OI_STREAK_ADJUSTMENT'].items())
+        self.streak_bands = (np.array([days for days, _ in streaks], dtype=float),
+                             np.array([0] + [points for _, points in streaks]))
+
+        if errors:
+            raise ValueError("Invalid scoring config:\n  " + "\n  ".join(errors))
+
+        self.warnings = warnings
+        canonical = json.dumps({name: values[name] for name in CONFIG_NAMES}, sort_keys=True, default=str)
+        self.version = hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+    def bucket(self, value, bands):
+        """Score of the band a single value falls in (NaN -> lowest band)"""
+        edges, scores = bands
+        if value != value:
+            return scores[0].item()
+        return scores[int(np.searchsorted(edges, value, side='right'))].item()
+
+    def summary(self):
+        """JSON-safe description for the API"""
+        return {'version': self.version, 'weights': self.weights, 'warnings': self.warnings}
+
+
+def load_config_values(overrides_file=OVERRIDES_FILE):
+    """
+    Current config values: config/scoring_config.py re-imported, then the
+    overrides file (if present) applied section by section
+    """
+    module = importlib.reload(scoring_config)
+    values = {name: getattr(module, name) for name in CONFIG_NAMES}
+
+    if overrides_file and os.path.exists(overrides_file):
+        with open(overrides_file) as f:
+            overrides = json.load(f)
+        if not isinstance(overrides, dict):
+            raise ValueError(f"{overrides_file} must hold a JSON object of config names")
+        unknown = [name for name in overrides if name not in CONFIG_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown scoring config names in {overrides_file}: {', '.join(unknown)}")
+        values.update(overrides)
+        # JSON object keys are strings; streak lengths are day counts
+        streaks = values['OI_STREAK_ADJUSTMENT']
+        if isinstance(streaks, dict):
+            try:
+                values['OI_STREAK_ADJUSTMENT'] = {int(days): points for days, points in streaks.items()}
+            except (TypeError, ValueError):
+                raise ValueError(f"OI_STREAK_ADJUSTMENT in {overrides_file}: streak lengths must be whole numbers")
+
+    return values
+
+
+_rules = None
+_lock = threading.Lock()
+
+
+def get_scoring_rules():
+    """The compiled rules in use (compiled on first call)"""
+    global _rules
+    if _rules is None:
+        with _lock:
+            if _rules is None:
+                _rules = ScoringRules(load_config_values())
+                for warning in _rules.warnings:
+                    print(f"⚠️  {warning}")
+    return _rules
+
+
+def reload_scoring_rules():
+    """
+    Recompile the config and swap it in
+
+    Returns:
+        The new ScoringRules
+
+    Raises:
+        ValueError if the edited config does not validate (the previous
+        rules stay in use)
+    """
+    global _rules
+    rules = ScoringRules(load_config_values())
+    with _lock:
+        _rules = rules
+    return rules
@@ -0,0 +1,252 @@
+"""
+Streaming Engine: Per-stock indicator state advanced one bar at a time
+
+Each stock keeps an IndicatorState (the streaming classes from
+indicators/yfinance_data/) saved between runs, so a daily run feeds one
+new bar per stock and an intraday re-score only peeks at today's partial
+bar - O(stocks) instead of O(stocks x history).
+
+The state also keeps the last bar's OHLC. If df shows different prices for
+that date (the price cache refetched a split/dividend-adjusted history,
+see ohlcv_cache.adjustment_changed), the saved windows are on the old
+adjustment and the state is rebuilt from df.
+
+EMAs here are seeded at the first bar the state ever saw and carried
+forward, so they match a batch calculation over the same bars; the batch
+engines seed at the start of the fetch window instead, which differs until
+the window is long enough for the EMA seed to wash out.
+"""
+
+import sys
+import os
+import copy
+import json
+import threading
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.yfinance_data.volume import VolumeMAState
+from indicators.yfinance_data.macd import MACDState
+from indicators.yfinance_data.rsi import RSIState
+from indicators.yfinance_data.ema_20 import EMA20State
+from indicators.yfinance_data.ema_50 import EMA50State
+from indicators.yfinance_data.adx import ADXState
+from indicators.yfinance_data.state import to_json_value, from_json_value
+from indicators.kernels import INDICATOR_COLUMNS
+from config.indicator_config import (
+    VOLUME_MA_PERIOD,
+    MACD_FAST,
+    MACD_SLOW,
+    MACD_SIGNAL,
+    RSI_PERIOD,
+    EMA_SHORT,
+    EMA_LONG,
+    ADX_PERIOD
+)
+from config.data_config import CACHE_DIR, ADJUSTMENT_RTOL
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'indicator_state.json')
+
+OHLCV_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close']
+
+
+class IndicatorState:
+    """All indicator states for one stock plus the date and OHLC of the last bar fed"""
+
+    def __init__(self):
+        self.volume = VolumeMAState(VOLUME_MA_PERIOD)
+        self.macd = MACDState(MACD_FAST, MACD_SLOW, MACD_SIGNAL)
+        self.rsi = RSIState(RSI_PERIOD)
+        self.ema_20 = EMA20State(EMA_SHORT)
+        self.ema_50 = EMA50State(EMA_LONG)
+        self.adx = ADXState(ADX_PERIOD)
+        self.last_date = None
+        self.last_bar = None
+        self.bars = 0
+        self.values = {column: float('nan') for column in INDICATOR_COLUMNS}
+
+    def matches(self, df, dates):
+        """Whether df's bar at last_date has the OHLC this state was fed (same adjustment)"""
+        if self.last_bar is None:
+            return False
+        rows = df.loc[(dates == self.last_date).to_numpy(), PRICE_FIELDS]
+        if rows.empty:
+            return False
+        return np.allclose(np.asarray(self.last_bar, dtype=float), rows.iloc[-1].to_numpy(dtype=float),
+                           rtol=ADJUSTMENT_RTOL, equal_nan=True)
+
+    def update(self, date, high, low, close, volume):
+        """
+        Feed one bar
+
+        Returns:
+            Dict of INDICATOR_COLUMNS values after this bar
+        """
+        volume_ma, volume_ratio = self.volume.update(volume)
+        macd, macd_signal, macd_hist = self.macd.update(close)
+        values = {
+            'volume_ma': volume_ma,
+            'volume_ratio': volume_ratio,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'rsi': self.rsi.update(close),
+            'ema_20': self.ema_20.update(close),
+            'ema_50': self.ema_50.update(close),
+            'adx': self.adx.update(high, low, close),
+        }
+        self.last_date = pd.Timestamp(date)
+        self.bars += 1
+        self.values = values
+        return values
+
+    def peek(self, date, high, low, close, volume):
+        """Values for a provisional bar (e.g., intraday) without keeping it"""
+        return copy.deepcopy(self).update(date, high, low, close, volume)
+
+    def to_dict(self):
+        return {
+            'last_date': self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            'last_bar': self.last_bar,
+            'bars': self.bars,
+            'values': {column: to_json_value(value) for column, value in self.values.items()},
+            'volume': self.volume.to_dict(),
+            'macd': self.macd.to_dict(),
+            'rsi': self.rsi.to_dict(),
+            'ema_20': self.ema_20.to_dict(),
+            'ema_50': self.ema_50.to_dict(),
+            'adx': self.adx.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls.__new__(cls)
+        state.last_date = pd.Timestamp(data['last_date']) if data['last_date'] else None
+        # States saved before last_bar was kept cannot be checked and are rebuilt once
+        state.last_bar = data.get('last_bar')
+        state.bars = data['bars']
+        state.values = {column: from_json_value(value) for column, value in data['values'].items()}
+        state.volume = VolumeMAState.from_dict(data['volume'])
+        state.macd = MACDState.from_dict(data['macd'])
+        state.rsi = RSIState.from_dict(data['rsi'])
+        state.ema_20 = EMA20State.from_dict(data['ema_20'])
+        state.ema_50 = EMA50State.from_dict(data['ema_50'])
+        state.adx = ADXState.from_dict(data['adx'])
+        return state
+
+
+_states = None
+_dirty = False
+_lock = threading.Lock()
+
+
+def _load():
+    """Load saved states once per process"""
+    global _states
+    if _states is None:
+        try:
+            with open(STATE_FILE) as f:
+                _states = {symbol: IndicatorState.from_dict(data) for symbol, data in json.load(f).items()}
+        except (OSError, ValueError, KeyError):
+            _states = {}
+    return _states
+
+
+def save_indicator_states():
+    """Write the states to disk if any changed"""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+        tmp_file = STATE_FILE + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({symbol: state.to_dict() for symbol, state in _states.items()}, f)
+        os.replace(tmp_file, STATE_FILE)
+        _dirty = False
+
+
+def advance(symbol, df, provisional_last=False):
+    """
+    Bring a stock's state up to the end of df and return its latest values
+
+    Only bars after the state's last date are fed. If df does not reach
+    back to that date (the state is too old or missing), or its bar at that
+    date differs from the one the state saw (a re-adjusted history), the
+    state is rebuilt from df.
+
+    Args:
+        symbol: Key for the saved state
+        df: OHLCV DataFrame with Date column, oldest first
+        provisional_last: The last bar is not final (intraday) - compute
+            with it but do not store it
+
+    Returns:
+        Dict with Date, OHLCV and INDICATOR_COLUMNS for the last bar, plus
+        'bars' (number of bars behind the values)
+    """
+    global _dirty
+    dates = pd.to_datetime(df['Date'])
+    final = df.iloc[:-1] if provisional_last else df
+    final_dates = dates.iloc[:-1] if provisional_last else dates
+
+    with _lock:
+        states = _load()
+        state = states.get(symbol)
+        if (state is None or state.last_date is None or final_dates.empty
+                or not final_dates.iloc[0] <= state.last_date <= final_dates.iloc[-1]
+                or not state.matches(final, final_dates)):
+            state = IndicatorState()
+        new_rows = final[final_dates > state.last_date] if state.last_date is not None else final
+
+        for date, high, low, close, volume in zip(new_rows['Date'], new_rows['High'], new_rows['Low'],
+                                                  new_rows['Close'], new_rows['Volume']):
+            state.update(date, float(high), float(low), float(close), float(volume))
+        if len(new_rows):
+            state.last_bar = [float(value) for value in new_rows[PRICE_FIELDS].iloc[-1]]
+        if len(new_rows) or states.get(symbol) is not state:
+            states[symbol] = state
+            _dirty = True
+
+    last = df.iloc[-1]
+    if provisional_last:
+        values = state.peek(last['Date'], float(last['High']), float(last['Low']),
+                            float(last['Close']), float(last['Volume']))
+        bars = state.bars + 1
+    else:
+        values = dict(state.values)
+        bars = state.bars
+
+    row = {'Date': pd.Timestamp(last['Date'])}
+    row.update({field: float(last[field]) for field in OHLCV_FIELDS})
+    row.update(values)
+    row['bars'] = bars
+    return row
+
+
+def advance_universe(price_data, provisional_last=False):
+    """
+    Advance every stock's state and collect the latest values
+
+    Args:
+        price_data: Dict of symbol -> OHLCV DataFrame
+        provisional_last: The last bar of each frame is intraday (see advance)
+
+    Returns:
+        DataFrame indexed by symbol, same columns as the panel engine's latest
+        rows (stocks with too few bars for ADX are absent)
+    """
+    rows = {}
+    for symbol, df in price_data.items():
+        if df is None or df.empty:
+            continue
+        row = advance(symbol, df, provisional_last=provisional_last)
+        if row.pop('bars') >= ADX_PERIOD + 1:
+            rows[symbol] = row
+
+    latest = pd.DataFrame.from_dict(rows, orient='index', columns=['Date'] + OHLCV_FIELDS + INDICATOR_COLUMNS)
+    latest.index.name = 'symbol'
+    return latest
@@ -2,7 +2,12 @@
 ADX Calculator
 Calculates Average Directional Index
 """
+import sys
+import os
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from indicators.yfinance_data.state import RollingWindow, divide, to_json_value, from_json_value
 
 def calculate_adx(df, period=14):
     """
@@ -44,3 +49,59 @@ def calculate_adx(df, period=14):
     df['adx'] = df['DX'].rolling(window=period).mean()
     
     return df
+
+
+class ADXState:
+    """
+    Streaming ADX: update(high, low, close) per bar gives the same value as
+    calculate_adx over the same bars
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_high = float('nan')
+        self.prev_low = float('nan')
+        self.prev_close = float('nan')
+        self.tr = RollingWindow(period)
+        self.dm_plus = RollingWindow(period)
+        self.dm_minus = RollingWindow(period)
+        self.dx = RollingWindow(period)
+
+    def update(self, high, low, close):
+        """Add one bar, return the ADX (NaN until 2 * period - 1 bars)"""
+        # True Range, skipping missing parts like DataFrame.max(axis=1)
+        ranges = [r for r in (high - low, abs(high - self.prev_close), abs(low - self.prev_close)) if r == r]
+        self.tr.update(max(ranges) if ranges else float('nan'))
+
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        self.dm_plus.update(max(up_move, 0.0) if up_move > down_move else 0.0)
+        self.dm_minus.update(max(down_move, 0.0) if down_move > up_move else 0.0)
+
+        self.prev_high, self.prev_low, self.prev_close = float(high), float(low), float(close)
+
+        tr_smooth = self.tr.sum()
+        di_plus = 100 * divide(self.dm_plus.sum(), tr_smooth)
+        di_minus = 100 * divide(self.dm_minus.sum(), tr_smooth)
+        self.dx.update(100 * divide(abs(di_plus - di_minus), di_plus + di_minus))
+        return self.dx.mean()
+
+    def to_dict(self):
+        return {
+            'period': self.period,
+            'prev': [to_json_value(v) for v in (self.prev_high, self.prev_low, self.prev_close)],
+            'tr': self.tr.to_dict(),
+            'dm_plus': self.dm_plus.to_dict(),
+            'dm_minus': self.dm_minus.to_dict(),
+            'dx': self.dx.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['period'])
+        state.prev_high, state.prev_low, state.prev_close = (from_json_value(v) for v in data['prev'])
+        state.tr = RollingWindow.from_dict(data['tr'])
+        state.dm_plus = RollingWindow.from_dict(data['dm_plus'])
+        state.dm_minus = RollingWindow.from_dict(data['dm_minus'])
+        state.dx = RollingWindow.from_dict(data['dx'])
+        return state
@@ -1,7 +1,12 @@
 """
 20-day EMA Calculator
 """
+import sys
+import os
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from indicators.yfinance_data.state import EMAState
 
 def calculate_ema_20(df):
     """
@@ -12,3 +17,13 @@ def calculate_ema_20(df):
     
     df['ema_20'] = df['Close'].ewm(span=20, adjust=False).mean()
     return df
+
+
+class EMA20State(EMAState):
+    """
+    Streaming 20-day EMA: update(close) per bar gives the same value as
+    calculate_ema_20 over the same bars
+    """
+
+    def __init__(self, span=20):
+        super().__init__(span)
@@ -1,7 +1,12 @@
 """
 50-day EMA Calculator
 """
+import sys
+import os
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from indicators.yfinance_data.state import EMAState
 
 def calculate_ema_50(df):
     """
@@ -12,3 +17,13 @@ def calculate_ema_50(df):
     
     df['ema_50'] = df['Close'].ewm(span=50, adjust=False).mean()
     return df
+
+
+class EMA50State(EMAState):
+    """
+    Streaming 50-day EMA: update(close) per bar gives the same value as
+    calculate_ema_50 over the same bars
+    """
+
+    def __init__(self, span=50):
+        super().__init__(span)
@@ -2,7 +2,12 @@
 MACD Calculator
 Calculates MACD, Signal Line, and Histogram
 """
+import sys
+import os
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from indicators.yfinance_data.state import EMAState
 
 def calculate_macd(df):
     """
@@ -28,3 +33,36 @@ def calculate_macd(df):
     df['macd_hist'] = df['macd'] - df['macd_signal']
     
     return df
+
+
+class MACDState:
+    """
+    Streaming MACD: update(close) per bar gives the same values as
+    calculate_macd over the same bars
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.ema_fast = EMAState(fast)
+        self.ema_slow = EMAState(slow)
+        self.ema_signal = EMAState(signal)
+
+    def update(self, close):
+        """Add one close, return (macd, signal, histogram)"""
+        macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        signal = self.ema_signal.update(macd)
+        return macd, signal, macd - signal
+
+    def to_dict(self):
+        return {
+            'fast': self.ema_fast.to_dict(),
+            'slow': self.ema_slow.to_dict(),
+            'signal': self.ema_signal.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls.__new__(cls)
+        state.ema_fast = EMAState.from_dict(data['fast'])
+        state.ema_slow = EMAState.from_dict(data['slow'])
+        state.ema_signal = EMAState.from_dict(data['signal'])
+        return state
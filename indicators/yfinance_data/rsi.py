@@ -2,7 +2,12 @@
 RSI Calculator
 Calculates 14-day Relative Strength Index
 """
+import sys
+import os
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from indicators.yfinance_data.state import RollingWindow, divide, to_json_value, from_json_value
 
 def calculate_rsi(df, period=14):
     """
@@ -27,3 +32,43 @@ def calculate_rsi(df, period=14):
     df['rsi'] = 100 - (100 / (1 + rs))
     
     return df
+
+
+class RSIState:
+    """
+    Streaming RSI: update(close) per bar gives the same value as
+    calculate_rsi over the same bars
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = float('nan')
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+
+    def update(self, close):
+        """Add one close, return the RSI (NaN until `period` bars)"""
+        # The first bar (and a missing close) counts as no gain and no loss
+        delta = close - self.prev_close
+        self.gains.update(delta if delta > 0 else 0.0)
+        self.losses.update(-delta if delta < 0 else 0.0)
+        self.prev_close = float(close)
+
+        rs = divide(self.gains.mean(), self.losses.mean())
+        return 100 - divide(100, 1 + rs)
+
+    def to_dict(self):
+        return {
+            'period': self.period,
+            'prev_close': to_json_value(self.prev_close),
+            'gains': self.gains.to_dict(),
+            'losses': self.losses.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['period'])
+        state.prev_close = from_json_value(data['prev_close'])
+        state.gains = RollingWindow.from_dict(data['gains'])
+        state.losses = RollingWindow.from_dict(data['losses'])
+        return state
@@ -0,0 +1,90 @@
+"""
+Streaming building blocks shared by the indicator state classes
+
+EMAState and RollingWindow take one value per bar and reproduce pandas
+ewm(adjust=False).mean() and rolling(window) results, NaN rules included.
+Both serialize to JSON-safe dicts (NaN stored as None).
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+
+def to_json_value(value):
+    """NaN/inf -> None so the state can go through json.dump"""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def from_json_value(value):
+    return np.nan if value is None else float(value)
+
+
+def divide(numerator, denominator):
+    """Division with NumPy semantics (x/0 -> inf, 0/0 -> NaN) instead of raising"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+class EMAState:
+    """Exponential moving average, pandas ewm(span, adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = np.nan
+        self._old_wt = 1.0
+
+    def update(self, x):
+        """Add one value, return the new average"""
+        observed = x == x
+        if self.value == self.value:
+            # A missing value decays the old weight, as in pandas
+            self._old_wt *= 1 - self.alpha
+            if observed:
+                self.value = (self._old_wt * self.value + self.alpha * x) / (self._old_wt + self.alpha)
+                self._old_wt = 1.0
+        elif observed:
+            self.value = float(x)
+        return self.value
+
+    def to_dict(self):
+        return {'span': self.span, 'value': to_json_value(self.value), 'old_wt': self._old_wt}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['span'])
+        state.value = from_json_value(data['value'])
+        state._old_wt = data['old_wt']
+        return state
+
+
+class RollingWindow:
+    """Last `period` values; sum/mean are NaN until full or if any value is NaN"""
+
+    def __init__(self, period):
+        self.period = period
+        self.values = deque(maxlen=period)
+
+    def update(self, x):
+        self.values.append(float(x))
+
+    def sum(self):
+        if len(self.values) < self.period:
+            return np.nan
+        return float(sum(self.values))
+
+    def mean(self):
+        return self.sum() / self.period
+
+    def to_dict(self):
+        return {'period': self.period, 'values': [to_json_value(v) for v in self.values]}
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data['period'])
+        window.values.extend(from_json_value(v) for v in data['values'])
+        return window
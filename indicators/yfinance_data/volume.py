@@ -2,7 +2,12 @@
 Calculate 20-day Volume Moving Average
 """
 
+import sys
+import os
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from indicators.yfinance_data.state import RollingWindow, divide
 
 
 def calculate_volume_ma(df, period=20):
@@ -43,5 +48,31 @@ def calculate_volume_ratio(df, period=20):
     return latest_volume / latest_ma
 
 
+class VolumeMAState:
+    """
+    Streaming volume MA: update(volume) per bar gives the same values as
+    calculate_volume_ma over the same bars
+    """
+    
+    def __init__(self, period=20):
+        self.period = period
+        self.window = RollingWindow(period)
+    
+    def update(self, volume):
+        """Add one bar's volume, return (volume_ma, volume_ratio)"""
+        self.window.update(volume)
+        volume_ma = self.window.mean()
+        return volume_ma, divide(volume, volume_ma)
+    
+    def to_dict(self):
+        return {'period': self.period, 'window': self.window.to_dict()}
+    
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['period'])
+        state.window = RollingWindow.from_dict(data['window'])
+        return state
+
+
 if __name__ == "__main__":
     print("Volume MA Calculator - Ready")
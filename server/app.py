@@ -1,16 +1,27 @@
 """
 Flask API Server for Stock Analysis
-Synchronous API that returns top N stocks directly
+/analyze serves the precomputed ranking snapshot; with "live": true it
+queues a background job - poll GET /jobs/<id> for progress and results
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from werkzeug.serving import is_running_from_reloader
 import sys
 import os
+import hashlib
 import logging
 from datetime import datetime
 
 # Add parent directory to path to import main
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from api_requests.main import run_analysis_batched
+from api_requests.main import run_analysis, run_analysis_batched
+from api_requests.nse_nifty500_list import get_nifty_500_stocks
+from api_requests.ohlcv_cache import last_complete_trading_date
+from api_requests.rate_limiter import throttle_stats
+from config.data_config import INTRADAY_REFRESH_MINUTES
+from config.server_config import RESULT_CACHE_TTL_SECONDS, INTRADAY_CACHE_TTL_SECONDS, SNAPSHOT_SCHEDULER
+from indicators.scoring_rules import get_scoring_rules, reload_scoring_rules
+from server.jobs import JobManager, QueueFull
+from server.snapshot import SnapshotScheduler, build_snapshot, stale_reason, top_from_snapshot
 
 app = Flask(__name__)
 
@@ -28,56 +39,314 @@ logging.basicConfig(
     ]
 )
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
+jobs = JobManager()
+
+
+def run_job(job):
+    """Run one /analyze job on a background worker"""
+    limit = job.params['limit']
+    intraday = job.params['intraday']
+    
+    # Use batched processing only for large limits (>= 500 stocks)
+    if limit >= 500:
+        logging.info("Processing full universe (paced by per-host rate limits)")
+        return run_analysis_batched(limit=5, intraday=intraday,  # Process all, return top 5
+                                    on_progress=job.on_progress, cancel=job.cancel)
+    logging.info(f"Processing first {limit} stocks")
+    return run_analysis(limit=limit, intraday=intraday,  # Process 'limit' stocks, return top 5
+                        on_progress=job.on_progress, cancel=job.cancel)
+
+
+def analysis_key(params):
     """
-    Synchronous API endpoint to analyze stocks
-    Request body: {"limit": 5}  (optional, defaults to 5)
-    Returns: Top N stocks with scores directly
+    Single-flight key of an /analyze request: requests with the same key
+    would compute the same ranking from the same end-of-day data
+    
+    Returns:
+        Tuple (key, ttl_seconds); key is None if the universe is unavailable
     """
     try:
-        data = request.get_json() or {}
-        limit = data.get('limit', 5)
-        
-        logging.info(f"Starting analysis for top {limit} stocks...")
-        
-        # Use batched processing only for large limits (>= 500 stocks)
-        if limit >= 500:
-            logging.info("Using batched processing (5 batches with 60s gaps)")
-            results = run_analysis_batched(limit=5)  # Process all, return top 5
-        else:
-            logging.info(f"Processing first {limit} stocks")
-            from api_requests.main import run_analysis
-            results = run_analysis(limit=limit)  # Process 'limit' stocks, return top 5
-        
-        if not results:
-            logging.warning("No results found")
-            return jsonify({
-                'status': 'completed',
-                'message': 'No stocks found',
-                'results': []
-            }), 200
-        
-        logging.info(f"Analysis completed. Found {len(results)} stocks")
-        
-        return jsonify({
-            'status': 'completed',
-            'message': f'Found top {len(results)} stocks',
-            'results': results
-        }), 200
-        
+        symbols = sorted(s['symbol'] for s in get_nifty_500_stocks() if s['symbol'] != 'NIFTY 500')
     except Exception as e:
-        logging.error(f"Error in analyze endpoint: {str(e)}")
+        logging.warning(f"Result cache bypassed (universe unavailable): {e}")
+        return None, 0
+    universe = hashlib.sha256(','.join(symbols).encode()).hexdigest()[:12]
+    
+    # Every limit >= 500 is the same full-universe run
+    limit = 'all' if params['limit'] >= 500 else params['limit']
+    if params['intraday']:
+        now = datetime.now()
+        as_of = (now.date().isoformat(), (now.hour * 60 + now.minute) // INTRADAY_REFRESH_MINUTES)
+        ttl = INTRADAY_CACHE_TTL_SECONDS
+    else:
+        as_of = last_complete_trading_date().isoformat()
+        ttl = RESULT_CACHE_TTL_SECONDS
+    return (as_of, universe, limit, params['intraday'], get_scoring_rules().version), ttl
+
+
+def refresh_snapshot():
+    """
+    Rank the full universe for the snapshot scheduler
+    
+    Goes through the job pool like a live /analyze request with limit 500,
+    so it shares (or reuses) an identical run instead of adding another.
+    """
+    params = {'limit': 500, 'intraday': False}
+    trading_date, version = last_complete_trading_date(), get_scoring_rules().version
+    key, ttl = analysis_key(params)
+    job, _ = jobs.submit(params, run_job, key=key, ttl=ttl)
+    
+    job.future.result()
+    if job.status != 'completed':
+        raise RuntimeError(f"Full-universe job {job.id} {job.status}: {job.error}")
+    universe = [s['symbol'] for s in get_nifty_500_stocks() if s['symbol'] != 'NIFTY 500']
+    return build_snapshot(job.partial, universe, trading_date, version)
+
+
+snapshots = SnapshotScheduler(refresh_snapshot)
+
+DEBUG = True  # app.run below (the debug reloader is on by default)
+
+
+def start_scheduler():
+    """
+    Run the snapshot scheduler in this process
+
+    Only one process per cache directory gets it (see SnapshotScheduler.start);
+    in the others /analyze serves the snapshot file that process writes.
+
+    Returns:
+        True if this process runs the schedule
+    """
+    return snapshots.start()
+
+
+# Under a WSGI server the scheduler is opt-in (STG_SNAPSHOT_SCHEDULER=1): importing
+# the app must not start a full-universe network run in every worker
+if SNAPSHOT_SCHEDULER and __name__ != '__main__':
+    start_scheduler()
+
+
+def job_response(job):
+    """Job status plus the config version it is scored with"""
+    return {**job.to_dict(), 'config_version': get_scoring_rules().version}
+
+def submit_analysis():
+    """
+    Parse the /analyze body and submit (or join) the job
+    
+    Returns:
+        Tuple (job, shared, error_response); error_response is a Flask
+        (response, status) pair when the request cannot be queued
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        params = {'limit': int(data.get('limit', 5)), 'intraday': bool(data.get('intraday', False))}
+    except (TypeError, ValueError) as e:
+        return None, None, (jsonify({'status': 'error', 'message': f"Invalid limit: {e}"}), 400)
+    
+    key, ttl = analysis_key(params)
+    try:
+        job, shared = jobs.submit(params, run_job, key=key, ttl=ttl)
+    except QueueFull as e:
+        logging.warning(f"Analysis rejected: {e}")
+        return None, None, (jsonify({'status': 'error', 'message': str(e)}), 429)
+    return job, shared, None
+
+
+def stream_response(job):
+    """
+    Stream a job's events as server-sent events or newline-delimited JSON
+    
+    SSE when the client accepts text/event-stream or asks for ?format=sse,
+    NDJSON ({"event": ..., "data": ...} per line) otherwise.
+    """
+    sse = (request.args.get('format') == 'sse'
+           or (request.args.get('format') is None and request.accept_mimetypes.best == 'text/event-stream'))
+    
+    def generate():
+        for event, data in job.events():
+            if event == 'done':
+                data = {**data, 'config_version': get_scoring_rules().version}
+            if sse:
+                yield f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+            else:
+                yield app.json.dumps({'event': event, 'data': data}) + "\n"
+    
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream' if sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Job-Id': job.id})
+
+def snapshot_response(data):
+    """/analyze answered from the ranking snapshot"""
+    snapshot = snapshots.current
+    if snapshot is None:
         return jsonify({
-            'status': 'error',
-            'message': str(e)
-        }), 500
+            'status': 'unavailable',
+            'message': 'No ranking snapshot yet; retry later or pass "live": true to run the analysis now',
+            'snapshot': snapshots.status()
+        }), 503
+    
+    try:
+        limit, top_n = int(data.get('limit', 500)), int(data.get('top', 5))
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f"Invalid limit/top: {e}"}), 400
+    
+    results = top_from_snapshot(snapshot, limit, top_n)
+    return jsonify({
+        'status': 'completed',
+        'source': 'snapshot',
+        'message': f'Found top {len(results)} stocks',
+        'as_of': snapshot['as_of'],
+        'trading_date': snapshot['trading_date'],
+        'config_version': snapshot['config_version'],
+        'stale': stale_reason(snapshot),
+        'results': results
+    }), 200
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """
+    Top stocks from the ranking snapshot, or a live analysis on request
+    Request body: {"limit": 5, "top": 5, "live": false, "intraday": false}  (all optional)
+        limit: rank only the first `limit` stocks of the universe (>= 500: all)
+        top: stocks to return from the snapshot
+        live: skip the snapshot and run the analysis now
+        intraday: score on today's partial bar from the live index quotes (implies live)
+    Returns:
+        Snapshot: 200 with results, as_of, trading_date and stale (the reason
+        it is out of date, or null); 503 if no snapshot exists yet
+        Live: 202 with job_id and status_url (429 if the queue is full);
+        200 with the results if an identical request already completed
+        (same trading date, universe, limit and config version, within the TTL)
+    """
+    data = request.get_json(silent=True) or {}
+    if not (data.get('live') or data.get('intraday')):
+        return snapshot_response(data)
+    
+    job, shared, error = submit_analysis()
+    if error:
+        return error
+    
+    # Same trading date, universe, limit and config already computed: answer now
+    if shared == 'cached':
+        logging.info(f"Serving cached results of job {job.id}")
+        return jsonify({**job_response(job), 'cached': True}), 200
+    
+    if shared == 'in_flight':
+        logging.info(f"Joined in-flight analysis job {job.id}")
+    else:
+        logging.info(f"Queued analysis job {job.id} for top {job.params['limit']} stocks")
+    return jsonify({
+        'status': job.status,
+        'job_id': job.id,
+        'shared': shared == 'in_flight',
+        'status_url': f'/jobs/{job.id}',
+        'cancel_url': f'/jobs/{job.id}/cancel'
+    }), 202
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """
+    Queue (or join) an analysis and stream its results as they complete
+    Request body: as for /analyze
+    Returns: SSE or NDJSON stream of stock, progress, top, ranking and done
+        events (see stream_response); a cached run replays at once
+    """
+    job, shared, error = submit_analysis()
+    if error:
+        return error
+    logging.info(f"Streaming analysis job {job.id}" + (f" ({shared})" if shared else ""))
+    return stream_response(job)
+
+@app.route('/snapshot', methods=['GET'])
+def snapshot_status():
+    """Ranking snapshot and scheduler state: as_of, trading date, staleness, next run"""
+    return jsonify(snapshots.status()), 200
+
+@app.route('/snapshot/refresh', methods=['POST'])
+def snapshot_refresh():
+    """
+    Rebuild the snapshot now in the background
+    Request body: {"force": false} - force recomputes even if it is current
+    """
+    data = request.get_json(silent=True) or {}
+    if not snapshots.trigger(force=bool(data.get('force', False))):
+        return jsonify({'status': 'error',
+                        'message': 'The snapshot scheduler runs in another process',
+                        **snapshots.status()}), 409
+    return jsonify({'status': 'refresh requested', **snapshots.status()}), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent jobs, oldest first (status and progress only)"""
+    return jsonify({'jobs': jobs.list()}), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Status, progress and results of one job
+    While running, results is the top N scored so far (partial: true)
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job {job_id}"}), 404
+    return jsonify(job_response(job)), 200
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def job_stream(job_id):
+    """Stream an existing job from its first result (EventSource-friendly GET)"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job {job_id}"}), 404
+    return stream_response(job)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job (a running one stops after the stock in progress)
+    A job shared by identical requests is cancelled for all of them
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job {job_id}"}), 404
+    logging.info(f"Cancel requested for job {job_id}")
+    return jsonify(job_response(job)), 200
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    return jsonify({'status': 'healthy'}), 200
+    """Health check endpoint (includes per-host request concurrency and queue depth)"""
+    return jsonify({'status': 'healthy', 'throttle': throttle_stats()}), 200
+
+@app.route('/config', methods=['GET'])
+def scoring_config():
+    """Scoring config in use: version hash, weights and warnings"""
+    return jsonify(get_scoring_rules().summary()), 200
+
+@app.route('/config/reload', methods=['POST'])
+def reload_config():
+    """
+    Recompile config/scoring_config.py (plus overrides) without a restart
+    Returns: the new config summary, or 400 with the validation errors
+    (the previous config stays in use)
+    """
+    try:
+        rules = reload_scoring_rules()
+    except (ValueError, SyntaxError, OSError) as e:
+        logging.error(f"Scoring config reload rejected: {e}")
+        return jsonify({'status': 'error', 'message': str(e),
+                        'config_version': get_scoring_rules().version}), 400
+    
+    dropped = jobs.invalidate()
+    # The snapshot was scored with the old config: rebuild it in the background
+    if not snapshots.trigger():
+        logging.warning("Snapshot not rebuilt: the scheduler runs in another process with its own config")
+    logging.info(f"Scoring config reloaded: version {rules.version} ({dropped} cached result(s) dropped)")
+    return jsonify({'status': 'reloaded', **rules.summary()}), 200
 
 if __name__ == '__main__':
+    # The debug reloader's file-watching parent never serves requests: schedule in the child
+    if not DEBUG or is_running_from_reloader():
+        start_scheduler()
     logging.info("Starting Flask server on port 5000...")
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    app.run(debug=DEBUG, port=5000, host='0.0.0.0')
@@ -0,0 +1,304 @@
+"""
+Background Jobs: Run analyses off the request thread
+
+POST /analyze submits a job and returns its ID at once. The job runs on a
+small bounded thread pool; GET /jobs/<id> reads its status, progress and
+the running top N, and POST /jobs/<id>/cancel stops it (a queued job never
+starts, a running one stops after the stock in progress).
+
+Job states: queued -> running -> completed | failed | cancelled
+
+Single flight: a job submitted with a key is shared. While a job with the
+same key is queued or running, identical requests get that job instead of
+starting another; once it completes, they get its results until its TTL
+runs out or invalidate() is called (e.g., on a config reload). Failed and
+cancelled jobs are never reused.
+
+Streaming: job.events() yields every scored stock as it completes, a
+running top N every few stocks, and the final ranking - replayed from the
+start for a client that joins late or hits a cached job.
+"""
+
+import sys
+import os
+import uuid
+import logging
+import time
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.main import AnalysisCancelled
+from config.server_config import (
+    JOB_WORKERS,
+    JOB_QUEUE_LIMIT,
+    JOB_HISTORY,
+    JOB_PARTIAL_TOP_N,
+    RESULT_CACHE_TTL_SECONDS,
+    STREAM_TOP_EVERY,
+    STREAM_HEARTBEAT_SECONDS
+)
+
+FINISHED = ('completed', 'failed', 'cancelled')
+
+
+class QueueFull(Exception):
+    """Raised by submit() when JOB_QUEUE_LIMIT jobs are already waiting"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class Job:
+    """
+    One analysis request and everything reported about it
+
+    Attributes:
+        id: Job ID (hex string)
+        params: Request parameters (limit, intraday)
+        status: queued, running, completed, failed or cancelled
+        stage: Pipeline step in progress ('fetching', 'scoring')
+        done, total: Stocks scored so far / stocks in the run
+        partial: Results scored so far (unsorted)
+        results: Final top N (once completed)
+        error: Message of a failed or cancelled run
+        cancel: threading.Event the pipeline checks between stocks
+        key: Single-flight key (None: never shared)
+        ttl: Seconds the completed results may be reused
+    """
+
+    def __init__(self, params, key=None, ttl=RESULT_CACHE_TTL_SECONDS):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.key = key
+        self.ttl = ttl
+        self.status = 'queued'
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.partial = []
+        self.results = None
+        self.error = None
+        self.cancel = threading.Event()
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.completed_monotonic = None
+        self._lock = threading.Lock()
+        # Wakes streaming readers on every new result and when the job finishes
+        self._changed = threading.Condition(self._lock)
+
+    def reusable(self):
+        """In flight, or completed within its TTL"""
+        if self.status in ('queued', 'running'):
+            return not self.cancel.is_set()
+        return (self.status == 'completed'
+                and time.monotonic() - self.completed_monotonic < self.ttl)
+
+    def on_progress(self, stage, done, total, result):
+        """Progress callback for fetch_and_score_all_stocks"""
+        with self._lock:
+            self.stage, self.done, self.total = stage, done, total
+            if result:
+                self.partial.append(result)
+            self._changed.notify_all()
+
+    def _running_top(self, top_n):
+        return sorted(self.partial, key=lambda x: x['total_score'], reverse=True)[:top_n]
+
+    def events(self, top_n=JOB_PARTIAL_TOP_N, top_every=STREAM_TOP_EVERY, heartbeat=STREAM_HEARTBEAT_SECONDS):
+        """
+        Stream of (event, data) pairs until the job finishes
+
+        Events:
+            stock: One scored stock's result, as soon as it completes
+            progress: {stage, done, total}, when the stage changes
+            top: Running top N, after every `top_every` stocks
+            ranking: Every scored stock as {rank, symbol, total_score}, best first
+            done: Final status (the GET /jobs/<id> body, with the top N results)
+            heartbeat: Nothing new for `heartbeat` seconds (keeps proxies from timing out)
+        """
+        sent, stage = 0, None
+        while True:
+            with self._lock:
+                self._changed.wait_for(
+                    lambda: len(self.partial) > sent or self.stage != stage or self.status in FINISHED,
+                    timeout=heartbeat)
+                new = self.partial[sent:]
+                finished = self.status in FINISHED
+                progress = {'stage': self.stage, 'done': self.done, 'total': self.total}
+
+            stage_changed = progress['stage'] != stage
+            if stage_changed:
+                stage = progress['stage']
+                yield 'progress', progress
+            for result in new:
+                yield 'stock', result
+                sent += 1
+                if sent % top_every == 0:
+                    with self._lock:
+                        top = self._running_top(top_n)
+                    yield 'top', {'scored': sent, 'results': top}
+
+            if finished:
+                with self._lock:
+                    ranked = sorted(self.partial, key=lambda x: x['total_score'], reverse=True)
+                yield 'ranking', [{'rank': rank, 'symbol': result['symbol'], 'total_score': result['total_score']}
+                                  for rank, result in enumerate(ranked, 1)]
+                yield 'done', self.to_dict(top_n)
+                return
+            if not new and not stage_changed:
+                yield 'heartbeat', progress
+
+    def to_dict(self, top_n=JOB_PARTIAL_TOP_N):
+        """JSON-safe status; the running top N while in progress, the final results after"""
+        with self._lock:
+            results = self.results if self.results is not None else self._running_top(top_n)
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'params': self.params,
+                'progress': {'stage': self.stage, 'done': self.done, 'total': self.total,
+                             'scored': len(self.partial)},
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error,
+                'partial': self.results is None,
+                'results': results,
+            }
+
+
+class JobManager:
+    """
+    Bounded pool of background analyses plus a registry of recent jobs
+
+    Args:
+        workers: Jobs running at once
+        queue_limit: Jobs allowed to wait for a worker
+        history: Finished jobs kept (oldest dropped first)
+    """
+
+    def __init__(self, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT, history=JOB_HISTORY):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis-job')
+        self.queue_limit = queue_limit
+        self.history = history
+        self.jobs = OrderedDict()
+        self.by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, params, run, key=None, ttl=RESULT_CACHE_TTL_SECONDS):
+        """
+        Queue run(job) on the pool, or hand back the job already serving key
+
+        Args:
+            params: Request parameters recorded on the job
+            run: Callable taking the Job and returning its final results;
+                it should pass job.on_progress and job.cancel to the pipeline
+            key: Hashable single-flight key (None: always a new job)
+            ttl: Seconds a completed job keeps answering its key
+
+        Returns:
+            Tuple (job, shared): shared is None for a new job, 'in_flight'
+            or 'cached' for an existing one
+
+        Raises:
+            QueueFull if queue_limit jobs are already waiting
+        """
+        with self._lock:
+            existing = self.by_key.get(key) if key is not None else None
+            if existing is not None:
+                with existing._lock:
+                    if existing.reusable():
+                        return existing, 'cached' if existing.status == 'completed' else 'in_flight'
+
+            queued = sum(job.status == 'queued' for job in self.jobs.values())
+            if queued >= self.queue_limit:
+                raise QueueFull(f"{queued} analyses already queued, try again later")
+            job = Job(params, key=key, ttl=ttl)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.by_key[key] = job
+            self._prune()
+            # Submitted under the lock so a concurrent identical request never sees future unset
+            job.future = self.executor.submit(self._run, job, run)
+        return job, None
+
+    def _run(self, job, run):
+        with job._lock:
+            if job.cancel.is_set():
+                return
+            job.status, job.started_at = 'running', _now()
+        logging.info(f"Job {job.id} started: {job.params}")
+
+        try:
+            results = run(job)
+        except AnalysisCancelled as e:
+            status, error, results = 'cancelled', str(e), None
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed")
+            status, error, results = 'failed', str(e), None
+        else:
+            status, error = 'completed', None
+
+        with job._lock:
+            job.status, job.error, job.finished_at = status, error, _now()
+            job.completed_monotonic = time.monotonic()
+            if results is not None:
+                job.results = results
+            job._changed.notify_all()
+        logging.info(f"Job {job.id} {status}" + (f": {error}" if error else ""))
+
+    def get(self, job_id):
+        """The Job, or None if unknown or already dropped from the history"""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Stop a job: a queued one never starts, a running one stops after
+        the stock in progress (its status turns 'cancelled' when it does)
+
+        Returns:
+            The Job, or None if unknown
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel.set()
+        with job._lock:
+            if job.status == 'queued':
+                job.status, job.error, job.finished_at = 'cancelled', "Cancelled before start", _now()
+                if job.future is not None:
+                    job.future.cancel()
+                job._changed.notify_all()
+        return job
+
+    def invalidate(self):
+        """
+        Stop reusing every job's results (the jobs stay readable by ID)
+
+        Returns:
+            Number of keys dropped
+        """
+        with self._lock:
+            dropped = len(self.by_key)
+            self.by_key.clear()
+        return dropped
+
+    def list(self):
+        """Status of every known job, oldest first (without results)"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [{key: value for key, value in job.to_dict().items() if key != 'results'} for job in jobs]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            job = self.jobs.pop(job_id)
+            if job.key is not None and self.by_key.get(job.key) is job:
+                del self.by_key[job.key]
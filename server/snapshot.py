@@ -0,0 +1,318 @@
+"""
+Ranking Snapshot: The full-universe ranking, precomputed on a schedule
+
+Scores only move with end-of-day data, so the full universe is ranked by a
+background scheduler at SNAPSHOT_TIMES (after the NSE close, and pre-open)
+and the ranking is written to disk atomically. /analyze serves its top N from the snapshot; the
+snapshot is loaded again when the server starts.
+
+A scheduled run only recomputes when the snapshot is stale: missing, older
+than the last complete trading date, or scored with another config version.
+The session counts as complete once the close plus a settle margin has
+passed (see last_complete_trading_date), so the post-close run ranks that
+day's bar; the pre-open run then finds the snapshot current and only
+recomputes if the post-close run was missed or failed.
+
+The scheduler only runs where it is started explicitly, and in at most one
+process per cache directory (an exclusive lock on SCHEDULER_LOCK_FILE);
+other processes pick up each new snapshot from disk.
+
+Snapshot (CACHE_DIR/metadata/ranking_snapshot.json):
+    {"as_of": "2025-10-17T08:31:02", "trading_date": "2025-10-16",
+     "config_version": "...", "universe": [symbols in run order],
+     "results": [every scored stock, best first]}
+"""
+
+import sys
+import os
+import json
+import logging
+import threading
+import numpy as np
+from datetime import datetime, timedelta, time as dt_time
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard
+    fcntl = None
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_requests.ohlcv_cache import last_complete_trading_date
+from config.data_config import CACHE_DIR
+from config.server_config import SNAPSHOT_TIMES, SNAPSHOT_REFRESH_ON_START
+from indicators.scoring_rules import get_scoring_rules
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'ranking_snapshot.json')
+SCHEDULER_LOCK_FILE = os.path.join(PROJECT_ROOT, CACHE_DIR, 'metadata', 'snapshot_scheduler.lock')
+
+
+def _json_default(value):
+    """numpy scalars (from the vectorized scorer) as plain Python numbers"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def build_snapshot(results, universe, trading_date, config_version, as_of=None):
+    """
+    Snapshot dict from one full-universe run
+
+    Args:
+        results: Every scored stock's result dict (any order)
+        universe: Symbols in the order the run processed them
+        trading_date: Last complete trading date the run was based on
+        config_version: Scoring config version the run used
+    """
+    return {
+        'as_of': (as_of or datetime.now()).isoformat(timespec='seconds'),
+        'trading_date': str(trading_date),
+        'config_version': config_version,
+        'universe': list(universe),
+        'results': sorted(results, key=lambda x: x['total_score'], reverse=True),
+    }
+
+
+def save_snapshot(snapshot, path=SNAPSHOT_FILE):
+    """Write the snapshot atomically (readers never see a partial file)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(snapshot, f, default=_json_default)
+    os.replace(tmp_file, path)
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """The saved snapshot, or None if missing or unreadable"""
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+        return snapshot if 'results' in snapshot else None
+    except (OSError, ValueError):
+        return None
+
+
+def acquire_process_lock(path):
+    """
+    Exclusive lock on `path`, held for as long as the returned file stays open
+
+    Returns:
+        Open file object, or None if another process holds the lock
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock = open(path, 'a')
+    if fcntl is None:
+        return lock
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def stale_reason(snapshot, now=None):
+    """Why the snapshot needs recomputing, or None if it is current"""
+    if snapshot is None:
+        return 'no snapshot'
+    if snapshot['trading_date'] < last_complete_trading_date(now).isoformat():
+        return f"trading date {snapshot['trading_date']} is behind {last_complete_trading_date(now)}"
+    if snapshot['config_version'] != get_scoring_rules().version:
+        return f"config {snapshot['config_version']} is not the current {get_scoring_rules().version}"
+    return None
+
+
+def top_from_snapshot(snapshot, limit=None, top_n=5):
+    """
+    Top N of the snapshot, as a live run over the first `limit` stocks would rank them
+
+    Args:
+        limit: Only stocks among the first `limit` of the universe (None or >= 500: all)
+        top_n: Stocks to return
+    """
+    results = snapshot['results']
+    if limit is not None and limit < min(500, len(snapshot['universe'])):
+        allowed = set(snapshot['universe'][:limit])
+        results = [result for result in results if result['symbol'] in allowed]
+    return results[:top_n]
+
+
+class SnapshotScheduler:
+    """
+    Background thread that keeps the snapshot current
+
+    Args:
+        refresh: Callable running the full-universe analysis and returning
+            a new snapshot dict (see build_snapshot)
+        times: Local 'HH:MM' times to check the snapshot every day
+        path: Snapshot file
+        lock_path: Lock file that keeps the schedule to one process
+    """
+
+    def __init__(self, refresh, times=SNAPSHOT_TIMES, path=SNAPSHOT_FILE, lock_path=SCHEDULER_LOCK_FILE):
+        self.refresh = refresh
+        self.times = sorted(dt_time.fromisoformat(t) for t in times)
+        self.path = path
+        self.lock_path = lock_path
+        self._current, self._mtime = load_snapshot(path), self._file_mtime()
+        self.running = False
+        self.last_run = None
+        self.last_error = None
+        self._force = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._process_lock = None
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    @property
+    def current(self):
+        """The latest snapshot, reloaded when another process saved a newer file"""
+        mtime = self._file_mtime()
+        if mtime is not None and mtime != self._mtime:
+            snapshot = load_snapshot(self.path)
+            if snapshot is not None:
+                self._current, self._mtime = snapshot, mtime
+        return self._current
+
+    def next_run(self, now=None):
+        """Next scheduled check after now (None if no times are configured)"""
+        now = now or datetime.now()
+        for days in range(2):
+            day = now.date() + timedelta(days=days)
+            for t in self.times:
+                if datetime.combine(day, t) > now:
+                    return datetime.combine(day, t)
+        return None
+
+    @property
+    def started(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start the scheduler thread; checks right away if SNAPSHOT_REFRESH_ON_START
+
+        Returns:
+            True if this process runs the schedule, False if another
+            process already holds the scheduler lock
+        """
+        with self._lock:
+            if self.started:
+                return True
+            if self._process_lock is None:
+                self._process_lock = acquire_process_lock(self.lock_path)
+                if self._process_lock is None:
+                    logging.info("Snapshot scheduler already runs in another process")
+                    return False
+            self._thread = threading.Thread(target=self._loop, name='snapshot-scheduler', daemon=True)
+        self._thread.start()
+        if SNAPSHOT_REFRESH_ON_START:
+            self.trigger()
+        logging.info(f"Snapshot scheduler started (times: {', '.join(t.strftime('%H:%M') for t in self.times)}; "
+                     f"snapshot: {self.current['as_of'] if self.current else 'none'})")
+        return True
+
+    def trigger(self, force=False):
+        """
+        Check now instead of at the next scheduled time; force recomputes even if current
+
+        Without a running scheduler thread the check runs on a one-off
+        background thread, holding the scheduler lock for its duration.
+
+        Returns:
+            False if the scheduler runs in another process (which is not
+            signalled; it refreshes at its own times)
+        """
+        if not self.started:
+            lock = None if self._process_lock else acquire_process_lock(self.lock_path)
+            if lock is None and self._process_lock is None:
+                logging.info("Snapshot refresh not started: the scheduler runs in another process")
+                return False
+
+            def run():
+                try:
+                    self.run_once(force=force)
+                finally:
+                    if lock is not None:
+                        lock.close()
+
+            threading.Thread(target=run, name='snapshot-refresh', daemon=True).start()
+            return True
+        with self._lock:
+            self._force = self._force or force
+        self._wake.set()
+        return True
+
+    def _loop(self):
+        while True:
+            wake_at = self.next_run()
+            timeout = (wake_at - datetime.now()).total_seconds() if wake_at else None
+            self._wake.wait(timeout=max(0, timeout) if timeout is not None else None)
+            self._wake.clear()
+            with self._lock:
+                force, self._force = self._force, False
+            self.run_once(force=force)
+
+    def run_once(self, force=False):
+        """
+        Recompute and save the snapshot if it is stale (or forced)
+
+        Returns:
+            True if a new snapshot was saved (False also when another
+            refresh is already in progress)
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            logging.info("Snapshot refresh already in progress")
+            return False
+        try:
+            return self._refresh(force)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, force):
+        reason = 'forced' if force else stale_reason(self.current)
+        if reason is None:
+            self.last_run = datetime.now().isoformat(timespec='seconds')
+            logging.info(f"Snapshot for {self.current['trading_date']} is current, skipping refresh")
+            return False
+
+        logging.info(f"Refreshing ranking snapshot ({reason})")
+        self.running = True
+        try:
+            snapshot = self.refresh()
+            save_snapshot(snapshot, self.path)
+            self._current, self._mtime = snapshot, self._file_mtime()
+            self.last_error = None
+            logging.info(f"Snapshot saved: {len(snapshot['results'])} stocks, "
+                         f"trading date {snapshot['trading_date']}, as of {snapshot['as_of']}")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            logging.error(f"Snapshot refresh failed: {e}")
+            return False
+        finally:
+            self.running = False
+            self.last_run = datetime.now().isoformat(timespec='seconds')
+
+    def status(self):
+        """JSON-safe scheduler and snapshot state (without the results)"""
+        snapshot = self.current
+        next_run = self.next_run()
+        return {
+            'as_of': snapshot['as_of'] if snapshot else None,
+            'trading_date': snapshot['trading_date'] if snapshot else None,
+            'config_version': snapshot['config_version'] if snapshot else None,
+            'stocks': len(snapshot['results']) if snapshot else 0,
+            'stale': stale_reason(snapshot),
+            'scheduler': 'this process' if self.started else 'not running here',
+            'refreshing': self.running,
+            'last_run': self.last_run,
+            'last_error': self.last_error,
+            'next_run': next_run.isoformat(timespec='minutes') if next_run else None,
+        }
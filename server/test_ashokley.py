@@ -3,6 +3,7 @@ Test script to fetch ASHOKLEY score from the API
 """
 import requests
 import json
+from test_client import wait_for_job
 
 def test_ashokley():
     """Test ASHOKLEY score by calling the analyze endpoint"""
@@ -18,6 +19,8 @@ def test_ashokley():
     
     try:
         response = requests.post(url, json=payload)
+        if response.status_code == 202:
+            response = wait_for_job(response)
         
         if response.status_code == 200:
             data = response.json()
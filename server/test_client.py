@@ -18,6 +18,31 @@ def test_health():
     print(f"Response: {response.json()}")
     return response.status_code == 200
 
+def wait_for_job(response, poll_seconds=5):
+    """
+    Poll the job queued by POST /analyze until it finishes
+    
+    Args:
+        response: The 202 response of POST /analyze
+        poll_seconds: Seconds between GET /jobs/<id> calls
+    
+    Returns:
+        The last GET /jobs/<id> response (status completed, failed or cancelled)
+    """
+    status_url = BASE_URL + response.json()['status_url']
+    print(f"Job queued: {status_url}")
+    
+    while True:
+        response = requests.get(status_url)
+        if response.status_code != 200:
+            return response
+        data = response.json()
+        if data['status'] in ('completed', 'failed', 'cancelled'):
+            return response
+        progress = data['progress']
+        print(f"  {data['status']}: {progress['stage'] or 'waiting'} {progress['done']}/{progress['total']}")
+        time.sleep(poll_seconds)
+
 def test_analyze(limit=10):
     """Test analyze endpoint"""
     print("\n" + "="*80)
@@ -27,11 +52,16 @@ def test_analyze(limit=10):
     payload = {"limit": limit}
     
     response = requests.post(f"{BASE_URL}/analyze", json=payload)
+    if response.status_code == 202:
+        response = wait_for_job(response)
     
     if response.status_code == 200:
         data = response.json()
         print(f"\nStatus: {data.get('status')}")
-        print(f"Message: {data.get('message')}")
+        if data.get('as_of'):
+            print(f"Snapshot as of {data['as_of']} (trading date {data['trading_date']})")
+        if data.get('error'):
+            print(f"Error: {data['error']}")
         
         results = data.get('results', [])
         if results:
@@ -3,6 +3,7 @@ Test script to call /analyze API with limit=5
 """
 import requests
 import json
+from test_client import wait_for_job
 from datetime import datetime
 
 def test_limit_5():
@@ -17,12 +18,15 @@ def test_limit_5():
     
     try:
         response = requests.post(url, json=payload)
+        if response.status_code == 202:
+            response = wait_for_job(response)
         
         if response.status_code == 200:
             data = response.json()
             
             print(f"\nStatus: {data.get('status')}")
-            print(f"Message: {data.get('message')}")
+            if data.get('error'):
+                print(f"Error: {data['error']}")
             print(f"\nTop 5 Stocks:")
             print("-"*80)
             